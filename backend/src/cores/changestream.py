@@ -0,0 +1,144 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set
+from pymongo.errors import OperationFailure, PyMongoError
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from utils.logger import logger
+
+"""NOTE:
+Cross-worker cache invalidation.
+
+Every worker process watches a single MongoDB change stream on the database,
+filtered to the collections that have registered listeners, and forwards each
+change event to them (e.g. `FacetCache.on_change`). Writes made by another
+worker or replica are then reflected in the in-process caches right away
+instead of after their TTL.
+
+The filtering is done by the server: updates are only streamed when they
+touch one of the fields the listeners of the collection registered, so the
+frequent OTA progress updates of the logs never reach the workers.
+
+The resume token is only kept in memory, to resume after a transient error.
+Whenever the stream is opened without one (on startup, or when the token is
+too old to resume from because the oplog rolled over), every cache is
+invalidated once the stream is open, so a change made before that, and
+missed by the stream, can't be served from a cache.
+
+Change streams need a replica set (a single-node one is enough), on a
+standalone server the watcher logs a warning and stops, the caches then rely
+on their TTL only.
+"""
+ChangeListener = Callable[[Mapping[str, Any]], None]
+
+RETRY_DELAY_SECONDS = 5
+
+# $changeStream is only supported on replica sets
+NOT_REPLICA_SET_CODE = 40573
+# Resume token is unknown or no longer in the oplog
+RESUME_FAILED_CODES = (260, 280, 286)
+
+_listeners: Dict[str, List[ChangeListener]] = defaultdict(list)
+# Fields whose updates are streamed, None streams every update of the collection
+_update_fields: Dict[str, Optional[Set[str]]] = {}
+
+
+def register_change_listener(
+    collection_name: str,
+    listener: ChangeListener,
+    update_fields: Optional[Iterable[str]] = None
+) -> None:
+    """
+    Call `listener` with the change events of `collection_name`.
+    Update events are only passed when they touch one of `update_fields` (all of them if None),
+    every other event (insert, delete, replace, drop, rename, invalidate) is always passed.
+    Listeners run on the event loop, they must be quick and must not block.
+    """
+    _listeners[collection_name].append(listener)
+
+    if update_fields is None or _update_fields.get(collection_name, set()) is None:
+        _update_fields[collection_name] = None
+    else:
+        _update_fields[collection_name] = _update_fields.get(collection_name, set()) | set(update_fields)
+
+
+def _build_pipeline() -> List[Dict[str, Any]]:
+    """
+    Match the events of the watched collections, and only the updates of the registered fields.
+    """
+    # Database wide events, they concern every collection
+    matches: List[Dict[str, Any]] = [{"operationType": {"$in": ["dropDatabase", "invalidate"]}}]
+    for collection_name, fields in _update_fields.items():
+        if fields is None:
+            matches.append({"ns.coll": collection_name})
+            continue
+
+        matches.append({
+            "ns.coll": collection_name,
+            "$or": [
+                {"operationType": {"$ne": "update"}},
+                *({f"updateDescription.updatedFields.{field}": {"$exists": True}} for field in sorted(fields)),
+                {"updateDescription.removedFields": {"$in": sorted(fields)}}
+            ]
+        })
+    return [{"$match": {"$or": matches}}]
+
+
+def _dispatch(change: Mapping[str, Any]) -> None:
+    collection_name = change.get("ns", {}).get("coll")
+    if collection_name is None:
+        # dropDatabase or invalidate of the whole stream
+        _invalidate_all()
+        return
+
+    for listener in _listeners.get(collection_name, []):
+        try:
+            listener(change)
+        except Exception as e:
+            logger.db_error(f"Change listener failed on '{collection_name}'", e)
+
+
+def _invalidate_all() -> None:
+    """
+    Tell every listener its collection may have changed, used when events may have been missed.
+    """
+    for collection_name in list(_listeners):
+        _dispatch({"operationType": "invalidate", "ns": {"coll": collection_name}})
+
+
+async def watch_cache_invalidations(db: AsyncIOMotorDatabase) -> None:
+    """
+    Background task forwarding the change events of the watched collections to their listeners.
+    """
+    if not _listeners:
+        return
+
+    resume_token: Optional[Mapping[str, Any]] = None
+    pipeline = _build_pipeline()
+
+    while True:
+        try:
+            async with db.watch(pipeline, resume_after=resume_token) as stream:
+                logger.db_info(f"Cache change stream started - Collections: {list(_listeners)}, Resumed: {resume_token is not None}")
+                if resume_token is None:
+                    # The changes made before the stream was open are not streamed
+                    _invalidate_all()
+                # Resumable from here even if no event arrives before an error
+                resume_token = stream.resume_token
+
+                async for change in stream:
+                    _dispatch(change)
+                    resume_token = stream.resume_token
+        except OperationFailure as e:
+            if e.code == NOT_REPLICA_SET_CODE:
+                logger.db_warning("MongoDB is not a replica set, cache change stream disabled (caches rely on their TTL)")
+                return
+            if e.code in RESUME_FAILED_CODES:
+                logger.db_warning(f"Cannot resume the cache change stream, restarting from now: {e}")
+                resume_token = None
+                continue
+            logger.db_error("Cache change stream failed", e)
+        except PyMongoError as e:
+            logger.db_error("Cache change stream interrupted", e)
+
+        await asyncio.sleep(RETRY_DELAY_SECONDS)
@@ -30,10 +30,28 @@ class Environment(BaseSettings):
     MONGO_DATABASE_NAME: str = getenv("MONGO_DATABASE_NAME", "app_db")
 
     # Construct the MongoDB connection URL
+    # Write concern is not part of the URL, it's set per operation profile below
     if MONGO_USERNAME and MONGO_PASSWORD:
-        MONGO_CONNECTION_URL: str = f"mongodb://{MONGO_USERNAME}:{MONGO_PASSWORD}@{MONGO_HOST}/{MONGO_DATABASE_NAME}?authSource=admin&retryWrites=true&w=majority"
+        MONGO_CONNECTION_URL: str = f"mongodb://{MONGO_USERNAME}:{MONGO_PASSWORD}@{MONGO_HOST}/{MONGO_DATABASE_NAME}?authSource=admin&retryWrites=true"
     else:
-        MONGO_CONNECTION_URL: str = f"mongodb://{MONGO_HOST}/{MONGO_DATABASE_NAME}?retryWrites=true&w=majority"
+        MONGO_CONNECTION_URL: str = f"mongodb://{MONGO_HOST}/{MONGO_DATABASE_NAME}?retryWrites=true"
+
+    # MongoDB connection pool, 0 means no limit for the idle time and wait queue timeout
+    MONGO_MIN_POOL_SIZE: int = int(getenv("MONGO_MIN_POOL_SIZE", 0))
+    MONGO_MAX_POOL_SIZE: int = int(getenv("MONGO_MAX_POOL_SIZE", 100))
+    MONGO_MAX_IDLE_TIME_MS: int = int(getenv("MONGO_MAX_IDLE_TIME_MS", 0))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = int(getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 0))
+    # Comma separated wire compressors in order of preference (zstd, snappy, zlib), empty to disable
+    MONGO_COMPRESSORS: str = getenv("MONGO_COMPRESSORS", "")
+
+    # Read preference: primary, primaryPreferred, secondary, secondaryPreferred or nearest
+    MONGO_READ_PREFERENCE: str = getenv("MONGO_READ_PREFERENCE", "primary")
+    # Used by list, export and analytics queries, which can tolerate slightly stale data
+    MONGO_READ_PREFERENCE_ANALYTICS: str = getenv("MONGO_READ_PREFERENCE_ANALYTICS", "primary")
+    # Write concern: "majority" or a number of members
+    MONGO_WRITE_CONCERN: str = getenv("MONGO_WRITE_CONCERN", "majority")
+    # Used by the high-volume OTA log writes coming from MQTT
+    MONGO_WRITE_CONCERN_LOGS: str = getenv("MONGO_WRITE_CONCERN_LOGS", "1")
 
     # MQTT settings
     MQTT_BROKER_URL: str = getenv("MQTT_BROKER_URL", "broker.emqx.io")
@@ -48,7 +66,29 @@ class Environment(BaseSettings):
     MQTT_SUBSCRIBE_TOPIC_LOG_LOCAL: str = getenv("MQTT_SUBSCRIBE_TOPIC_LOG_LOCAL", "LocalOTAUpdate")
     MQTT_PUBLISH_TOPIC_LOG: str = getenv("MQTT_PUBLISH_TOPIC_LOG", "DisplayLog")
     MQTT_CLIENT_ID: str = getenv("MQTT_CLIENT_ID", f"lokasync_backend_{randint(1000, 9999)}")
+    # Shared subscription group, the replicas of a group split the OTA log messages instead of all receiving them, empty to disable
+    MQTT_SHARED_SUBSCRIPTION_GROUP: str = getenv("MQTT_SHARED_SUBSCRIPTION_GROUP", "")
     MQTT_DEFAULT_QOS: int = int(getenv("MQTT_DEFAULT_QOS", 1))
+    # Write-behind buffer of OTA log updates, 0 writes every message right away
+    MQTT_LOG_FLUSH_INTERVAL_MS: int = int(getenv("MQTT_LOG_FLUSH_INTERVAL_MS", 250))
+    MQTT_LOG_FLUSH_MAX_SESSIONS: int = int(getenv("MQTT_LOG_FLUSH_MAX_SESSIONS", 500))
+    # Ingestion queue of OTA log updates, sharded by session id with one consumer task per shard
+    MQTT_INGEST_SHARDS: int = int(getenv("MQTT_INGEST_SHARDS", 4))
+    MQTT_INGEST_QUEUE_SIZE: int = int(getenv("MQTT_INGEST_QUEUE_SIZE", 1000))
+    # block, drop_oldest or spill, see externals/mqtts/ingest.py
+    MQTT_INGEST_OVERFLOW_POLICY: str = getenv("MQTT_INGEST_OVERFLOW_POLICY", "block")
+    # Relative paths are resolved from the backend folder
+    MQTT_INGEST_SPILL_DIR: str = getenv("MQTT_INGEST_SPILL_DIR", "spill")
+    # Redelivered MQTT messages seen within the TTL are dropped, 0 disables the filter
+    MQTT_DEDUPE_TTL_SECONDS: int = int(getenv("MQTT_DEDUPE_TTL_SECONDS", 60))
+    MQTT_DEDUPE_MAX_ENTRIES: int = int(getenv("MQTT_DEDUPE_MAX_ENTRIES", 10000))
+    # Saved logs of a session are merged for this long and published to the frontend as one delta, 0 publishes right away
+    MQTT_PUBLISH_COALESCE_MS: int = int(getenv("MQTT_PUBLISH_COALESCE_MS", 500))
+    MQTT_PUBLISH_MAX_SESSIONS: int = int(getenv("MQTT_PUBLISH_MAX_SESSIONS", 10000))
+    # QoS of the progress updates published to the frontend, terminal updates use MQTT_DEFAULT_QOS
+    MQTT_PUBLISH_PROGRESS_QOS: int = int(getenv("MQTT_PUBLISH_PROGRESS_QOS", getenv("MQTT_DEFAULT_QOS", 1)))
+    # MQTT 5 only: progress updates not delivered within this time are discarded by the broker, 0 disables
+    MQTT_PUBLISH_MESSAGE_EXPIRY_SECONDS: int = int(getenv("MQTT_PUBLISH_MESSAGE_EXPIRY_SECONDS", 30))
 
     # Firebase auth settings
     FIREBASE_CREDS_NAME: str = getenv("FIREBASE_CREDS_NAME", "firebase-credentials.json")
@@ -57,6 +97,19 @@ class Environment(BaseSettings):
     GOOGLE_DRIVE_MAX_FILE_SIZE_MB: int = int(getenv("GOOGLE_DRIVE_MAX_FILE_SIZE_MB", 3))
     GOOGLE_DRIVE_CREDS_NAME: str = getenv("GOOGLE_DRIVE_CREDS_NAME", "gdrive-credentials.json")
     GOOGLE_DRIVE_FOLDER_ID: str = getenv("GOOGLE_DRIVE_FOLDER_ID", None)
+    # Files deleted in parallel by the bulk delete background jobs
+    GOOGLE_DRIVE_DELETE_CONCURRENCY: int = int(getenv("GOOGLE_DRIVE_DELETE_CONCURRENCY", 8))
+
+    # OTA log retention settings, 0 days keeps every log in MongoDB
+    LOG_RETENTION_DAYS: int = int(getenv("LOG_RETENTION_DAYS", 0))
+    LOG_RETENTION_INTERVAL_MINUTES: int = int(getenv("LOG_RETENTION_INTERVAL_MINUTES", 60))
+    # Relative paths are resolved from the backend folder
+    LOG_ARCHIVE_DIR: str = getenv("LOG_ARCHIVE_DIR", "archives")
+
+    # Filter options cache settings
+    FACET_CACHE_TTL_SECONDS: int = int(getenv("FACET_CACHE_TTL_SECONDS", 300))
+    # Invalidate the caches of every worker from a MongoDB change stream (replica set only)
+    CACHE_CHANGE_STREAM_ENABLED: bool = getenv("CACHE_CHANGE_STREAM_ENABLED", "True").lower() == "true"
 
     # Timezone settings
     TIMEZONE: str = getenv("TIMEZONE", "Asia/Jakarta")
@@ -1,12 +1,61 @@
+from typing import Any, Dict
 from motor.motor_asyncio import AsyncIOMotorClient
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReadPreference, WriteConcern
 
 from cores.config import env
+from cores.indexes import ensure_indexes
+from cores.migrations import get_pending_migrations, run_migrations
 from utils.logger import logger
 
-client: AsyncIOMotorClient = AsyncIOMotorClient(env.MONGO_CONNECTION_URL)
+_READ_PREFERENCES: Dict[str, Any] = {
+    "primary": ReadPreference.PRIMARY,
+    "primarypreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondarypreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+def get_read_preference(name: str) -> Any:
+    """
+    Parse a read preference name, falls back to primary if it's unknown.
+    """
+    read_preference = _READ_PREFERENCES.get(name.strip().lower())
+    if read_preference is None:
+        logger.db_warning(f"Unknown read preference '{name}', using primary")
+        return ReadPreference.PRIMARY
+    return read_preference
+
+def get_write_concern(value: str) -> WriteConcern:
+    """
+    Parse a write concern, either "majority" (or any tag set name) or a number of members.
+    """
+    value = value.strip()
+    return WriteConcern(w=int(value) if value.isdigit() else value)
+
+def _get_client_options() -> Dict[str, Any]:
+    options: Dict[str, Any] = {
+        "minPoolSize": env.MONGO_MIN_POOL_SIZE,
+        "maxPoolSize": env.MONGO_MAX_POOL_SIZE,
+        "read_preference": get_read_preference(env.MONGO_READ_PREFERENCE),
+        # Default for every write that doesn't use a specific profile (nodes, firmware versions)
+        "w": get_write_concern(env.MONGO_WRITE_CONCERN).document["w"],
+    }
+    if env.MONGO_MAX_IDLE_TIME_MS:
+        options["maxIdleTimeMS"] = env.MONGO_MAX_IDLE_TIME_MS
+    if env.MONGO_WAIT_QUEUE_TIMEOUT_MS:
+        options["waitQueueTimeoutMS"] = env.MONGO_WAIT_QUEUE_TIMEOUT_MS
+    if env.MONGO_COMPRESSORS:
+        options["compressors"] = env.MONGO_COMPRESSORS
+    return options
+
+client: AsyncIOMotorClient = AsyncIOMotorClient(env.MONGO_CONNECTION_URL, **_get_client_options())
 _db: AsyncIOMotorDatabase = client[env.MONGO_DATABASE_NAME]
 
+# Per-operation profiles, applied with `collection.with_options(...)`
+ANALYTICS_READ_PREFERENCE = get_read_preference(env.MONGO_READ_PREFERENCE_ANALYTICS)
+LOGS_WRITE_CONCERN = get_write_concern(env.MONGO_WRITE_CONCERN_LOGS)
+
 async def start_mongodb_connection() -> bool:
     """
     Check if the MongoDB connection is alive.
@@ -20,6 +69,27 @@ async def start_mongodb_connection() -> bool:
         logger.db_error(f"Failed to connect to MongoDB: {str(e)}")
         return False
 
+async def bootstrap_mongodb() -> bool:
+    """
+    Apply pending data migrations, then reconcile the declared indexes.
+    """
+    try:
+        await run_migrations(_db)
+
+        # Indexes may depend on the migrations (e.g. a unique index on deduped data),
+        # the worker applying them reconciles the indexes once they are done
+        pending = await get_pending_migrations(_db)
+        if pending:
+            logger.db_warning(f"Skipping index reconcile, migration(s) still pending: {', '.join(pending)}")
+            return False
+
+        await ensure_indexes(_db)
+        logger.db_info("MongoDB migrations and indexes are up to date")
+        return True
+    except Exception as e:
+        logger.db_error(f"Failed to bootstrap MongoDB: {str(e)}")
+        return False
+
 async def stop_mongodb_connection() -> bool:
     """
     Close the MongoDB client connection.
@@ -3,7 +3,8 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.exceptions import HTTPException
 
 from externals.firebase.auth import verify_id_token
-from cores.database import _db
+from cores.database import _db, LOGS_WRITE_CONCERN
+from cores.identity import IdentityMap
 
 """NOTES:
 FIREBASE AUTH DOESN'T SUPPORT FOR ASYNC / AWAIT!
@@ -25,6 +26,13 @@ def get_current_user(
 
     return verify_id_token(id_token.credentials)
 
+async def get_identity_map() -> IdentityMap:
+    """
+    Dependency to get the identity map of the current request.
+    FastAPI caches it per request, so every repository of a request shares the same instance.
+    """
+    return IdentityMap()
+
 async def get_db_connection():
     """
     Dependency to get the database connection.
@@ -39,16 +47,39 @@ async def get_nodes_collection():
     """
     return _db.get_collection("nodes")
 
+async def get_firmware_versions_collection():
+    """
+    Dependency to get the firmware versions collection.
+    This function can be used in FastAPI routes to access the firmware versions of every node.
+    """
+    return _db.get_collection("firmware_versions")
+
 async def get_logs_collection():
     """
     Dependency to get the log collection.
     This function can be used in FastAPI routes to access the log collection.
+    Writes use the (lighter) logs write concern.
     """
-    return _db.get_collection("logs")
+    return _db.get_collection("logs", write_concern=LOGS_WRITE_CONCERN)
 
 async def get_local_logs_collection():
     """
     Dependency to get the local log collection.
     This function can be used in FastAPI routes to access the log collection.
+    Writes use the (lighter) logs write concern.
+    """
+    return _db.get_collection("local_logs", write_concern=LOGS_WRITE_CONCERN)
+
+async def get_ota_metrics_collection():
+    """
+    Dependency to get the OTA metrics (time-series) collection.
+    This function can be used in FastAPI routes to access the QoS metrics of completed OTA sessions.
+    """
+    return _db.get_collection("ota_metrics", write_concern=LOGS_WRITE_CONCERN)
+
+async def get_ota_daily_stats_collection():
+    """
+    Dependency to get the OTA daily statistics collection.
+    This function can be used in FastAPI routes to access the per-node daily rollups of finished OTA sessions.
     """
-    return _db.get_collection("local_logs")
\ No newline at end of file
+    return _db.get_collection("ota_daily_stats", write_concern=LOGS_WRITE_CONCERN)
@@ -0,0 +1,153 @@
+import asyncio
+from time import monotonic
+from typing import Any, Dict, List, Mapping, Set
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from cores.config import env
+from cores.changestream import register_change_listener
+from utils.logger import logger
+
+"""NOTE:
+In-memory cache of the distinct values shown as filter options
+(node locations, types, ids, codenames).
+
+The cache is loaded once with a single `$group` and then kept up to date
+incrementally: inserts add their values with `add()`, while deletes call
+`invalidate()` because a removed value may still be used by other documents.
+Writes made by another worker process are received from the change stream
+(see `cores/changestream.py`), entries also expire after
+`FACET_CACHE_TTL_SECONDS` in case the change stream is not available.
+
+Every `invalidate()` bumps a generation counter, a load only marks the cache
+loaded if no invalidation happened while it was running, so a delete made
+during a reload isn't hidden until the TTL. Inserts made during a reload are
+added once it finishes.
+"""
+
+
+class FacetCache:
+    def __init__(self, name: str, fields: Dict[str, str]):
+        """
+        Args:
+            name: Cache name, used in logs
+            fields: Facet name -> document field holding its values
+        """
+        self.name = name
+        self.fields = fields
+        self._values: Dict[str, Set[Any]] = {facet: set() for facet in fields}
+        self._loaded_at: float = 0.0
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        # Bumped by every invalidation
+        self._generation = 0
+        # Documents inserted while a load is running, None when no load is running
+        self._added_while_loading: List[Dict[str, Any]] | None = None
+
+    def _is_fresh(self) -> bool:
+        return self._loaded and (monotonic() - self._loaded_at) < env.FACET_CACHE_TTL_SECONDS
+
+    def add(self, document: Dict[str, Any]) -> None:
+        """
+        Add the facet values of a newly inserted document.
+        Ignored until the cache is loaded, the next load will include it anyway.
+        """
+        if self._added_while_loading is not None:
+            # The load may have read the collection before this insert
+            self._added_while_loading.append(document)
+        if not self._loaded:
+            return
+
+        for facet, field in self.fields.items():
+            value = document.get(field)
+            if value is not None and value != "":
+                self._values[facet].add(value)
+
+    def invalidate(self) -> None:
+        """
+        Force a reload on the next `get()`, a load running right now won't mark the cache loaded.
+        """
+        self._generation += 1
+        self._loaded = False
+
+    def on_change(self, change: Mapping[str, Any]) -> None:
+        """
+        Apply a change stream event of the cached collection.
+        """
+        operation = change.get("operationType")
+        if operation == "insert":
+            self.add(change.get("fullDocument") or {})
+        elif operation == "update":
+            description = change.get("updateDescription") or {}
+            changed_fields = {field.split(".")[0] for field in description.get("updatedFields", {})}
+            changed_fields.update(field.split(".")[0] for field in description.get("removedFields", []))
+            if changed_fields & set(self.fields.values()):
+                self.invalidate()
+        else:
+            # delete, replace, drop, rename, invalidate
+            self.invalidate()
+
+    async def _load(self, collection: AsyncIOMotorCollection) -> None:
+        generation = self._generation
+        self._added_while_loading = []
+        pipeline = [
+            {"$group": {
+                "_id": None,
+                **{facet: {"$addToSet": f"${field}"} for facet, field in self.fields.items()}
+            }}
+        ]
+        try:
+            result = await collection.aggregate(pipeline).to_list(length=1)
+        finally:
+            added, self._added_while_loading = self._added_while_loading, None
+        group = result[0] if result else {}
+
+        self._values = {
+            facet: {value for value in group.get(facet, []) if value is not None and value != ""}
+            for facet in self.fields
+        }
+        for facet, field in self.fields.items():
+            self._values[facet].update(
+                document[field] for document in added
+                if document.get(field) is not None and document.get(field) != ""
+            )
+
+        if self._generation != generation:
+            logger.db_info(f"Facet cache '{self.name}' was invalidated while loading, it is reloaded on next use")
+            return
+
+        self._loaded_at = monotonic()
+        self._loaded = True
+        logger.db_info(f"Facet cache '{self.name}' loaded from database")
+
+    async def get(self, collection: AsyncIOMotorCollection) -> Dict[str, List[Any]]:
+        """
+        Return the sorted distinct values of every facet, loading them from
+        `collection` only when the cache is empty, invalidated or expired.
+        """
+        if not self._is_fresh():
+            async with self._lock:
+                # Another request may have reloaded it while we were waiting
+                if not self._is_fresh():
+                    await self._load(collection)
+
+        return {facet: sorted(values, key=str) for facet, values in self._values.items()}
+
+
+# One cache per collection, shared by every request of this process
+node_facets = FacetCache("nodes", {
+    "node_locations": "node_location",
+    "node_types": "node_type",
+    "node_ids": "node_id",
+})
+log_facets = FacetCache("logs", {
+    "node_locations": "node_location",
+    "node_types": "node_type",
+})
+local_log_facets = FacetCache("local_logs", {
+    "node_codenames": "node_codename",
+})
+
+# Only the updates of the faceted fields are streamed
+register_change_listener("nodes", node_facets.on_change, node_facets.fields.values())
+register_change_listener("logs", log_facets.on_change, log_facets.fields.values())
+register_change_listener("local_logs", local_log_facets.on_change, local_log_facets.fields.values())
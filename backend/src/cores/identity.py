@@ -0,0 +1,36 @@
+from typing import Any, Dict, Optional, Tuple
+
+"""NOTE:
+Request-scoped identity map.
+
+A single instance is created per request by the `get_identity_map` dependency
+(FastAPI caches dependencies per request), so every service and repository
+of the request share it. Documents read once are served from it afterwards,
+including "not found" results, which saves the repeated lookups of the same
+node across the service and repository layers.
+
+Repositories must update or forget the entries they modify.
+"""
+
+
+class IdentityMap:
+    def __init__(self):
+        self._documents: Dict[Tuple[str, Any], Optional[Dict[str, Any]]] = {}
+
+    def contains(self, collection_name: str, key: Any) -> bool:
+        return (collection_name, key) in self._documents
+
+    def get(self, collection_name: str, key: Any) -> Optional[Dict[str, Any]]:
+        """
+        Return the remembered document, None if it was not found (check `contains` first).
+        """
+        return self._documents.get((collection_name, key))
+
+    def set(self, collection_name: str, key: Any, document: Optional[Dict[str, Any]]) -> None:
+        """
+        Remember a document, None remembers that it does not exist.
+        """
+        self._documents[(collection_name, key)] = document
+
+    def forget(self, collection_name: str, key: Any) -> None:
+        self._documents.pop((collection_name, key), None)
@@ -0,0 +1,219 @@
+from typing import Dict, List, Any
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from utils.logger import logger
+
+"""NOTE:
+Declarative registry of every index the repositories rely on.
+Each collection maps to a list of pymongo IndexModel with an explicit name,
+so the reconciler can detect when a spec has changed and rebuild it.
+
+When you add a new query to a repository, add the backing index here.
+"""
+INDEXES: Dict[str, List[IndexModel]] = {
+    "nodes": [
+        # Node registry, one document per codename
+        IndexModel(
+            [("node_codename", ASCENDING)],
+            name="node_codename_unique",
+            unique=True
+        ),
+        # Node list filtered by location/type, sorted by latest update (`_id` for keyset pages)
+        IndexModel(
+            [("node_location", ASCENDING), ("node_type", ASCENDING), ("latest_updated", DESCENDING), ("_id", DESCENDING)],
+            name="node_location_node_type_latest_updated"
+        ),
+        IndexModel(
+            [("latest_updated", DESCENDING), ("_id", DESCENDING)],
+            name="latest_updated_desc"
+        ),
+    ],
+    "firmware_versions": [
+        # One document per codename + version
+        IndexModel(
+            [("node_codename", ASCENDING), ("firmware_version", ASCENDING)],
+            name="node_codename_firmware_version_unique",
+            unique=True
+        ),
+        # "Latest firmware" lookups, resolved by a single index seek.
+        # `firmware_version` is included so the version list is a covered query
+        IndexModel(
+            [("node_codename", ASCENDING), ("firmware_version_key", DESCENDING), ("firmware_version", ASCENDING)],
+            name="node_codename_firmware_version_key_desc"
+        ),
+    ],
+    "logs": [
+        # MQTT upsert, detail and delete by session, one document per session
+        IndexModel(
+            [("session_id", ASCENDING)],
+            name="session_id_unique",
+            unique=True
+        ),
+        # Log list sorted by newest, with or without filters.
+        # `_id` breaks ties so keyset (cursor) pages can seek straight to their start
+        IndexModel(
+            [("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="created_at_desc"
+        ),
+        IndexModel(
+            [("node_location", ASCENDING), ("node_type", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="node_location_node_type_created_at"
+        ),
+        IndexModel(
+            [("node_type", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="node_type_created_at"
+        ),
+        IndexModel(
+            [("flash_status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="flash_status_created_at"
+        ),
+        IndexModel(
+            [("node_codename", ASCENDING)],
+            name="node_codename"
+        ),
+    ],
+    "local_logs": [
+        IndexModel(
+            [("session_id", ASCENDING)],
+            name="session_id_unique",
+            unique=True
+        ),
+        IndexModel(
+            [("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="created_at_desc"
+        ),
+        IndexModel(
+            [("flash_status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="flash_status_created_at"
+        ),
+        IndexModel(
+            [("node_codename", ASCENDING)],
+            name="node_codename"
+        ),
+    ],
+    "ota_metrics": [
+        # QoS trends of a node (time-series secondary index on metaField + time)
+        IndexModel(
+            [("meta.node_codename", ASCENDING), ("timestamp", DESCENDING)],
+            name="meta_node_codename_timestamp"
+        ),
+    ],
+    "ota_daily_stats": [
+        # One rollup per node, source and day (upsert target)
+        IndexModel(
+            [("node_codename", ASCENDING), ("source", ASCENDING), ("day", ASCENDING)],
+            name="node_codename_source_day_unique",
+            unique=True
+        ),
+        # Range of days across every node
+        IndexModel([("day", ASCENDING)], name="day_asc"),
+    ],
+}
+
+# Index options that make two indexes with the same name different
+_COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+
+def _normalize_key(key: Any) -> List[tuple]:
+    return [(field, int(direction) if isinstance(direction, (int, float)) else direction) for field, direction in key]
+
+
+def _is_same_spec(declared: Dict[str, Any], existing: Dict[str, Any]) -> bool:
+    """
+    Compare a declared index document with an entry of `index_information()`.
+    """
+    if _normalize_key(declared["key"].items()) != _normalize_key(existing["key"]):
+        return False
+
+    for option in _COMPARED_OPTIONS:
+        declared_value = declared.get(option)
+        existing_value = existing.get(option)
+        # `unique: False` and a missing `unique` are the same thing
+        if option in ("unique", "sparse"):
+            declared_value = bool(declared_value)
+            existing_value = bool(existing_value)
+        if declared_value != existing_value:
+            return False
+
+    return True
+
+
+async def diff_indexes(db: AsyncIOMotorDatabase) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Compare the declared registry against the indexes present in MongoDB.
+
+    Returns a dict per collection with:
+        - missing: declared but not created yet
+        - changed: same name but a different key or options
+        - unmanaged: present in MongoDB but not declared (except `_id_`)
+    """
+    result: Dict[str, Dict[str, List[str]]] = {}
+
+    for collection_name, index_models in INDEXES.items():
+        existing = await db.get_collection(collection_name).index_information()
+        declared_names = set()
+        missing, changed = [], []
+
+        for index_model in index_models:
+            declared = index_model.document
+            name = declared["name"]
+            declared_names.add(name)
+
+            if name not in existing:
+                missing.append(name)
+            elif not _is_same_spec(declared, existing[name]):
+                changed.append(name)
+
+        unmanaged = [name for name in existing if name != "_id_" and name not in declared_names]
+
+        result[collection_name] = {
+            "missing": missing,
+            "changed": changed,
+            "unmanaged": unmanaged
+        }
+
+    return result
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase, prune: bool = False) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Reconcile MongoDB indexes with the declared registry.
+    Safe to call on every startup, an index that already matches is left untouched.
+
+    Args:
+        db: Database to reconcile
+        prune: Also drop indexes that are not declared in the registry
+
+    Returns:
+        The diff that was applied (see `diff_indexes`)
+    """
+    diff = await diff_indexes(db)
+
+    for collection_name, index_models in INDEXES.items():
+        collection = db.get_collection(collection_name)
+        collection_diff = diff[collection_name]
+        by_name = {index_model.document["name"]: index_model for index_model in index_models}
+
+        for name in collection_diff["changed"]:
+            logger.db_warning(f"Index '{collection_name}.{name}' spec changed, rebuilding it")
+            await collection.drop_index(name)
+
+        to_create = [by_name[name] for name in collection_diff["missing"] + collection_diff["changed"]]
+        for index_model in to_create:
+            name = index_model.document["name"]
+            try:
+                await collection.create_indexes([index_model])
+                logger.db_info(f"Index '{collection_name}.{name}' created")
+            except Exception as e:
+                # Keep going, one bad index (e.g. duplicates on a unique key) must not block the others
+                logger.db_error(f"Failed to create index '{collection_name}.{name}'", e)
+
+        for name in collection_diff["unmanaged"]:
+            if prune:
+                await collection.drop_index(name)
+                logger.db_warning(f"Unmanaged index '{collection_name}.{name}' dropped")
+            else:
+                logger.db_warning(f"Unmanaged index '{collection_name}.{name}' found, run with prune to drop it")
+
+    return diff
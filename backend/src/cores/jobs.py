@@ -0,0 +1,87 @@
+from datetime import datetime
+from time import monotonic
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from enums.job import JobStatus
+from utils.datetime import get_current_datetime
+
+"""NOTE:
+In-memory progress of the background jobs started by API requests
+(e.g. the Google Drive deletions of a bulk firmware delete).
+
+Jobs live in the worker process that started them, so their progress is only
+visible from that worker. Finished jobs are kept for `JOB_RETENTION_SECONDS`.
+"""
+JOB_RETENTION_SECONDS = 3600
+# Failed item ids reported per job, the counters keep the full picture
+MAX_FAILED_ITEMS = 100
+
+
+class BackgroundJob:
+    def __init__(self, kind: str, total: int):
+        self.job_id = uuid4().hex
+        self.kind = kind
+        self.status = JobStatus.RUNNING
+        self.total = total
+        self.succeeded = 0
+        self.failed = 0
+        self.failed_items: List[str] = []
+        self.created_at: datetime = get_current_datetime()
+        self.finished_at: Optional[datetime] = None
+        self._finished_monotonic: Optional[float] = None
+
+    def advance(self, success: bool, item: Optional[str] = None) -> None:
+        if success:
+            self.succeeded += 1
+            return
+
+        self.failed += 1
+        if item and len(self.failed_items) < MAX_FAILED_ITEMS:
+            self.failed_items.append(item)
+
+    def finish(self) -> None:
+        self.status = JobStatus.COMPLETED_WITH_ERRORS if self.failed else JobStatus.COMPLETED
+        self.finished_at = get_current_datetime()
+        self._finished_monotonic = monotonic()
+
+    def is_expired(self) -> bool:
+        return (
+            self._finished_monotonic is not None
+            and monotonic() - self._finished_monotonic > JOB_RETENTION_SECONDS
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "total": self.total,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "failed_items": list(self.failed_items),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+_jobs: Dict[str, BackgroundJob] = {}
+
+
+def create_job(kind: str, total: int) -> BackgroundJob:
+    """
+    Register a new running job, forgetting the expired ones.
+    """
+    for job_id in [job_id for job_id, job in _jobs.items() if job.is_expired()]:
+        del _jobs[job_id]
+
+    job = BackgroundJob(kind, total)
+    _jobs[job.job_id] = job
+    return job
+
+
+def get_job(job_id: str) -> Optional[BackgroundJob]:
+    job = _jobs.get(job_id)
+    if job is None or job.is_expired():
+        return None
+    return job
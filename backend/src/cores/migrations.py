@@ -0,0 +1,338 @@
+import asyncio
+import os
+import socket
+from datetime import timedelta
+from typing import Awaitable, Callable, List, Tuple
+from pymongo import DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from utils.datetime import get_current_datetime
+from utils.version import get_version_key
+from utils.stats import build_stats_update
+from utils.logger import logger
+
+"""NOTE:
+Ordered list of one-shot data migrations (backfills, layout changes).
+Each migration is identified by a unique id and recorded in the
+`migrations` collection once applied, so it only runs once per database.
+
+Migrations run before the index reconcile on startup, so they can reshape
+data that a new (e.g. unique) index would otherwise reject.
+
+A running migration holds a lease, renewed every `MIGRATION_HEARTBEAT_SECONDS`
+by the worker applying it. If that worker dies (OOM, SIGKILL, deploy timeout),
+the lease expires after `MIGRATION_LEASE_SECONDS` and the next worker starting
+up takes the migration over.
+"""
+Migration = Tuple[str, Callable[[AsyncIOMotorDatabase], Awaitable[None]]]
+
+MIGRATIONS_COLLECTION = "migrations"
+
+# Number of write operations sent per bulk_write during backfills
+BACKFILL_BATCH_SIZE = 500
+
+MIGRATION_LEASE_SECONDS = 300
+MIGRATION_HEARTBEAT_SECONDS = 60
+
+# Identifies the worker holding a migration lease
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+##### Migrations #####
+async def _backfill_firmware_version_key(db: AsyncIOMotorDatabase) -> None:
+    """
+    Store the numeric `firmware_version_key` on node documents created before it existed.
+    """
+    nodes_collection = db.get_collection("nodes")
+    cursor = nodes_collection.find(
+        {"firmware_version_key": {"$exists": False}},
+        {"firmware_version": 1}
+    )
+
+    operations = []
+    updated = 0
+    async for doc in cursor:
+        operations.append(UpdateOne(
+            {"_id": doc["_id"]},
+            {"$set": {"firmware_version_key": get_version_key(doc.get("firmware_version"))}}
+        ))
+        if len(operations) >= BACKFILL_BATCH_SIZE:
+            await nodes_collection.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+
+    if operations:
+        await nodes_collection.bulk_write(operations, ordered=False)
+        updated += len(operations)
+
+    logger.db_info(f"Backfilled firmware_version_key on {updated} node document(s)")
+
+
+async def _split_node_registry_and_firmware_versions(db: AsyncIOMotorDatabase) -> None:
+    """
+    Move from one `nodes` document per firmware version to a registry
+    (one `nodes` document per codename, pointing to its latest firmware)
+    plus one `firmware_versions` document per version.
+    Safe to re-run, versions are upserted and only extra registry documents are removed.
+    """
+    nodes_collection = db.get_collection("nodes")
+    firmware_collection = db.get_collection("firmware_versions")
+
+    # These per-version indexes moved to firmware_versions, drop them before collapsing the registry
+    existing_indexes = await nodes_collection.index_information()
+    for index_name in ("node_codename_firmware_version_unique", "node_codename_firmware_version_key_desc"):
+        if index_name in existing_indexes:
+            await nodes_collection.drop_index(index_name)
+
+    codenames = await nodes_collection.distinct("node_codename")
+    for node_codename in codenames:
+        docs = await (
+            nodes_collection
+            .find({"node_codename": node_codename})
+            .sort("firmware_version_key", DESCENDING)
+            .to_list(length=None)
+        )
+
+        operations = [
+            UpdateOne(
+                {"node_codename": node_codename, "firmware_version": doc["firmware_version"]},
+                {"$setOnInsert": {
+                    "firmware_version_key": doc.get("firmware_version_key"),
+                    "firmware_url": doc.get("firmware_url"),
+                    "description": doc.get("description"),
+                    "created_at": doc.get("created_at"),
+                    "latest_updated": doc.get("latest_updated"),
+                }},
+                upsert=True
+            )
+            for doc in docs if doc.get("firmware_version")
+        ]
+        if operations:
+            await firmware_collection.bulk_write(operations, ordered=False)
+
+        # Keep the latest version document as the registry entry, created when the node was first added
+        registry, stale = docs[0], docs[1:]
+        if stale:
+            created_at = min(
+                (doc["created_at"] for doc in docs if doc.get("created_at")),
+                default=registry.get("created_at")
+            )
+            await nodes_collection.update_one({"_id": registry["_id"]}, {"$set": {"created_at": created_at}})
+            await nodes_collection.delete_many({"_id": {"$in": [doc["_id"] for doc in stale]}})
+
+    logger.db_info(f"Split {len(codenames)} node(s) into registry and firmware versions")
+
+
+async def _dedupe_log_sessions(db: AsyncIOMotorDatabase) -> None:
+    """
+    Remove duplicate log documents of the same session, left by the former
+    non-atomic MQTT upsert, so `session_id` can be made unique.
+    The first inserted document is kept, it is the one later progress updates were applied to.
+    """
+    for collection_name in ("logs", "local_logs"):
+        collection = db.get_collection(collection_name)
+
+        # The old non-unique index is replaced by `session_id_unique` on the next index reconcile
+        existing_indexes = await collection.index_information()
+        if "session_id" in existing_indexes:
+            await collection.drop_index("session_id")
+
+        pipeline = [
+            {"$sort": {"_id": 1}},
+            {"$group": {"_id": "$session_id", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}}
+        ]
+
+        removed = 0
+        async for group in collection.aggregate(pipeline, allowDiskUse=True):
+            result = await collection.delete_many({"_id": {"$in": group["ids"][1:]}})
+            removed += result.deleted_count
+
+        logger.db_info(f"Removed {removed} duplicate session document(s) from '{collection_name}'")
+
+
+async def _create_ota_metrics_collection(db: AsyncIOMotorDatabase) -> None:
+    """
+    Create the `ota_metrics` time-series collection (MongoDB 5.0+).
+    """
+    if "ota_metrics" in await db.list_collection_names():
+        return
+
+    try:
+        await db.create_collection(
+            "ota_metrics",
+            timeseries={"timeField": "timestamp", "metaField": "meta", "granularity": "minutes"}
+        )
+    except Exception as e:
+        # Older servers: the collection is created as a regular one on the first insert
+        logger.db_warning(f"Could not create 'ota_metrics' as a time-series collection, falling back to a regular collection: {e}")
+
+
+async def _backfill_ota_daily_stats(db: AsyncIOMotorDatabase) -> None:
+    """
+    Build the `ota_daily_stats` rollups from the sessions finished before they existed.
+    """
+    stats_collection = db.get_collection("ota_daily_stats")
+    if await stats_collection.estimated_document_count():
+        return
+
+    updated = 0
+    for collection_name, source in (("logs", "cloud"), ("local_logs", "local")):
+        cursor = db.get_collection(collection_name).find({"flash_status": {"$in": ["success", "failed"]}})
+
+        operations = []
+        async for doc in cursor:
+            operations.append(UpdateOne(*build_stats_update(doc, source), upsert=True))
+            if len(operations) >= BACKFILL_BATCH_SIZE:
+                await stats_collection.bulk_write(operations, ordered=False)
+                updated += len(operations)
+                operations = []
+
+        if operations:
+            await stats_collection.bulk_write(operations, ordered=False)
+            updated += len(operations)
+
+    logger.db_info(f"Backfilled daily OTA stats from {updated} finished session(s)")
+
+
+async def _mark_finished_sessions_recorded(db: AsyncIOMotorDatabase) -> None:
+    """
+    Flag the sessions finished before `stats_recorded` existed, they are already
+    counted in `ota_metrics` and `ota_daily_stats`.
+    """
+    for collection_name in ("logs", "local_logs"):
+        result = await db.get_collection(collection_name).update_many(
+            {"flash_status": {"$in": ["success", "failed"]}, "stats_recorded": {"$ne": True}},
+            {"$set": {"stats_recorded": True}}
+        )
+        logger.db_info(f"Flagged {result.modified_count} finished session(s) of '{collection_name}' as recorded")
+
+
+async def _mark_finished_sessions_metrics_recorded(db: AsyncIOMotorDatabase) -> None:
+    """
+    Flag the sessions counted before `metrics_recorded` existed, `stats_recorded`
+    covered both `ota_metrics` and `ota_daily_stats` until then.
+    """
+    for collection_name in ("logs", "local_logs"):
+        result = await db.get_collection(collection_name).update_many(
+            {"stats_recorded": True, "metrics_recorded": {"$ne": True}},
+            {"$set": {"metrics_recorded": True}}
+        )
+        logger.db_info(f"Flagged {result.modified_count} session(s) of '{collection_name}' as recorded in the metrics")
+
+
+MIGRATIONS: List[Migration] = [
+    ("0001_backfill_firmware_version_key", _backfill_firmware_version_key),
+    ("0002_split_node_registry_and_firmware_versions", _split_node_registry_and_firmware_versions),
+    ("0003_dedupe_log_sessions", _dedupe_log_sessions),
+    ("0004_create_ota_metrics_collection", _create_ota_metrics_collection),
+    ("0005_backfill_ota_daily_stats", _backfill_ota_daily_stats),
+    ("0006_mark_finished_sessions_recorded", _mark_finished_sessions_recorded),
+    ("0007_mark_finished_sessions_metrics_recorded", _mark_finished_sessions_metrics_recorded),
+]
+
+
+##### Runner #####
+async def get_pending_migrations(db: AsyncIOMotorDatabase) -> List[str]:
+    """
+    Return the ids of the migrations that have not been applied yet.
+    """
+    applied = await db.get_collection(MIGRATIONS_COLLECTION).distinct("_id", {"status": "applied"})
+    return [migration_id for migration_id, _ in MIGRATIONS if migration_id not in applied]
+
+
+async def _claim_migration(collection, migration_id: str) -> bool:
+    """
+    Claim a migration by inserting its record, or by taking over a record whose lease expired.
+    Returns False if another worker holds it.
+    """
+    now = get_current_datetime()
+    try:
+        await collection.insert_one({
+            "_id": migration_id,
+            "status": "running",
+            "owner": WORKER_ID,
+            "started_at": now,
+            "heartbeat_at": now
+        })
+        return True
+    except DuplicateKeyError:
+        pass
+
+    expired_before = now - timedelta(seconds=MIGRATION_LEASE_SECONDS)
+    record = await collection.find_one_and_update(
+        {
+            "_id": migration_id,
+            "status": "running",
+            "$or": [
+                {"heartbeat_at": {"$lt": expired_before}},
+                # Claimed before the lease existed
+                {"heartbeat_at": {"$exists": False}, "started_at": {"$lt": expired_before}}
+            ]
+        },
+        {"$set": {"owner": WORKER_ID, "started_at": now, "heartbeat_at": now}},
+        return_document=ReturnDocument.AFTER
+    )
+    if record is None:
+        return False
+
+    logger.db_warning(f"Migration '{migration_id}' lease expired, taking it over")
+    return True
+
+
+async def _renew_lease(collection, migration_id: str) -> None:
+    while True:
+        await asyncio.sleep(MIGRATION_HEARTBEAT_SECONDS)
+        await collection.update_one(
+            {"_id": migration_id, "owner": WORKER_ID},
+            {"$set": {"heartbeat_at": get_current_datetime()}}
+        )
+
+
+async def run_migrations(db: AsyncIOMotorDatabase) -> List[str]:
+    """
+    Apply pending migrations in order.
+
+    A migration is claimed by inserting its record first, so when several
+    workers start at the same time only one of them runs it. The claim is a
+    lease, taken over once it expires (see `MIGRATION_LEASE_SECONDS`).
+    Stops at the first failing migration, later ones may depend on it.
+
+    Returns:
+        The ids of the migrations applied by this call
+    """
+    collection = db.get_collection(MIGRATIONS_COLLECTION)
+    applied: List[str] = []
+
+    for migration_id, migrate in MIGRATIONS:
+        record = await collection.find_one({"_id": migration_id})
+        if record and record.get("status") == "applied":
+            continue
+
+        if not await _claim_migration(collection, migration_id):
+            # Later migrations may depend on this one, leave them to that worker too
+            logger.db_info(f"Migration '{migration_id}' is being applied by another worker, skipping")
+            break
+
+        logger.db_info(f"Applying migration '{migration_id}'...")
+        heartbeat = asyncio.create_task(_renew_lease(collection, migration_id))
+        try:
+            await migrate(db)
+        except Exception as e:
+            # Release the claim so the migration is retried on the next startup
+            await collection.delete_one({"_id": migration_id, "owner": WORKER_ID})
+            logger.db_error(f"Migration '{migration_id}' failed", e)
+            break
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+
+        await collection.update_one(
+            {"_id": migration_id, "owner": WORKER_ID},
+            {"$set": {"status": "applied", "applied_at": get_current_datetime()}}
+        )
+        applied.append(migration_id)
+        logger.db_info(f"Migration '{migration_id}' applied")
+
+    return applied
@@ -0,0 +1,19 @@
+from typing import Any
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+"""NOTE:
+FastAPI serializes a returned schema by dumping it to a dict, validating that
+dict against the `response_model` again and encoding it with `json.dumps`.
+Routes returning large lists wrap their schema in `ModelResponse` instead:
+it is serialized once, straight to JSON bytes, by pydantic-core.
+The `response_model` stays declared for the OpenAPI docs.
+"""
+
+
+class ModelResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json(by_alias=True).encode("utf-8")
+        return to_json(content)
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import socket
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from cores.config import env
+from cores.facets import log_facets, local_log_facets
+from utils.archive import append_documents, to_utc_naive, write_day_counts
+from utils.logger import logger
+
+"""NOTE:
+Age-based retention of the OTA log collections.
+
+Logs older than `LOG_RETENTION_DAYS` are moved out of MongoDB into the
+on-disk archive (see `utils/archive.py`), so the live collections and their
+indexes only hold the hot window. The `/log` and `/locallog` list endpoints
+read the archive when the requested date range reaches past the hot window.
+
+Documents are written to the archive before being deleted, an interrupted
+run archives them again on the next run and the reader skips the duplicates.
+"""
+ARCHIVED_COLLECTIONS = {
+    "logs": log_facets,
+    "local_logs": local_log_facets,
+}
+ARCHIVE_BATCH_SIZE = 1000
+
+JOBS_COLLECTION = "jobs"
+RETENTION_JOB_ID = "log_retention"
+
+
+def is_retention_enabled() -> bool:
+    return env.LOG_RETENTION_DAYS > 0
+
+
+def get_hot_window_start() -> Optional[datetime]:
+    """
+    Oldest `created_at` kept in MongoDB (naive UTC), None when retention is disabled.
+    """
+    if not is_retention_enabled():
+        return None
+    return to_utc_naive(datetime.now(timezone.utc)) - timedelta(days=env.LOG_RETENTION_DAYS)
+
+
+async def _acquire_lease(db: AsyncIOMotorDatabase, lease_seconds: int) -> bool:
+    """
+    Make sure a single worker runs the retention job per interval.
+    """
+    now = datetime.now(timezone.utc)
+    try:
+        await db.get_collection(JOBS_COLLECTION).find_one_and_update(
+            {
+                "_id": RETENTION_JOB_ID,
+                "$or": [{"locked_until": {"$lt": now}}, {"locked_until": {"$exists": False}}]
+            },
+            {"$set": {
+                "locked_until": now + timedelta(seconds=lease_seconds),
+                "owner": f"{socket.gethostname()}:{os.getpid()}"
+            }},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        # The job document exists and is still locked by another worker
+        return False
+
+
+async def archive_expired_logs(db: AsyncIOMotorDatabase) -> Dict[str, int]:
+    """
+    Move the logs older than the hot window to the archive.
+
+    Returns:
+        The number of archived documents per collection
+    """
+    cutoff = get_hot_window_start()
+    if cutoff is None:
+        return {}
+
+    archived: Dict[str, int] = {}
+    for collection_name, facets in ARCHIVED_COLLECTIONS.items():
+        collection = db.get_collection(collection_name)
+        archived[collection_name] = 0
+        archived_days: Set[date] = set()
+
+        while True:
+            documents = await (
+                collection
+                .find({"created_at": {"$lt": cutoff}})
+                .sort("created_at", ASCENDING)
+                .limit(ARCHIVE_BATCH_SIZE)
+                .to_list(length=ARCHIVE_BATCH_SIZE)
+            )
+            if not documents:
+                break
+
+            by_day: Dict[date, List[Dict[str, Any]]] = defaultdict(list)
+            for document in documents:
+                by_day[to_utc_naive(document["created_at"]).date()].append(document)
+
+            # File I/O and compression run off the event loop
+            for day, day_documents in by_day.items():
+                await asyncio.to_thread(append_documents, collection_name, day, day_documents)
+                archived_days.add(day)
+
+            await collection.delete_many({"_id": {"$in": [document["_id"] for document in documents]}})
+            archived[collection_name] += len(documents)
+
+        # Counted once the days are complete, see utils/archive.py
+        for day in archived_days:
+            await asyncio.to_thread(write_day_counts, collection_name, day)
+
+        if archived[collection_name]:
+            # Archived values may no longer exist in the live collection
+            facets.invalidate()
+            logger.db_info(f"Archived {archived[collection_name]} '{collection_name}' document(s) older than {cutoff.isoformat()}")
+
+    return archived
+
+
+async def run_log_retention(db: AsyncIOMotorDatabase) -> None:
+    """
+    Background task archiving expired logs every `LOG_RETENTION_INTERVAL_MINUTES`.
+    """
+    interval_seconds = env.LOG_RETENTION_INTERVAL_MINUTES * 60
+    logger.db_info(f"Log retention started - keeping {env.LOG_RETENTION_DAYS} day(s), running every {env.LOG_RETENTION_INTERVAL_MINUTES} minute(s)")
+
+    while True:
+        try:
+            if await _acquire_lease(db, interval_seconds):
+                await archive_expired_logs(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.db_error("Log retention run failed", e)
+
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,13 @@
+from enum import Enum
+
+
+class JobStatus(str, Enum):
+    """
+    Enum for background job status.
+    """
+    RUNNING = "running"
+    COMPLETED = "completed"
+    COMPLETED_WITH_ERRORS = "completed with errors"
+
+    def __str__(self) -> str:
+        return self.value
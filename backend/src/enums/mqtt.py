@@ -0,0 +1,13 @@
+from enum import Enum
+
+
+class IngestOverflowPolicy(str, Enum):
+    """
+    Enum for what the MQTT ingestion queue does with an update when its shard is full.
+    """
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    SPILL = "spill"
+
+    def __str__(self) -> str:
+        return self.value
@@ -1,6 +1,9 @@
+import asyncio
 from typing import List
 from googleapiclient.errors import HttpError
 
+from cores.config import env
+from cores.jobs import BackgroundJob
 from externals.gdrive.client import gdrive_client
 from utils.logger import logger
 
@@ -87,4 +90,25 @@ def delete_multiple_firmware_from_gdrive(file_ids: List[str]) -> dict:
     
     logger.gdrive_info(f"Batch deletion completed - Total: {result['total']}, Success: {result['successful']}, Failed: {result['failed']}")
     
-    return result
\ No newline at end of file
+    return result
+
+async def delete_firmware_from_gdrive_concurrently(file_ids: List[str], job: BackgroundJob) -> None:
+    """
+    Delete firmware files from Google Drive, `GOOGLE_DRIVE_DELETE_CONCURRENCY` at a time,
+    reporting each result to `job`. Meant to run as a background task.
+    """
+    logger.gdrive_info(f"Starting concurrent deletion of {len(file_ids)} files from Google Drive - Job: {job.job_id}")
+    semaphore = asyncio.Semaphore(max(1, env.GOOGLE_DRIVE_DELETE_CONCURRENCY))
+
+    async def _delete(file_id: str) -> None:
+        async with semaphore:
+            # The Google API client is blocking, run it off the event loop
+            success = await asyncio.to_thread(delete_firmware_from_gdrive, file_id)
+        job.advance(success, file_id)
+
+    try:
+        await asyncio.gather(*(_delete(file_id) for file_id in file_ids))
+    finally:
+        job.finish()
+
+    logger.gdrive_info(f"Concurrent deletion completed - Job: {job.job_id}, Total: {job.total}, Success: {job.succeeded}, Failed: {job.failed}")
@@ -0,0 +1,153 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from pydantic import BaseModel
+
+from cores.config import env
+from utils.logger import logger
+
+"""NOTE:
+Write-behind buffer for OTA progress messages.
+
+An OTA session sends several messages in quick succession, instead of one
+Mongo write per message, the updates of a session are merged in memory and
+written with a single bulk_write every `MQTT_LOG_FLUSH_INTERVAL_MS`.
+Terminal messages (success/failed) flush right away, so the final state of a
+session is never delayed, and the log is published to the frontend only once
+it has been saved.
+
+A batch whose write fails is put back in the buffer and retried after
+`FLUSH_RETRY_DELAY_SECONDS`, up to `MAX_FLUSH_RETRIES` times per session.
+
+Buffered updates that were not flushed yet are lost if the process crashes,
+keep the interval short (a few hundred ms).
+"""
+# (filter_query, update_fields, log_data), see LogService.upsert_log_from_mqtt
+LogEntry = Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]
+
+MAX_FLUSH_RETRIES = 3
+FLUSH_RETRY_DELAY_SECONDS = 1
+
+
+class LogWriteBuffer:
+    def __init__(
+        self,
+        name: str,
+        flush_handler: Callable[[List[LogEntry]], Awaitable[List[BaseModel]]],
+        on_flushed: Callable[[BaseModel], None],
+        flush_interval_ms: int = env.MQTT_LOG_FLUSH_INTERVAL_MS,
+        max_sessions: int = env.MQTT_LOG_FLUSH_MAX_SESSIONS
+    ):
+        """
+        Args:
+            name: Buffer name, used in logs
+            flush_handler: Writes a batch of entries, returns the saved logs
+            on_flushed: Called with every saved log, e.g. to publish it
+            flush_interval_ms: Max time an update waits in the buffer, 0 writes every message right away
+            max_sessions: Flush early when this many sessions are pending
+        """
+        self.name = name
+        self.flush_handler = flush_handler
+        self.on_flushed = on_flushed
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_sessions = max_sessions
+
+        self._pending: Dict[str, LogEntry] = {}
+        # Failed writes of the pending sessions
+        self._retries: Dict[str, int] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Flushes run one at a time, so updates of a session are written in order
+        self._flush_lock = asyncio.Lock()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def add(
+        self,
+        filter_query: Dict[str, Any],
+        update_fields: Dict[str, Any],
+        log_data: Dict[str, Any],
+        terminal: bool = False
+    ) -> None:
+        """
+        Buffer a log update, merged with the pending updates of the same session.
+        Must be called from the main event loop.
+        """
+        session_id = filter_query["session_id"]
+        pending = self._pending.get(session_id)
+        if pending:
+            # Later messages win on the fields they both set
+            pending[1].update(update_fields)
+            pending[2].update(log_data)
+        else:
+            self._pending[session_id] = (dict(filter_query), dict(update_fields), dict(log_data))
+
+        if terminal or self.flush_interval <= 0 or len(self._pending) >= self.max_sessions:
+            await self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.flush_interval, self._schedule_flush)
+
+    def _schedule_flush(self) -> None:
+        self._flush_handle = None
+        task = asyncio.ensure_future(self.flush())
+        # Keep a reference so the task isn't garbage collected before it's done
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self) -> int:
+        """
+        Write every pending update with one bulk write, then hand the saved logs to `on_flushed`.
+        Returns the number of sessions written.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            entries = list(self._pending.values())
+            self._pending = {}
+
+            try:
+                saved_logs = await self.flush_handler(entries)
+            except Exception as e:
+                logger.db_error(f"Failed to flush {len(entries)} buffered '{self.name}' update(s)", e)
+                self._requeue(entries)
+                return 0
+
+            for filter_query, _, _ in entries:
+                self._retries.pop(filter_query["session_id"], None)
+            logger.db_info(f"Flushed {len(entries)} buffered '{self.name}' session(s) in one write")
+
+        for log in saved_logs:
+            try:
+                self.on_flushed(log)
+            except Exception as e:
+                logger.mqtt_error(f"Failed to handle flushed '{self.name}' log", e)
+
+        return len(entries)
+
+    def _requeue(self, entries: List[LogEntry]) -> None:
+        """
+        Put the entries of a failed write back in the buffer, under the updates received since.
+        """
+        dropped = 0
+        for filter_query, update_fields, log_data in entries:
+            session_id = filter_query["session_id"]
+            retries = self._retries.get(session_id, 0) + 1
+            if retries > MAX_FLUSH_RETRIES:
+                self._retries.pop(session_id, None)
+                dropped += 1
+                continue
+            self._retries[session_id] = retries
+
+            newer = self._pending.get(session_id)
+            if newer:
+                update_fields.update(newer[1])
+                log_data.update(newer[2])
+            self._pending[session_id] = (filter_query, update_fields, log_data)
+
+        if dropped:
+            logger.db_error(f"Dropped {dropped} buffered '{self.name}' update(s) after {MAX_FLUSH_RETRIES} failed writes")
+
+        if self._pending and self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(FLUSH_RETRY_DELAY_SECONDS, self._schedule_flush)
@@ -3,9 +3,27 @@ from os.path import join, dirname
 
 from cores.config import env
 from utils.logger import logger
+from externals.mqtts.properties import topic_aliases
 
 ca_cert = join(dirname(__file__), "../../../", env.MQTT_BROKER_CA_CERT_NAME)
 
+MQTT_PROTOCOLS = {
+    "3.1": mqtt.MQTTv31,
+    "3.1.1": mqtt.MQTTv311,
+    "5": mqtt.MQTTv5,
+    "5.0": mqtt.MQTTv5,
+}
+
+def get_mqtt_protocol() -> mqtt.MQTTProtocolVersion:
+    """
+    Get the MQTT protocol version from `MQTT_BROKER_VERSION`.
+    """
+    protocol = MQTT_PROTOCOLS.get(env.MQTT_BROKER_VERSION.strip())
+    if protocol is None:
+        logger.mqtt_warning(f"Unknown MQTT broker version '{env.MQTT_BROKER_VERSION}', using 3.1.1")
+        return mqtt.MQTTv311
+    return protocol
+
 def check_mqtt_credentials(ca_cert: str) -> bool:
     """
     Check if the MQTT broker CA certificate file exists.
@@ -18,10 +36,15 @@ def check_mqtt_credentials(ca_cert: str) -> bool:
         logger.mqtt_error(f"MQTT broker CA certificate file not found: {ca_cert}")
         return False
 
-def connect_mqtt_client() -> mqtt.Client | None:
+def create_mqtt_client() -> mqtt.Client | None:
+    """
+    Create and configure the MQTT client, without connecting it.
+    """
     def on_connect(client, userdata, flags, rc, properties=None):
         if rc == 0:
             logger.mqtt_info("Connected to MQTT Broker!")
+            # MQTT 5 topic aliases are per connection, the broker announces how many it accepts
+            topic_aliases.reset(getattr(properties, "TopicAliasMaximum", 0) if properties else 0)
         else:
             logger.mqtt_error(f"Failed to connect, return code: {rc}")
 
@@ -31,7 +54,8 @@ def connect_mqtt_client() -> mqtt.Client | None:
     try:
         client = mqtt.Client(
             client_id=env.MQTT_CLIENT_ID,
-            callback_api_version=mqtt.CallbackAPIVersion.VERSION2 # For paho-mqtt >= 1.6.0
+            callback_api_version=mqtt.CallbackAPIVersion.VERSION2, # For paho-mqtt >= 1.6.0
+            protocol=get_mqtt_protocol()
         )
         client.on_connect = on_connect
         client.on_disconnect = on_disconnect
@@ -48,6 +72,17 @@ def connect_mqtt_client() -> mqtt.Client | None:
                 password=env.MQTT_BROKER_PASSWORD
             )
 
+        return client
+    except Exception as e:
+        logger.mqtt_error(f"Failed to create MQTT client: {str(e)}")
+        return None
+
+def connect_mqtt_client() -> mqtt.Client | None:
+    client = create_mqtt_client()
+    if client is None:
+        return None
+
+    try:
         client.connect(
             host=env.MQTT_BROKER_URL,
             port=env.MQTT_BROKER_PORT,
@@ -0,0 +1,105 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from cores.config import env
+from utils.datetime import json_dumps_with_datetime
+from utils.logger import logger
+
+"""NOTE:
+Coalesced delta publishing of the saved logs to the frontend.
+
+Instead of the whole log on every progress step, the frontend receives the
+whole log the first time a session is published, then only the fields that
+changed since the last publish, along with `ALWAYS_PUBLISHED_FIELDS` so it can
+find the log to update. Every payload also holds the `source` of the log
+(cloud or local), both kinds are published on the same topic.
+
+The saved logs of a session are merged for `MQTT_PUBLISH_COALESCE_MS` and
+published once, terminal logs (success/failed) are published right away.
+Each payload is serialized once.
+
+The last published state of at most `MQTT_PUBLISH_MAX_SESSIONS` sessions is
+kept, a session that was forgotten is published whole again.
+"""
+ALWAYS_PUBLISHED_FIELDS = ("session_id", "node_codename", "flash_status")
+TERMINAL_STATUSES = ("success", "failed")
+
+
+class LogPublishCoalescer:
+    def __init__(
+        self,
+        publish: Callable[[str, bool], bool],
+        source: str,
+        interval_ms: int = env.MQTT_PUBLISH_COALESCE_MS,
+        max_sessions: int = env.MQTT_PUBLISH_MAX_SESSIONS
+    ):
+        """
+        Args:
+            publish: Publishes a serialized payload (and whether the log is terminal), returns False if it failed
+            source: Source of the published logs, "cloud" or "local"
+            interval_ms: Max time a log waits to be merged with the next ones, 0 publishes right away
+            max_sessions: Max sessions whose last published state is kept
+        """
+        self.publish = publish
+        self.source = source
+        self.interval = interval_ms / 1000
+        self.max_sessions = max(1, max_sessions)
+
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # Last published state of the sessions, least recently published first
+        self._published: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    def submit(self, log_data: Dict[str, Any]) -> None:
+        """
+        Publish a saved log, merged with the pending logs of its session.
+        Must be called from the main event loop.
+        """
+        session_id = log_data["session_id"]
+        # Saved logs are whole documents, the latest one holds every change
+        self._pending[session_id] = log_data
+
+        if str(log_data.get("flash_status")) in TERMINAL_STATUSES or self.interval <= 0:
+            self._publish_session(session_id)
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.interval, self.flush)
+
+    def flush(self) -> None:
+        """
+        Publish every pending session.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        for session_id in list(self._pending):
+            self._publish_session(session_id)
+
+    def _publish_session(self, session_id: str) -> None:
+        log_data = self._pending.pop(session_id, None)
+        if log_data is None:
+            return
+
+        previous = self._published.get(session_id)
+        if previous is None:
+            payload_data = {"source": self.source, **log_data}
+        else:
+            changed = {key: value for key, value in log_data.items() if key not in previous or previous[key] != value}
+            if not changed:
+                return
+            payload_data = {"source": self.source}
+            payload_data.update((key, log_data[key]) for key in ALWAYS_PUBLISHED_FIELDS if key in log_data)
+            payload_data.update(changed)
+
+        is_terminal = str(log_data.get("flash_status")) in TERMINAL_STATUSES
+        if not self.publish(json_dumps_with_datetime(payload_data), is_terminal):
+            # The next publish of the session carries these changes again
+            logger.mqtt_error("Failed to publish log data to frontend.")
+            return
+
+        self._published.pop(session_id, None)
+        if not is_terminal:
+            self._published[session_id] = log_data
+            if len(self._published) > self.max_sessions:
+                self._published.popitem(last=False)
@@ -0,0 +1,83 @@
+import json
+import msgpack
+from typing import Any, Dict
+
+"""NOTE:
+Decoding of the OTA log payloads sent by the nodes.
+
+The payload format is picked from its first byte, so JSON and MessagePack nodes
+can share the same topics:
+    - JSON: an object, starting with `{` (or whitespace).
+    - MessagePack: a map (first byte 0x80-0x8f, 0xde or 0xdf). The compact
+      schema uses the short keys of `SHORT_KEYS` and `SHORT_DATA_KEYS`, which
+      are expanded to the JSON keys. Long keys are accepted as well.
+
+e.g. a MessagePack node sends
+    {"sid": "...", "cn": "...", "msg": "firmware bytes written", "d": {"bytes": 1024}}
+"""
+SHORT_KEYS = {
+    "sid": "session_id",
+    "mac": "node_mac",
+    "loc": "node_location",
+    "typ": "node_type",
+    "nid": "node_id",
+    "cn": "node_codename",
+    "fv": "firmware_version",
+    "fvo": "firmware_version_origin",
+    "msg": "message",
+    "d": "data",
+}
+
+# Keys of the "local-ota update complete" data
+SHORT_DATA_KEYS = {
+    "fsb": "Firmware Size (Bytes)",
+    "uta": "Upload Time (App)",
+    "ute": "Upload Time (ESP32)",
+    "lat": "Latency",
+    "fvn": "Firmware Version (New)",
+    "br": "Bytes Received",
+    "dt": "Download Time",
+    "ds": "Download Speed",
+}
+
+
+class PayloadDecodeError(ValueError):
+    pass
+
+
+def _is_msgpack_map(first_byte: int) -> bool:
+    return 0x80 <= first_byte <= 0x8f or first_byte in (0xde, 0xdf)
+
+
+def _expand_keys(data: Dict[Any, Any], short_keys: Dict[str, str]) -> Dict[Any, Any]:
+    return {short_keys.get(key, key): value for key, value in data.items()}
+
+
+def decode_log_payload(payload: bytes) -> Dict[str, Any]:
+    """
+    Decode a JSON or MessagePack log payload into the JSON schema.
+    Raises PayloadDecodeError if the payload is invalid or not an object.
+    """
+    if not payload:
+        raise PayloadDecodeError("empty payload")
+
+    if _is_msgpack_map(payload[0]):
+        try:
+            log_data = msgpack.unpackb(payload, raw=False)
+        except Exception as e:
+            raise PayloadDecodeError(f"invalid MessagePack payload: {str(e)}") from e
+
+        log_data = _expand_keys(log_data, SHORT_KEYS)
+        if isinstance(log_data.get("data"), dict):
+            log_data["data"] = _expand_keys(log_data["data"], SHORT_DATA_KEYS)
+        return log_data
+
+    try:
+        # json accepts bytes, no need to decode the payload first
+        log_data = json.loads(payload)
+    except ValueError as e:
+        raise PayloadDecodeError(f"invalid JSON payload: {str(e)}") from e
+
+    if not isinstance(log_data, dict):
+        raise PayloadDecodeError("payload is not an object")
+    return log_data
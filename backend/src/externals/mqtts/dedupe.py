@@ -0,0 +1,64 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Hashable
+
+from cores.config import env
+
+"""NOTE:
+Duplicate suppression of MQTT messages.
+
+The backend subscribes with QoS 1, so the broker redelivers the messages that
+were not acknowledged, e.g. after a reconnection. Every message fingerprint
+(topic, session, message type and the device sequence number, or a hash of
+the payload when the device doesn't send one) is remembered for
+`MQTT_DEDUPE_TTL_SECONDS`, a message seen again in that window is dropped
+before it costs a database write and a publish to the frontend.
+
+At most `MQTT_DEDUPE_MAX_ENTRIES` fingerprints are kept, the oldest ones are
+forgotten first.
+"""
+
+
+class DuplicateFilter:
+    def __init__(
+        self,
+        ttl_seconds: int = env.MQTT_DEDUPE_TTL_SECONDS,
+        max_entries: int = env.MQTT_DEDUPE_MAX_ENTRIES
+    ):
+        """
+        Args:
+            ttl_seconds: How long a fingerprint is remembered, 0 disables the filter
+            max_entries: Max fingerprints remembered
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        # Fingerprint -> expiry time, in insertion order, so the oldest ones come first
+        self._expires_at: OrderedDict[Hashable, float] = OrderedDict()
+        self.duplicates = 0
+
+    def is_duplicate(self, fingerprint: Hashable) -> bool:
+        """
+        Returns True if the fingerprint was seen within the TTL, otherwise remembers it.
+        """
+        if self.ttl_seconds <= 0:
+            return False
+
+        now = monotonic()
+        # Every entry has the same TTL, the expired ones are at the front
+        while self._expires_at:
+            oldest = next(iter(self._expires_at))
+            if self._expires_at[oldest] > now:
+                break
+            del self._expires_at[oldest]
+
+        if fingerprint in self._expires_at:
+            self.duplicates += 1
+            return True
+
+        self._expires_at[fingerprint] = now + self.ttl_seconds
+        if len(self._expires_at) > self.max_entries:
+            self._expires_at.popitem(last=False)
+        return False
+
+    def __len__(self) -> int:
+        return len(self._expires_at)
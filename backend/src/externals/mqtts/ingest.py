@@ -0,0 +1,390 @@
+import asyncio
+import pickle
+from collections import deque
+from pathlib import Path
+from time import monotonic
+from typing import Any, Awaitable, BinaryIO, Callable, Deque, Dict, List, Optional, Tuple
+from zlib import crc32
+
+from cores.config import env
+from enums.mqtt import IngestOverflowPolicy
+from utils.logger import logger
+
+"""NOTE:
+Bounded, session-sharded ingestion queue.
+
+Every OTA log update goes to one of `MQTT_INGEST_SHARDS` shards picked from its
+session id, and each shard has a single consumer task. The updates of a session
+are then applied in the order they were received (e.g. "download complete"
+after "ota update started"), while different sessions are handled in parallel.
+
+A shard holds up to `MQTT_INGEST_QUEUE_SIZE` updates, when it is full the
+`MQTT_INGEST_OVERFLOW_POLICY` applies:
+    - block: stop reading from the broker socket until every shard is back
+      under half its capacity, TCP flow control then slows the broker down.
+      While paused the keepalive answers aren't read either, so reading
+      resumes after half the keepalive at the latest, the shards then grow
+      past their capacity until they drain.
+    - drop_oldest: drop the oldest progress update of the shard, terminal
+      updates (success/failed) are never dropped.
+    - spill: append the update to the shard file in `MQTT_INGEST_SPILL_DIR`, it
+      is read back once the shard is drained. Spilled updates survive a restart,
+      the ones read back but not applied yet are written back on shutdown.
+      After a crash some of them may be applied twice (the upserts are idempotent).
+"""
+# (item, droppable)
+QueueEntry = Tuple[Any, bool]
+
+SPILL_SUFFIX = ".spill"
+SPILL_LENGTH_BYTES = 4
+
+
+def get_spill_dir() -> Path:
+    spill_dir = Path(env.MQTT_INGEST_SPILL_DIR)
+    if not spill_dir.is_absolute():
+        # Relative to the backend folder, next to the `logs` folder
+        spill_dir = Path(__file__).resolve().parent.parent.parent.parent / spill_dir
+    return spill_dir
+
+
+def _read_spill(path: Path, offset: int, limit: int) -> Tuple[List[QueueEntry], int, bool]:
+    """
+    Read up to `limit` entries of a spill file from `offset`.
+    Entries are length-prefixed, a partially written one is left for the next read.
+    Returns the entries, the offset to continue from and whether the end of the file was reached.
+    """
+    entries: List[QueueEntry] = []
+    with open(path, "rb") as file:
+        file.seek(offset)
+        while len(entries) < limit:
+            header = file.read(SPILL_LENGTH_BYTES)
+            size = int.from_bytes(header, "big")
+            data = file.read(size) if len(header) == SPILL_LENGTH_BYTES else b""
+            if not header or len(data) < size or len(header) < SPILL_LENGTH_BYTES:
+                return entries, offset, True
+
+            offset = file.tell()
+            try:
+                entries.append(pickle.loads(data))
+            except Exception as e:
+                logger.mqtt_error(f"Skipping corrupted entry of ingestion spill file '{path.name}'", e)
+    return entries, offset, False
+
+
+def _encode_spill_entry(entry: QueueEntry) -> bytes:
+    data = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+    return len(data).to_bytes(SPILL_LENGTH_BYTES, "big") + data
+
+
+def _rewrite_spill(path: Path, entries: List[QueueEntry], offset: int) -> None:
+    """
+    Replace the spill file with `entries` followed by the entries from `offset` not read yet.
+    The entries before `offset` were read back, the unapplied ones are in `entries`.
+    """
+    remaining = b""
+    if path.exists():
+        with open(path, "rb") as file:
+            file.seek(offset)
+            remaining = file.read()
+    if not entries and not remaining:
+        path.unlink(missing_ok=True)
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(".tmp")
+    temp_path.write_bytes(b"".join(_encode_spill_entry(entry) for entry in entries) + remaining)
+    temp_path.replace(path)
+
+
+def _count_spill(path: Path) -> int:
+    count = 0
+    offset = 0
+    while True:
+        entries, offset, at_end = _read_spill(path, offset, 1000)
+        count += len(entries)
+        if at_end:
+            return count
+
+
+class _Shard:
+    def __init__(self, index: int, spill_path: Path):
+        self.index = index
+        self.items: Deque[QueueEntry] = deque()
+        self.ready = asyncio.Event()
+        # Set while the consumer handles an item
+        self.busy = False
+
+        self.spill_path = spill_path
+        self.spill_file: Optional[BinaryIO] = None
+        self.spill_offset = 0
+        self.spill_depth = 0
+
+        self.enqueued = 0
+        self.processed = 0
+        self.dropped = 0
+        self.spilled = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self.items) + self.spill_depth
+
+    @property
+    def idle(self) -> bool:
+        return not self.depth and not self.busy
+
+    def close_spill(self) -> None:
+        if self.spill_file:
+            self.spill_file.close()
+            self.spill_file = None
+
+
+class ShardedIngestQueue:
+    def __init__(
+        self,
+        name: str,
+        consumer: Callable[[Any], Awaitable[None]],
+        shards: int = env.MQTT_INGEST_SHARDS,
+        capacity: int = env.MQTT_INGEST_QUEUE_SIZE,
+        overflow_policy: str = env.MQTT_INGEST_OVERFLOW_POLICY
+    ):
+        """
+        Args:
+            name: Queue name, used in logs and for the spill files
+            consumer: Applies an item, called in order for the items of a shard
+            shards: Number of shards, each with one consumer task
+            capacity: Max items waiting in memory in a shard
+            overflow_policy: block, drop_oldest or spill
+        """
+        self.name = name
+        self.consumer = consumer
+        self.capacity = max(1, capacity)
+        try:
+            self.overflow_policy = IngestOverflowPolicy(overflow_policy)
+        except ValueError:
+            logger.mqtt_warning(f"Unknown ingestion overflow policy '{overflow_policy}', using 'block'")
+            self.overflow_policy = IngestOverflowPolicy.BLOCK
+
+        spill_dir = get_spill_dir()
+        self._shards = [_Shard(index, spill_dir / f"{name}-{index}{SPILL_SUFFIX}") for index in range(max(1, shards))]
+        self._tasks: List[asyncio.Task] = []
+        self._paused = False
+        self._pause_handle: Optional[asyncio.TimerHandle] = None
+        # Set when a pause timed out, no new pause until the shards drain
+        self._pause_suppressed = False
+        self._pause_intake: Optional[Callable[[], None]] = None
+        self._resume_intake: Optional[Callable[[], None]] = None
+
+    async def start(
+        self,
+        pause_intake: Optional[Callable[[], None]] = None,
+        resume_intake: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Start one consumer task per shard, the updates spilled by a previous run are applied first.
+
+        Args:
+            pause_intake: Called by the block policy when a shard is full
+            resume_intake: Called once every shard has room again
+        """
+        self._pause_intake = pause_intake
+        self._resume_intake = resume_intake
+
+        for shard in self._shards:
+            if shard.spill_path.exists():
+                shard.spill_depth = await asyncio.to_thread(_count_spill, shard.spill_path)
+                logger.mqtt_info(f"Replaying {shard.spill_depth} spilled '{self.name}' update(s) of shard {shard.index}")
+
+        self._tasks = [asyncio.create_task(self._consume(shard)) for shard in self._shards]
+
+    async def stop(self, timeout: float = 5) -> None:
+        """
+        Let the consumers apply the queued items, then stop them.
+        Spilled items left on disk are applied on the next start.
+        """
+        deadline = monotonic() + timeout
+        while not all(shard.idle for shard in self._shards) and monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if self._pause_handle is not None:
+            self._pause_handle.cancel()
+            self._pause_handle = None
+
+        keep_unapplied = self.overflow_policy == IngestOverflowPolicy.SPILL
+        remaining = sum(len(shard.items) for shard in self._shards)
+        if remaining and not keep_unapplied:
+            logger.mqtt_warning(f"{remaining} queued '{self.name}' update(s) were not applied before shutdown")
+
+        for shard in self._shards:
+            shard.close_spill()
+            entries = list(shard.items) if keep_unapplied else []
+            if entries or (shard.spill_depth and shard.spill_offset):
+                try:
+                    await asyncio.to_thread(_rewrite_spill, shard.spill_path, entries, shard.spill_offset)
+                    shard.spill_depth += len(entries)
+                    shard.items.clear()
+                    shard.spill_offset = 0
+                except Exception as e:
+                    logger.mqtt_error(f"Failed to write back the unapplied '{self.name}' updates of shard {shard.index}", e)
+
+        if remaining and keep_unapplied:
+            logger.mqtt_info(f"Spilled {remaining} unapplied '{self.name}' update(s) to disk, they are applied on the next start")
+
+    def put(self, key: str, item: Any, droppable: bool = False) -> None:
+        """
+        Queue an item on the shard of `key`, must be called from the main event loop.
+        Droppable items (progress updates) may be dropped by the drop_oldest policy.
+        """
+        shard = self._shards[crc32(key.encode()) % len(self._shards)]
+        shard.enqueued += 1
+        entry: QueueEntry = (item, droppable)
+
+        # Older items of the shard are on disk, keep the order
+        if shard.spill_depth and self._spill(shard, entry):
+            return
+
+        if len(shard.items) >= self.capacity:
+            if self.overflow_policy == IngestOverflowPolicy.SPILL and self._spill(shard, entry):
+                return
+            if self.overflow_policy == IngestOverflowPolicy.DROP_OLDEST:
+                self._drop_oldest_progress(shard)
+            elif self.overflow_policy == IngestOverflowPolicy.BLOCK:
+                self._pause()
+
+        shard.items.append(entry)
+        shard.ready.set()
+
+    def _drop_oldest_progress(self, shard: _Shard) -> None:
+        for entry in shard.items:
+            if entry[1]:
+                shard.items.remove(entry)
+                shard.dropped += 1
+                return
+
+    def _spill(self, shard: _Shard, entry: QueueEntry) -> bool:
+        """
+        Append an entry to the spill file of the shard, returns False if it couldn't be written.
+        """
+        try:
+            if shard.spill_file is None:
+                shard.spill_path.parent.mkdir(parents=True, exist_ok=True)
+                shard.spill_file = open(shard.spill_path, "ab")
+            shard.spill_file.write(_encode_spill_entry(entry))
+            # Readable by the consumer right away
+            shard.spill_file.flush()
+        except Exception as e:
+            logger.mqtt_error(f"Failed to spill '{self.name}' update of shard {shard.index} to disk", e)
+            return False
+
+        shard.spill_depth += 1
+        shard.spilled += 1
+        shard.ready.set()
+        return True
+
+    async def _load_spilled(self, shard: _Shard) -> None:
+        entries, offset, at_end = await asyncio.to_thread(_read_spill, shard.spill_path, shard.spill_offset, self.capacity)
+        shard.items.extend(entries)
+        shard.spill_offset = offset
+        shard.spill_depth -= len(entries)
+
+        if at_end and not entries and shard.spill_depth > 0:
+            # Fewer entries on disk than counted, e.g. the file was truncated by a crash
+            logger.mqtt_warning(f"{shard.spill_depth} spilled '{self.name}' update(s) of shard {shard.index} are missing")
+            shard.spill_depth = 0
+
+        # Every entry written so far was read, start over with a new file
+        if shard.spill_depth <= 0:
+            shard.close_spill()
+            shard.spill_path.unlink(missing_ok=True)
+            shard.spill_offset = 0
+            shard.spill_depth = 0
+
+    def _pause(self) -> None:
+        if not self._paused and not self._pause_suppressed and self._pause_intake:
+            self._paused = True
+            self._pause_intake()
+            # The broker drops a client that doesn't answer its keepalive
+            self._pause_handle = asyncio.get_running_loop().call_later(env.MQTT_BROKER_KEEPALIVE / 2, self._pause_timeout)
+            logger.mqtt_warning(f"Ingestion queue '{self.name}' is full, pausing MQTT intake")
+
+    def _pause_timeout(self) -> None:
+        self._pause_handle = None
+        self._pause_suppressed = True
+        self._resume("paused for half the MQTT keepalive")
+
+    def _resume(self, reason: str) -> None:
+        if not self._paused:
+            return
+        self._paused = False
+        if self._pause_handle is not None:
+            self._pause_handle.cancel()
+            self._pause_handle = None
+        if self._resume_intake:
+            self._resume_intake()
+        logger.mqtt_info(f"Ingestion queue '{self.name}' resuming MQTT intake, {reason}")
+
+    def _resume_if_drained(self) -> None:
+        # Low-water mark, so the intake isn't paused again by the next message
+        if (self._paused or self._pause_suppressed) and all(len(shard.items) <= self.capacity // 2 for shard in self._shards):
+            self._pause_suppressed = False
+            self._resume("below half its capacity")
+
+    async def _consume(self, shard: _Shard) -> None:
+        while True:
+            if not shard.items and shard.spill_depth:
+                await self._load_spilled(shard)
+
+            if not shard.items:
+                shard.ready.clear()
+                await shard.ready.wait()
+                continue
+
+            entry = shard.items.popleft()
+            shard.busy = True
+            try:
+                await self.consumer(entry[0])
+            except asyncio.CancelledError:
+                # Stopped mid-apply, kept for the write back on shutdown (applying it twice is harmless)
+                shard.items.appendleft(entry)
+                shard.processed -= 1
+                raise
+            except Exception as e:
+                logger.mqtt_error(f"Failed to apply '{self.name}' update of shard {shard.index}", e)
+            finally:
+                shard.busy = False
+                shard.processed += 1
+
+            self._resume_if_drained()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Current depth and counters of the queue and of every shard.
+        """
+        shards = [
+            {
+                "shard": shard.index,
+                "depth": shard.depth,
+                "spilled_depth": shard.spill_depth,
+                "enqueued": shard.enqueued,
+                "processed": shard.processed,
+                "dropped": shard.dropped,
+                "spilled": shard.spilled
+            }
+            for shard in self._shards
+        ]
+        return {
+            "name": self.name,
+            "overflow_policy": str(self.overflow_policy),
+            "capacity": self.capacity,
+            "paused": self._paused,
+            "depth": sum(shard["depth"] for shard in shards),
+            "enqueued": sum(shard["enqueued"] for shard in shards),
+            "processed": sum(shard["processed"] for shard in shards),
+            "dropped": sum(shard["dropped"] for shard in shards),
+            "spilled": sum(shard["spilled"] for shard in shards),
+            "shards": shards
+        }
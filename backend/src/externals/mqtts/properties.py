@@ -0,0 +1,70 @@
+from typing import Dict, Optional, Tuple
+from paho.mqtt.properties import Properties
+from paho.mqtt.packettypes import PacketTypes
+
+from cores.config import env
+
+"""NOTE:
+MQTT 5 properties of the log publishes to the frontend (`MQTT_BROKER_VERSION=5`).
+
+    - Topic alias: the first publish of a connection sends the topic with an
+      alias, the next QoS 0 publishes send the alias only. QoS 1/2 publishes
+      keep the topic, paho resends them after a reconnection, when the alias
+      is no longer known by the broker. The aliases are reset on every
+      connection, with the maximum announced by the broker (0 disables them).
+    - Message expiry: progress updates expire after
+      `MQTT_PUBLISH_MESSAGE_EXPIRY_SECONDS`, so a dashboard reconnecting late
+      doesn't receive stale progress. Terminal updates never expire.
+    - User properties: the content type and the schema version of the payload.
+
+Subscribers using MQTT 3.1.1 (e.g. the frontend) receive the same messages,
+the broker resolves the aliases and drops the properties.
+"""
+# Version 2: the first message of a session holds every field, the next ones only
+# the fields that changed, see externals/mqtts/coalesce.py
+DISPLAY_LOG_SCHEMA_VERSION = "2"
+DISPLAY_LOG_CONTENT_TYPE = "application/json"
+
+
+class TopicAliases:
+    def __init__(self):
+        self._maximum = 0
+        self._aliases: Dict[str, int] = {}
+
+    def reset(self, maximum: int) -> None:
+        """
+        Forget the aliases, called on every connection with the broker's Topic Alias Maximum.
+        """
+        self._maximum = maximum
+        self._aliases = {}
+
+    def resolve(self, topic: str, qos: int) -> Tuple[str, Optional[int]]:
+        """
+        Returns the topic to send (empty once the alias is set, for QoS 0) and its alias, if any.
+        """
+        alias = self._aliases.get(topic)
+        if alias is not None:
+            return ("" if qos == 0 else topic), alias
+
+        if len(self._aliases) < self._maximum:
+            alias = len(self._aliases) + 1
+            self._aliases[topic] = alias
+            return topic, alias
+        return topic, None
+
+
+# Aliases of the current connection, reset by the on_connect callback
+topic_aliases = TopicAliases()
+
+
+def build_log_publish_properties(alias: Optional[int], terminal: bool) -> Properties:
+    properties = Properties(PacketTypes.PUBLISH)
+    properties.UserProperty = [
+        ("content-type", DISPLAY_LOG_CONTENT_TYPE),
+        ("schema-version", DISPLAY_LOG_SCHEMA_VERSION)
+    ]
+    if alias is not None:
+        properties.TopicAlias = alias
+    if not terminal and env.MQTT_PUBLISH_MESSAGE_EXPIRY_SECONDS > 0:
+        properties.MessageExpiryInterval = env.MQTT_PUBLISH_MESSAGE_EXPIRY_SECONDS
+    return properties
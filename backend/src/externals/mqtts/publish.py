@@ -1,4 +1,5 @@
-from externals.mqtts.client import mqtt
+from externals.mqtts.client import mqtt, get_mqtt_protocol
+from externals.mqtts.properties import topic_aliases, build_log_publish_properties
 from cores.config import env
 from utils.logger import logger
 from utils.datetime import json_dumps_with_datetime
@@ -8,22 +9,36 @@ After saving the log data to MongoDB,
 then publish the log data to the frontend.
 """
 def publish_log_data(client: mqtt.Client | None, log_data: dict) -> bool:
+    # Convert dict to JSON string
+    return publish_log_payload(client, json_dumps_with_datetime(log_data))
+
+
+def publish_log_payload(client: mqtt.Client | None, payload: str, terminal: bool = False) -> bool:
+    """
+    Publish an already serialized log payload.
+    Terminal (success/failed) payloads are published with the default QoS and never expire.
+    """
     if client is None or not client.is_connected():
         logger.mqtt_error("Cannot publish log data: MQTT client not connected.")
         return False
     
     PUB_TOPIC_LOG = env.MQTT_PUBLISH_TOPIC_LOG
     
-    try:
-        # Convert dict to JSON string
-        payload = json_dumps_with_datetime(log_data)
+    qos = env.MQTT_DEFAULT_QOS if terminal else env.MQTT_PUBLISH_PROGRESS_QOS
+    topic = PUB_TOPIC_LOG
+    properties = None
+    # Topic alias, message expiry and user properties, see externals/mqtts/properties.py
+    if get_mqtt_protocol() == mqtt.MQTTv5:
+        topic, alias = topic_aliases.resolve(PUB_TOPIC_LOG, qos)
+        properties = build_log_publish_properties(alias, terminal)
 
-        # Publish with QoS 1 to ensure delivery
+    try:
         logger.mqtt_info(f"Publishing log data to {PUB_TOPIC_LOG}")
         client.publish(
-            topic=PUB_TOPIC_LOG,
+            topic=topic,
             payload=payload,
-            qos=env.MQTT_DEFAULT_QOS
+            qos=qos,
+            properties=properties
         )
         logger.mqtt_info(f"Successfully published log data to {PUB_TOPIC_LOG}")
         return True
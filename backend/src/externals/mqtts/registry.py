@@ -0,0 +1,285 @@
+import paho.mqtt.client as mqtt
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+from pydantic import BaseModel, ValidationError
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from cores.dependencies import get_ota_metrics_collection
+from cores.dependencies import get_ota_daily_stats_collection
+from repositories.metrics import MetricSource, MetricsRepository
+from repositories.stats import StatsRepository
+from utils.logger import logger
+from externals.mqtts.publish import publish_log_payload
+from externals.mqtts.buffer import LogEntry, LogWriteBuffer
+from externals.mqtts.transport import AsyncioMqttTransport
+from externals.mqtts.ingest import ShardedIngestQueue
+from externals.mqtts.dedupe import DuplicateFilter
+from externals.mqtts.coalesce import LogPublishCoalescer
+from externals.mqtts.codec import PayloadDecodeError, decode_log_payload
+
+"""NOTE:
+Registry of the subscribed OTA log topics.
+
+Each topic is declared once at startup with a `LogTopic`: the schema of the
+payload fields identifying the log, a dispatch table from the message type to the fields it
+updates, and the `LogSink` saving the logs. Every topic then shares the same
+message handling: decode, validate, drop duplicates, queue the update on the
+ingestion queue, buffer it, save it and publish it to the frontend.
+
+The sinks build their repositories and services on the first write and reuse
+them, nothing but the update itself is created per message.
+"""
+# Builds the fields to update from the "data" of a message
+MessageHandler = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+# (topic name, filter_query, update_fields, log_data, terminal)
+IngestItem = Tuple[str, Dict[str, Any], Dict[str, Any], Dict[str, Any], bool]
+
+
+class LogSink:
+    def __init__(
+        self,
+        get_collection: Callable[[], Awaitable[AsyncIOMotorCollection]],
+        repository_class: type,
+        service_class: type,
+        source: MetricSource,
+        success_status: str,
+        failed_status: str
+    ):
+        """
+        Args:
+            get_collection: Dependency returning the logs collection
+            repository_class: Log repository, built with the logs collection
+            service_class: Log service, built with the repository
+            source: Metric source of the saved logs
+            success_status: Flash status of a completed session
+            failed_status: Flash status of a failed session
+        """
+        self.get_collection = get_collection
+        self.repository_class = repository_class
+        self.service_class = service_class
+        self.source = source
+        self.success_status = success_status
+        self.failed_status = failed_status
+
+        self._service = None
+        self._metrics_repository: Optional[MetricsRepository] = None
+        self._stats_repository: Optional[StatsRepository] = None
+
+    def is_terminal(self, update_fields: Dict[str, Any]) -> bool:
+        return update_fields.get("flash_status") in (self.success_status, self.failed_status)
+
+    async def _ensure_services(self) -> None:
+        if self._service is None:
+            log_repository = self.repository_class(
+                db=None,  # Will be handled by the dependency
+                logs_collection=await self.get_collection()
+            )
+            self._service = self.service_class(logs_repository=log_repository)
+            self._metrics_repository = MetricsRepository(metrics_collection=await get_ota_metrics_collection())
+            self._stats_repository = StatsRepository(stats_collection=await get_ota_daily_stats_collection())
+
+    async def write(self, entries: List[LogEntry]) -> List[BaseModel]:
+        """
+        Save a batch of buffered log updates, returns the saved logs.
+        """
+        await self._ensure_services()
+        saved_logs = await self._service.bulk_upsert_logs_from_mqtt(entries)
+
+        await self._record_finished(entries, saved_logs)
+        return saved_logs
+
+    async def _record_finished(self, entries: List[LogEntry], saved_logs: List[BaseModel]) -> None:
+        """
+        Mirror the QoS metrics of the sessions completed by this batch into `ota_metrics`,
+        and add every finished (success or failed) session to the `ota_daily_stats` rollups.
+        A session is only counted the first time it finishes, see `mark_stats_recorded`,
+        with one flag per collection so a failed write is retried without counting the other twice.
+        """
+        finished_statuses: Dict[str, str] = {
+            filter_query["session_id"]: update_fields["flash_status"]
+            for filter_query, update_fields, _ in entries
+            if self.is_terminal(update_fields)
+        }
+        finished_logs = [log for log in saved_logs if log.session_id in finished_statuses]
+        if not finished_logs:
+            return
+
+        completed_logs = [log for log in finished_logs if finished_statuses[log.session_id] == self.success_status]
+        await asyncio.gather(
+            self._count_once(completed_logs, "metrics_recorded", self._metrics_repository.record_completed_logs),
+            self._count_once(finished_logs, "stats_recorded", self._stats_repository.record_completed_logs)
+        )
+
+    async def _count_once(
+        self,
+        logs: List[BaseModel],
+        flag: str,
+        record: Callable[[List[BaseModel], MetricSource], Awaitable[int]]
+    ) -> List[BaseModel]:
+        """
+        Flag the sessions of the logs, then count the ones flagged by this call with `record`.
+        The flag is removed if the count failed, the error is raised so the batch is retried.
+        Returns the counted logs.
+        """
+        if not logs:
+            return []
+
+        flagged = set(await self._service.mark_stats_recorded([log.session_id for log in logs], flag))
+        flagged_logs = [log for log in logs if log.session_id in flagged]
+        if not flagged_logs:
+            return []
+
+        try:
+            await record(flagged_logs, self.source)
+        except Exception:
+            await self._service.unmark_stats_recorded(list(flagged), flag)
+            raise
+        return flagged_logs
+
+
+class LogTopic:
+    def __init__(
+        self,
+        name: str,
+        topic: str,
+        qos: int,
+        payload_schema: Type[BaseModel],
+        message_handlers: Dict[str, MessageHandler],
+        sink: LogSink
+    ):
+        """
+        Args:
+            name: Topic name, used in logs and as the write buffer name
+            topic: MQTT topic to subscribe to
+            qos: Subscription QoS
+            payload_schema: Validates the payload fields identifying the log (the filter query), other fields are ignored
+            message_handlers: Normalized message type -> handler building the fields to update
+            sink: Saves the buffered updates
+        """
+        self.name = name
+        self.topic = topic
+        self.qos = qos
+        self.payload_schema = payload_schema
+        self.message_handlers = message_handlers
+        self.sink = sink
+        self.buffer: Optional[LogWriteBuffer] = None
+
+
+class LogTopicRegistry:
+    def __init__(self, name: str):
+        """
+        Args:
+            name: Name of the shared ingestion queue
+        """
+        self._topics: Dict[str, LogTopic] = {}
+        # Received log updates, applied in order per session, see externals/mqtts/ingest.py
+        self.ingest_queue = ShardedIngestQueue(name=name, consumer=self._apply_update)
+        # Fingerprints of the recently received messages, see externals/mqtts/dedupe.py
+        self.duplicate_filter = DuplicateFilter()
+
+    def register(self, topic: LogTopic) -> None:
+        self._topics[topic.name] = topic
+
+    def subscribe(self, transport: AsyncioMqttTransport) -> None:
+        """
+        Create the write buffer of every registered topic and subscribe to it.
+        """
+        client = transport.client
+        if not client.is_connected():
+            logger.mqtt_error("MQTT client is not connected to the broker.")
+            return
+
+        for topic in self._topics.values():
+            coalescer = LogPublishCoalescer(
+                publish=lambda payload, terminal: publish_log_payload(client, payload, terminal=terminal),
+                source=topic.sink.source
+            )
+            topic.buffer = LogWriteBuffer(
+                name=topic.name,
+                flush_handler=topic.sink.write,
+                on_flushed=lambda result_log, coalescer=coalescer: self._publish_saved_log(coalescer, result_log)
+            )
+
+            logger.mqtt_info(f"Subscribing to topic: {topic.topic} with QoS {topic.qos}")
+            transport.subscribe(topic.topic, topic.qos, lambda msg, topic=topic: self._handle_message(topic, msg))
+
+    async def flush(self) -> None:
+        """
+        Write every buffered log update, call it before closing the MongoDB connection.
+        """
+        for topic in self._topics.values():
+            if topic.buffer:
+                await topic.buffer.flush()
+
+    async def _apply_update(self, item: IngestItem) -> None:
+        """
+        Add a queued log update to the write buffer of its topic.
+        """
+        name, filter_query, update_fields, log_data, terminal = item
+        await self._topics[name].buffer.add(filter_query, update_fields, log_data, terminal=terminal)
+
+    @staticmethod
+    def _publish_saved_log(coalescer: LogPublishCoalescer, result_log: BaseModel) -> None:
+        """
+        Publish a log to the frontend once it has been saved, see externals/mqtts/coalesce.py.
+        """
+        logger.db_info(f"Log processed successfully - Codename: '{result_log.node_codename}'")
+
+        # Convert model to dict for publishing
+        coalescer.submit(result_log.model_dump())
+
+    def _is_duplicate(self, msg: mqtt.MQTTMessage, session_id: str, message: str, log_data: Dict[str, Any]) -> bool:
+        # Devices may send a sequence number, otherwise the payload itself identifies the message
+        sequence = log_data.get("seq")
+        fingerprint = (msg.topic, session_id, message, sequence if sequence is not None else hash(msg.payload))
+        return self.duplicate_filter.is_duplicate(fingerprint)
+
+    def _handle_message(self, topic: LogTopic, msg: mqtt.MQTTMessage) -> None:
+        # Skip processing for retained messages on startup
+        if msg.retain:
+            logger.mqtt_info(f"Skipping retained message on topic {msg.topic}")
+            return
+
+        try:
+            # JSON or MessagePack, see externals/mqtts/codec.py
+            log_data = decode_log_payload(msg.payload)
+            logger.mqtt_debug(f"Message received: {log_data}")
+
+            # Validate the fields identifying the log (the filter query) against the schema of the topic,
+            # an invalid message is dropped here instead of failing the write of its whole batch
+            extracted_data = topic.payload_schema.model_validate(log_data).model_dump()
+
+            # Normalize message for consistent matching
+            message = log_data.get("message", "").strip().lower()
+
+            # Redelivered messages are dropped before they cost a write and a publish
+            if self._is_duplicate(msg, extracted_data["session_id"], message, log_data):
+                logger.mqtt_info(f"Skipping duplicate message '{message}' of session '{extracted_data['session_id']}'")
+                return
+
+            handler = topic.message_handlers.get(message)
+            if handler is None:
+                logger.mqtt_warning(f"Unknown message type: '{message}' - skipping update")
+                return
+
+            update_fields = handler(log_data.get("data") or {})
+            logger.mqtt_info(f"Processing '{topic.name}' message: '{message}' -> {list(update_fields.keys())}")
+
+            # Queue the update, it is buffered, then saved and published to the frontend on the next flush
+            is_terminal = topic.sink.is_terminal(update_fields)
+            self.ingest_queue.put(
+                extracted_data["session_id"],
+                (topic.name, extracted_data, update_fields, log_data, is_terminal),
+                droppable=not is_terminal
+            )
+
+        except ValidationError as e:
+            invalid_fields = [".".join(str(loc) for loc in error["loc"]) for error in e.errors()]
+            logger.mqtt_error(f"Invalid '{topic.name}' payload, skipping message - fields: {invalid_fields}")
+        except KeyError as e:
+            logger.mqtt_error(f"Missing key in log data: {str(e)}")
+        except PayloadDecodeError as e:
+            logger.mqtt_error(f"Payload decode error: {str(e)}")
+        except Exception as e:
+            logger.mqtt_error(f"Error processing message: {str(e)}")
@@ -1,50 +1,85 @@
 import paho.mqtt.client as mqtt
 import asyncio
-import time
+from typing import Any, Coroutine
 
-from externals.mqtts.client import connect_mqtt_client
-from externals.mqtts.subscribe import subscribe_message, subscribe_local_log_message
+from externals.mqtts.client import create_mqtt_client
+from externals.mqtts.transport import AsyncioMqttTransport
+from externals.mqtts.subscribe import ingest_queue, subscribe_log_topics
 from utils.logger import logger
 
-_mqtt_client_instance: mqtt.Client | None = connect_mqtt_client()
+"""NOTE:
+The MQTT transport runs on the main event loop, see externals/mqtts/transport.py.
+The service entry points keep their blocking interface: they are called from
+a worker thread (e.g. `loop.run_in_executor`) and wait for the transport to
+be started or stopped on the main loop.
+"""
+_mqtt_transport: AsyncioMqttTransport | None = None
+_main_loop: asyncio.AbstractEventLoop | None = None
 
-def start_mqtt_service(main_loop: asyncio.AbstractEventLoop = None) -> bool:
+def _run_on_main_loop(coroutine: Coroutine[Any, Any, bool], main_loop: asyncio.AbstractEventLoop) -> bool:
     """
-    Connects to MQTT, starts its loop in a background thread, and subscribes to topics.
-    Returns True if successful, False otherwise.
+    Run a coroutine on the main event loop and wait for its result.
     """
-    global _mqtt_client_instance
-    if _mqtt_client_instance is not None:
-        _mqtt_client_instance.loop_start()        # Wait for the MQTT client to connect to the broker
-        for _ in range(10):  # max ~5 seconds
-            if _mqtt_client_instance.is_connected():
-                break
-            time.sleep(0.5)
-        
-        if _mqtt_client_instance.is_connected():
-            subscribe_message(_mqtt_client_instance, main_loop)
-            subscribe_local_log_message(_mqtt_client_instance, main_loop)
-            logger.mqtt_info("MQTT service started successfully")
-            return True
-        
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run_coroutine_threadsafe(coroutine, main_loop).result()
+
+    # Waiting from the loop thread itself would block the loop forever
+    coroutine.close()
+    raise RuntimeError("The MQTT service must be started and stopped from a worker thread, e.g. with loop.run_in_executor")
+
+async def _start_transport() -> bool:
+    global _mqtt_transport
+    client = create_mqtt_client()
+    if client is None:
+        return False
+
+    transport = AsyncioMqttTransport(client)
+    # Wait for the MQTT client to connect to the broker
+    if not await transport.start():
         logger.mqtt_error("Failed to connect to MQTT Broker within the timeout period")
         return False
-        
+
+    _mqtt_transport = transport
+    subscribe_log_topics(transport)
+    # Started once the log buffers exist, updates spilled by a previous run are applied first
+    await ingest_queue.start(pause_intake=transport.pause_reading, resume_intake=transport.resume_reading)
+    logger.mqtt_info("MQTT service started successfully")
+    return True
+
+async def _stop_transport() -> bool:
+    global _mqtt_transport
+    if _mqtt_transport:
+        await _mqtt_transport.stop()
+        await ingest_queue.stop()
+        _mqtt_transport = None
+        return True
     return False
 
+def start_mqtt_service(main_loop: asyncio.AbstractEventLoop = None) -> bool:
+    """
+    Connects to MQTT on the main event loop, starts the ingestion queue, and subscribes to topics.
+    Returns True if successful, False otherwise.
+    """
+    global _main_loop
+    if main_loop is None:
+        logger.mqtt_error("MQTT service needs the main event loop to run on")
+        return False
+
+    _main_loop = main_loop
+    return _run_on_main_loop(_start_transport(), main_loop)
+
 def stop_mqtt_service() -> bool:
     """
-    Stops the MQTT client loop and disconnects the client.
+    Disconnects the client and waits for the received messages to be handled.
     """
-    global _mqtt_client_instance
-    if _mqtt_client_instance:
-        _mqtt_client_instance.loop_stop()
-        _mqtt_client_instance.disconnect()
-        return True
-    return False
+    if _main_loop is None:
+        return False
+    return _run_on_main_loop(_stop_transport(), _main_loop)
 
 def get_mqtt_client() -> mqtt.Client | None:
     """
     Returns the MQTT client instance.
     """
-    return _mqtt_client_instance
\ No newline at end of file
+    return _mqtt_transport.client if _mqtt_transport else None
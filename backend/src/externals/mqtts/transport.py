@@ -0,0 +1,214 @@
+import paho.mqtt.client as mqtt
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from cores.config import env
+from utils.logger import logger
+
+"""NOTE:
+asyncio-native MQTT transport.
+
+paho's network loop runs on the main event loop instead of the `loop_start()`
+thread: the client socket is registered with `add_reader`/`add_writer` through
+paho's external loop callbacks, and a maintenance task sends the keepalive
+pings and reconnects when the connection is lost. Only the blocking TCP/TLS
+connect runs in a worker thread.
+
+With `MQTT_SHARED_SUBSCRIPTION_GROUP` set, topics are subscribed as
+`$share/<group>/<topic>` (MQTT 5 shared subscriptions, also supported on 3.1.1
+by EMQX, Mosquitto and HiveMQ), so the broker hands each message to a single
+replica of the group. Use a broker strategy that keeps the messages of a
+publisher on one subscriber (e.g. EMQX `hash_clientid`), so the updates of an
+OTA session stay ordered on the same replica.
+
+Message handlers are called right on the loop as the messages are read, they
+must be quick: decode the message and hand the work to the ingestion queue
+(see `externals/mqtts/ingest.py`), which can pause reading when it is full.
+"""
+MessageHandler = Callable[[mqtt.MQTTMessage], None]
+
+MISC_INTERVAL_SECONDS = 1
+RECONNECT_MIN_DELAY_SECONDS = 1
+RECONNECT_MAX_DELAY_SECONDS = 60
+
+
+class AsyncioMqttTransport:
+    def __init__(
+        self,
+        client: mqtt.Client,
+        shared_group: str = env.MQTT_SHARED_SUBSCRIPTION_GROUP
+    ):
+        """
+        Must be created from the main event loop.
+
+        Args:
+            client: Configured MQTT client, not connected yet
+            shared_group: Shared subscription group of the topics, empty to subscribe directly
+        """
+        self.client = client
+        self.shared_group = shared_group.strip()
+        self.loop = asyncio.get_running_loop()
+
+        self._loop_thread_id = threading.get_ident()
+        self._subscriptions: Dict[str, int] = {}
+        self._maintain_task: Optional[asyncio.Task] = None
+        self._reader_fd: Optional[int] = None
+        self._reading_paused = False
+
+        client.on_socket_open = self._on_socket_open
+        client.on_socket_close = self._on_socket_close
+        client.on_socket_register_write = self._on_socket_register_write
+        client.on_socket_unregister_write = self._on_socket_unregister_write
+
+        # Subscriptions are renewed on every (re)connection
+        self._on_connect = client.on_connect
+        client.on_connect = self._handle_connect
+
+    def _call_soon(self, callback: Callable[..., Any], *args: Any) -> None:
+        """
+        Run `callback` on the event loop, the socket callbacks also fire from the connect thread.
+        """
+        if threading.get_ident() == self._loop_thread_id:
+            callback(*args)
+        else:
+            self.loop.call_soon_threadsafe(callback, *args)
+
+    # The file descriptor is read right away, the socket may be closed before the callback runs
+    def _on_socket_open(self, client, userdata, sock) -> None:
+        self._call_soon(self._add_reader, sock.fileno())
+
+    def _on_socket_close(self, client, userdata, sock) -> None:
+        self._call_soon(self._remove_reader, sock.fileno())
+
+    def _on_socket_register_write(self, client, userdata, sock) -> None:
+        self._call_soon(self.loop.add_writer, sock.fileno(), self.client.loop_write)
+
+    def _on_socket_unregister_write(self, client, userdata, sock) -> None:
+        self._call_soon(self.loop.remove_writer, sock.fileno())
+
+    def _add_reader(self, fd: int) -> None:
+        self._reader_fd = fd
+        if not self._reading_paused:
+            self.loop.add_reader(fd, self._on_readable)
+
+    def _remove_reader(self, fd: int) -> None:
+        self.loop.remove_reader(fd)
+        if self._reader_fd == fd:
+            self._reader_fd = None
+
+    def pause_reading(self) -> None:
+        """
+        Stop reading from the broker, TCP flow control then slows it down.
+        """
+        if not self._reading_paused:
+            self._reading_paused = True
+            if self._reader_fd is not None:
+                self.loop.remove_reader(self._reader_fd)
+
+    def resume_reading(self) -> None:
+        if self._reading_paused:
+            self._reading_paused = False
+            if self._reader_fd is not None:
+                self.loop.add_reader(self._reader_fd, self._on_readable)
+
+    def _on_readable(self) -> None:
+        self.client.loop_read()
+        # TLS sockets may hold decrypted data the selector can't see
+        sock = self.client.socket()
+        while not self._reading_paused and sock is not None and hasattr(sock, "pending") and sock.pending():
+            self.client.loop_read()
+            sock = self.client.socket()
+
+    def _handle_connect(self, client, userdata, flags, reason_code, properties=None) -> None:
+        if self._on_connect:
+            self._on_connect(client, userdata, flags, reason_code, properties)
+
+        if reason_code == 0 and self._subscriptions:
+            client.subscribe(list(self._subscriptions.items()))
+
+    async def start(self, timeout: float = 5) -> bool:
+        """
+        Connect to the broker and start the maintenance task.
+        Returns True once the broker accepted the connection, False otherwise.
+        """
+        try:
+            await asyncio.to_thread(
+                self.client.connect,
+                host=env.MQTT_BROKER_URL,
+                port=env.MQTT_BROKER_PORT,
+                keepalive=env.MQTT_BROKER_KEEPALIVE
+            )
+        except Exception as e:
+            logger.mqtt_error(f"Failed to connect to MQTT Broker: {str(e)}")
+            return False
+
+        self._maintain_task = asyncio.create_task(self._maintain())
+
+        # The CONNACK is read by the event loop
+        for _ in range(int(timeout / 0.5)):
+            if self.client.is_connected():
+                break
+            await asyncio.sleep(0.5)
+
+        if not self.client.is_connected():
+            await self.stop()
+            return False
+
+        logger.mqtt_info("MQTT transport started on the event loop")
+        return True
+
+    async def stop(self, timeout: float = 5) -> None:
+        """
+        Disconnect from the broker.
+        """
+        if self._maintain_task:
+            self._maintain_task.cancel()
+            await asyncio.gather(self._maintain_task, return_exceptions=True)
+            self._maintain_task = None
+
+        if self.client.socket() is not None:
+            self.client.disconnect()
+            # The DISCONNECT packet is written by the event loop, which then closes the socket
+            for _ in range(int(timeout / 0.1)):
+                if self.client.socket() is None:
+                    break
+                await asyncio.sleep(0.1)
+
+    def subscribe(self, topic: str, qos: int, handler: MessageHandler) -> None:
+        """
+        Subscribe to `topic`, its messages are passed to `handler` as they are read.
+        """
+        # Received messages carry the plain topic, the callback is registered on it
+        subscription = f"$share/{self.shared_group}/{topic}" if self.shared_group else topic
+
+        def _on_message(client, userdata, msg: mqtt.MQTTMessage) -> None:
+            try:
+                handler(msg)
+            except Exception as e:
+                logger.mqtt_error(f"Error processing message on topic {msg.topic}", e)
+
+        self._subscriptions[subscription] = qos
+        self.client.message_callback_add(topic, _on_message)
+        if self.client.is_connected():
+            self.client.subscribe(subscription, qos=qos)
+
+    async def _maintain(self) -> None:
+        """
+        Background task sending the keepalive pings and reconnecting with a backoff.
+        """
+        delay = RECONNECT_MIN_DELAY_SECONDS
+        while True:
+            if self.client.socket() is None:
+                await asyncio.sleep(delay)
+                try:
+                    logger.mqtt_info("Reconnecting to MQTT Broker...")
+                    await asyncio.to_thread(self.client.reconnect)
+                    delay = RECONNECT_MIN_DELAY_SECONDS
+                except Exception as e:
+                    logger.mqtt_error(f"Failed to reconnect to MQTT Broker: {str(e)}")
+                    delay = min(delay * 2, RECONNECT_MAX_DELAY_SECONDS)
+                continue
+
+            self.client.loop_misc()
+            await asyncio.sleep(MISC_INTERVAL_SECONDS)
@@ -4,7 +4,9 @@ from contextlib import asynccontextmanager
 import asyncio
 
 from cores.config import env
-from cores.database import start_mongodb_connection, stop_mongodb_connection
+from cores.database import start_mongodb_connection, stop_mongodb_connection, bootstrap_mongodb, _db
+from cores.retention import is_retention_enabled, run_log_retention
+from cores.changestream import watch_cache_invalidations
 from cores.exceptions import validation_exception_handler, http_exception_handler
 from utils.logger import logger
 
@@ -19,6 +21,7 @@ from middlewares.cors import CORSMiddleware
 
 from externals.firebase.client import init_firebase_app
 from externals.mqtts.run import start_mqtt_service, stop_mqtt_service
+from externals.mqtts.subscribe import flush_log_buffers
 from externals.gdrive.client import check_gdrive_credentials
 from externals.gdrive.client import SERVICE_ACCOUNT_FILE
 
@@ -44,28 +47,51 @@ async def _lifespan(_app: FastAPI):
             logger.db_error("MongoDB connection failed")
     except Exception as e:
         logger.db_error("Error checking MongoDB connection", e)
+
+    # Task 2: Apply migrations and reconcile MongoDB indexes
+    logger.system_info("[TASK 2]: Applying MongoDB migrations and indexes...")
+    if db_connected:
+        await bootstrap_mongodb()
+    else:
+        logger.db_warning("Skipping MongoDB bootstrap, database is not connected")
     
-    # Task 2: Start MQTT service
-    logger.system_info("[TASK 2]: Starting MQTT service...")
+    # Task 3: Start MQTT service
+    logger.system_info("[TASK 3]: Starting MQTT service...")
     loop = asyncio.get_running_loop()
     mqtt_client_connected = await loop.run_in_executor(None, start_mqtt_service, loop)
 
     if mqtt_client_connected:
-        logger.mqtt_info("MQTT service started and client is connected (running in background)")
+        logger.mqtt_info("MQTT service started and client is connected (running on the event loop)")
     else:
         logger.mqtt_error("Failed to start MQTT service")
     
-    # Task 3: Initialize Firebase Admin SDK
-    logger.system_info("[TASK 3]: Initializing Firebase...")
+    # Task 4: Initialize Firebase Admin SDK
+    logger.system_info("[TASK 4]: Initializing Firebase...")
     init_firebase_app()
 
-    # Task 4: Checking Google Drive credential file
-    logger.system_info("[TASK 4]: Checking Google Drive credentials...")
+    # Task 5: Checking Google Drive credential file
+    logger.system_info("[TASK 5]: Checking Google Drive credentials...")
     is_gdrive_creds_valid = check_gdrive_credentials(SERVICE_ACCOUNT_FILE)
     if is_gdrive_creds_valid:
         logger.gdrive_info("Google Drive credentials file is valid")
     else:
         logger.gdrive_error("Google Drive credentials file is invalid or not found")
+
+    # Task 6: Start the OTA log retention job
+    logger.system_info("[TASK 6]: Starting OTA log retention...")
+    retention_task = None
+    if db_connected and is_retention_enabled():
+        retention_task = asyncio.create_task(run_log_retention(_db))
+    else:
+        logger.db_info("OTA log retention is disabled or database is not connected")
+
+    # Task 7: Watch MongoDB changes to invalidate the caches of every worker
+    logger.system_info("[TASK 7]: Starting cache change stream...")
+    change_stream_task = None
+    if db_connected and env.CACHE_CHANGE_STREAM_ENABLED:
+        change_stream_task = asyncio.create_task(watch_cache_invalidations(_db))
+    else:
+        logger.db_info("Cache change stream is disabled or database is not connected")
     
     logger.system_info("LokaSync OTA Backend: Lifespan startup sequence finished")
 
@@ -73,20 +99,38 @@ async def _lifespan(_app: FastAPI):
 
     # ---- Shutdown tasks ----
     logger.system_info("LokaSync OTA Backend: Lifespan shutdown...")
-    # Task 1: Stop MongoDB connection
-    try:
-        if db_connected:
-            await stop_mongodb_connection()
-            logger.db_info("[TASK 1]: MongoDB connection closed successfully")
-    except Exception as e:
-        logger.db_error("[TASK 1]: Error closing MongoDB connection", e)
-    
-    # Task 2: Stop MQTT service
+    # Task 1: Stop the OTA log retention job and the cache change stream
+    for background_task in (retention_task, change_stream_task):
+        if background_task:
+            background_task.cancel()
+            try:
+                await background_task
+            except asyncio.CancelledError:
+                pass
+    logger.db_info("[TASK 1]: Background database tasks stopped")
+
+    # Task 2: Stop MQTT service, the messages already received are handled first
     if mqtt_client_connected:
         await loop.run_in_executor(None, stop_mqtt_service)
         logger.mqtt_info("[TASK 2]: MQTT service stopped successfully")
     else:
         logger.mqtt_warning("[TASK 2]: MQTT service was not running or already stopped")
+
+    # Task 3: Write the buffered MQTT log updates while MongoDB is still connected
+    try:
+        if db_connected:
+            await flush_log_buffers()
+            logger.db_info("[TASK 3]: Buffered MQTT log updates flushed")
+    except Exception as e:
+        logger.db_error("[TASK 3]: Error flushing buffered MQTT log updates", e)
+
+    # Task 4: Stop MongoDB connection
+    try:
+        if db_connected:
+            await stop_mongodb_connection()
+            logger.db_info("[TASK 4]: MongoDB connection closed successfully")
+    except Exception as e:
+        logger.db_error("[TASK 4]: Error closing MongoDB connection", e)
     
     logger.system_info("LokaSync OTA Backend: Lifespan shutdown completed")
 
@@ -1,7 +1,8 @@
-from typing import Any
-from typing import Annotated, Union
+from enum import Enum
+from typing import Any, Dict, Mapping, Type, TypeVar
+from typing import Annotated, Union, get_args
 from bson import ObjectId
-from pydantic import PlainSerializer, AfterValidator, WithJsonSchema
+from pydantic import BaseModel, PlainSerializer, AfterValidator, WithJsonSchema
 
 def validate_object_id(v: Any) -> ObjectId:
     if isinstance(v, ObjectId):
@@ -15,4 +16,46 @@ PyObjectId = Annotated[
     AfterValidator(validate_object_id),
     PlainSerializer(lambda x: str(x), return_type=str),
     WithJsonSchema({"type": "string"}, mode="serialization"),
-]
\ No newline at end of file
+]
+
+ModelT = TypeVar("ModelT", bound="DBModel")
+
+# Enum fields of each DBModel subclass
+_ENUM_FIELDS: Dict[type, Dict[str, Type[Enum]]] = {}
+
+
+class DBModel(BaseModel):
+    """
+    Base class of the models stored in MongoDB.
+
+    Documents read back from the database were validated when they were written
+    (API schemas, MQTT payloads), so `from_db` builds the model without running
+    the validators again. Inbound data must keep using the regular constructor.
+    """
+
+    @classmethod
+    def _get_enum_fields(cls) -> Dict[str, Type[Enum]]:
+        # Computed once per model class
+        enum_fields = _ENUM_FIELDS.get(cls)
+        if enum_fields is None:
+            enum_fields = {}
+            for name, field in cls.model_fields.items():
+                for annotation in (field.annotation, *get_args(field.annotation)):
+                    if isinstance(annotation, type) and issubclass(annotation, Enum):
+                        enum_fields[name] = annotation
+                        break
+            _ENUM_FIELDS[cls] = enum_fields
+        return enum_fields
+
+    @classmethod
+    def from_db(cls: Type[ModelT], document: Mapping[str, Any]) -> ModelT:
+        """
+        Build the model from a trusted database document, skipping validation.
+        """
+        values = dict(document)
+        # Enums are stored as their value, restore them so serialization stays typed
+        for name, enum_type in cls._get_enum_fields().items():
+            value = values.get(name)
+            if value is not None and not isinstance(value, enum_type):
+                values[name] = enum_type(value)
+        return cls.model_construct(**values)
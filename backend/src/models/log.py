@@ -1,15 +1,15 @@
-from pydantic import BaseModel, Field, field_validator
+from pydantic import Field, field_validator
 from datetime import datetime
 from typing import Optional
 from bson import ObjectId
 
-from models.common import PyObjectId
+from models.common import DBModel, PyObjectId
 from enums.log import LogStatus
 from utils.validator import validate_input
 from utils.datetime import get_current_datetime, convert_datetime_to_str
 
 
-class LogModel(BaseModel):
+class LogModel(DBModel):
     id: PyObjectId = Field(..., alias="_id")
     created_at: datetime = Field(..., default_factory=get_current_datetime)
     session_id: str = Field(
@@ -1,9 +1,9 @@
-from pydantic import BaseModel, Field, field_validator
+from pydantic import Field, field_validator
 from datetime import datetime
 from typing import Optional
 from bson import ObjectId
 
-from models.common import PyObjectId
+from models.common import DBModel, PyObjectId
 from utils.datetime import (
     get_current_datetime,
     convert_datetime_to_str
@@ -14,7 +14,7 @@ from utils.validator import (
 )
 
 
-class NodeModel(BaseModel):
+class NodeModel(DBModel):
     id: PyObjectId = Field(..., alias="_id")
     created_at: datetime = Field(..., default_factory=get_current_datetime)
     latest_updated: datetime = Field(..., default_factory=get_current_datetime)
@@ -56,6 +56,10 @@ class NodeModel(BaseModel):
     is_group: Optional[bool] = Field(
         default=False
     )
+    # Firmware version document the version fields come from, the node identity is `_id`
+    firmware_id: Optional[PyObjectId] = Field(
+        default=None
+    )
 
     @field_validator("node_location", "node_type", "node_id")
     def validate_node_location(cls, v):
@@ -94,6 +98,7 @@ class NodeModel(BaseModel):
                 "node_codename": "cibubur-sayuranpagi_pembibitan_1a",
                 "description": "This is a description of the node.",
                 "firmware_url": "https://example.com/firmware/example.ino.bin",
-                "firmware_version": "1.0.0"
+                "firmware_version": "1.0.0",
+                "firmware_id": "987654321"
             }
         }
\ No newline at end of file
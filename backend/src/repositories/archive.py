@@ -0,0 +1,212 @@
+import asyncio
+from datetime import date, datetime
+from itertools import islice
+from typing import Any, Awaitable, Callable, Dict, Generic, Iterator, List, Optional, Tuple, Type, TypeVar
+
+from models.common import DBModel
+from cores.retention import get_hot_window_start
+from utils.archive import (
+    COUNTED_FIELDS,
+    get_day_bounds,
+    list_archive_days,
+    read_day_counts,
+    read_documents,
+    to_utc_naive
+)
+from utils.cursor import Cursor
+from utils.logger import logger
+
+ModelT = TypeVar("ModelT", bound=DBModel)
+
+# Page of the live repository: (filters, skip, limit, after) -> (logs, total, filter options)
+LivePageGetter = Callable[..., Awaitable[Tuple[List[ModelT], int, Any]]]
+
+
+class LogArchiveRepository(Generic[ModelT]):
+    """
+    Read-only access to the archived (expired) logs of a collection, see `cores/retention.py`.
+    Supports the same equality filters, ordering and pagination as the live repositories.
+    Days fully inside the requested range are counted (and skipped by offset pages)
+    from their count files, only the days a page actually reads are decompressed.
+    """
+    def __init__(self, collection_name: str, model: Type[ModelT]):
+        self.collection_name = collection_name
+        self.model = model
+
+    @staticmethod
+    def _matches(
+        document: Dict[str, Any],
+        filters: Dict[str, Any],
+        start: Optional[datetime],
+        end: Optional[datetime],
+        after: Optional[Cursor]
+    ) -> bool:
+        for field, value in filters.items():
+            if document.get(field) != value:
+                return False
+
+        created_at = to_utc_naive(document["created_at"])
+        if start and created_at < to_utc_naive(start):
+            return False
+        if end and created_at > to_utc_naive(end):
+            return False
+
+        if after:
+            after_value, after_id = after
+            after_value = to_utc_naive(after_value)
+            if created_at > after_value or (created_at == after_value and document["_id"] >= after_id):
+                return False
+
+        return True
+
+    def _count_day(
+        self,
+        day: date,
+        filters: Dict[str, Any],
+        start: Optional[datetime],
+        end: Optional[datetime]
+    ) -> Optional[int]:
+        """
+        Count the matching documents of a day from its count file.
+        Returns None if the range only covers part of the day, or a filter isn't counted.
+        """
+        day_start, day_end = get_day_bounds(day)
+        if start and to_utc_naive(start) > day_start:
+            return None
+        if end and to_utc_naive(end) < day_end:
+            return None
+        if any(field not in COUNTED_FIELDS for field in filters):
+            return None
+
+        positions = [(COUNTED_FIELDS.index(field), value) for field, value in filters.items()]
+        return sum(
+            count for values, count in read_day_counts(self.collection_name, day)
+            if all(values[position] == value for position, value in positions)
+        )
+
+    def _read_day(
+        self,
+        day: date,
+        filters: Dict[str, Any],
+        start: Optional[datetime],
+        end: Optional[datetime],
+        after: Optional[Cursor]
+    ) -> List[Dict[str, Any]]:
+        """
+        Matching documents of a day, sorted by newest first.
+        """
+        documents = [
+            document for document in read_documents(self.collection_name, day)
+            if self._matches(document, filters, start, end, after)
+        ]
+        documents.sort(key=lambda document: (to_utc_naive(document["created_at"]), document["_id"]), reverse=True)
+        return documents
+
+    def _scan(
+        self,
+        filters: Dict[str, Any],
+        start: Optional[datetime],
+        end: Optional[datetime],
+        after: Optional[Cursor],
+        skip: int = 0
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield matching archived documents sorted by newest first, one day file at a time,
+        after skipping `skip` of them. Whole days are skipped using their counts.
+        """
+        for day in list_archive_days(self.collection_name, start, end):
+            if skip and after is None:
+                count = self._count_day(day, filters, start, end)
+                if count is not None and count <= skip:
+                    skip -= count
+                    continue
+
+            documents = self._read_day(day, filters, start, end, after)
+            if skip:
+                skipped = min(skip, len(documents))
+                documents = documents[skipped:]
+                skip -= skipped
+            yield from documents
+
+    async def get_all_logs(
+        self,
+        filters: Dict[str, Any],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        skip: int = 0,
+        limit: int = 10,
+        after: Optional[Cursor] = None
+    ) -> List[ModelT]:
+        logger.db_info(f"Repository: Retrieving archived '{self.collection_name}' - Skip: {skip}, Limit: {limit}, Filters: {filters}")
+
+        def _read() -> List[Dict[str, Any]]:
+            return list(islice(self._scan(filters, start, end, after, skip=skip), limit))
+
+        try:
+            documents = await asyncio.to_thread(_read)
+            return [self.model.from_db(document) for document in documents]
+        except Exception as e:
+            logger.db_error(f"Repository: Failed to read archived '{self.collection_name}'", e)
+            return []
+
+    async def count_logs(
+        self,
+        filters: Dict[str, Any],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> int:
+        def _count() -> int:
+            total = 0
+            for day in list_archive_days(self.collection_name, start, end):
+                count = self._count_day(day, filters, start, end)
+                if count is None:
+                    # Range boundary day, only its matching documents count
+                    count = len(self._read_day(day, filters, start, end, None))
+                total += count
+            return total
+
+        try:
+            return await asyncio.to_thread(_count)
+        except Exception as e:
+            logger.db_error(f"Repository: Failed to count archived '{self.collection_name}'", e)
+            return 0
+
+    async def get_merged_page(
+        self,
+        get_live_page: LivePageGetter,
+        filters: Dict[str, Any],
+        skip: int = 0,
+        limit: int = 10,
+        after: Optional[Cursor] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Tuple[List[ModelT], int, Any]:
+        """
+        Page of the live logs from `get_live_page`, with the total count and the filter options.
+        When `start` reaches past the retention hot window, archived logs are counted
+        and appended after the live ones (they are always older).
+        """
+        live_filters = dict(filters)
+        if start or end:
+            live_filters["created_at"] = {}
+            if start:
+                live_filters["created_at"]["$gte"] = start
+            if end:
+                live_filters["created_at"]["$lte"] = end
+
+        logs, total, filter_options = await get_live_page(live_filters, skip, limit, after=after)
+
+        hot_window_start = get_hot_window_start()
+        if hot_window_start and start and to_utc_naive(start) < hot_window_start:
+            live_total = total
+            total += await self.count_logs(filters, start, end)
+
+            if len(logs) < limit:
+                # Offset pages continue in the archive where the live logs end
+                archive_skip = 0 if after else max(0, skip - live_total)
+                logs += await self.get_all_logs(
+                    filters, start, end,
+                    skip=archive_skip, limit=limit - len(logs), after=after
+                )
+
+        return logs, total, filter_options
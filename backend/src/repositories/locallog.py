@@ -1,6 +1,7 @@
+import asyncio
 from fastapi import Depends
-from pymongo import DESCENDING
-from typing import Dict, Any, List, Optional
+from pymongo import DESCENDING, ReturnDocument, UpdateOne
+from typing import Dict, Any, List, Optional, Tuple
 from motor.motor_asyncio import (
     AsyncIOMotorDatabase,
     AsyncIOMotorCollection
@@ -13,7 +14,11 @@ from cores.dependencies import (
     get_db_connection,
     get_local_logs_collection
 )
+from cores.database import ANALYTICS_READ_PREFERENCE
+from cores.facets import local_log_facets
 from utils.datetime import get_current_datetime
+from utils.cursor import Cursor, build_keyset_filter
+from utils.bulk import delete_in_batches
 from utils.logger import logger
 
 
@@ -25,7 +30,42 @@ class LocalLogRepository:
     ):
         self.db = db
         self.logs_collection = logs_collection
+        # List, count and export queries may be served by secondaries
+        self.logs_read_collection = logs_collection.with_options(read_preference=ANALYTICS_READ_PREFERENCE)
     
+    def _build_upsert(
+        self,
+        filter_query: Dict[str, Any],
+        update_fields: Dict[str, Any],
+        log_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Build the update document of a log upsert.
+        The identity fields and the defaults are only written when the session is first seen.
+        """
+        # Optional fields default
+        optional_fields = [
+            "firmware_size_kb",
+            "bytes_written",
+            "download_duration_sec",
+            "download_speed_kbps",
+            "upload_duration_app_sec",
+            "upload_duration_esp_sec",
+            "latency_sec",
+            "firmware_version_new"
+        ]
+        on_insert: Dict[str, Any] = {field: None for field in optional_fields}
+        # Set alias field if not already
+        on_insert["firmware_version_origin"] = log_data.get("firmware_version_origin", None)
+        on_insert["flash_status"] = LocalLogStatus.IN_PROGRESS.value
+        on_insert["created_at"] = get_current_datetime()
+        on_insert.update(filter_query)
+
+        # A field can't be in both $set and $setOnInsert
+        on_insert = {key: value for key, value in on_insert.items() if key not in update_fields}
+
+        return {"$set": update_fields, "$setOnInsert": on_insert}
+
     async def upsert_log(
         self,
         filter_query: Dict[str, Any],
@@ -33,74 +73,145 @@ class LocalLogRepository:
         log_data: Dict[str, Any]
     ) -> Optional[LocalLogModel]:
         """
-        Upsert log entry in MongoDB.
+        Upsert log entry in MongoDB with a single atomic command.
+        The log is identified by its session id.
         Returns LogModel with proper _id if successful, None otherwise.
         """
         try:
-            existing = await self.logs_collection.find_one(filter_query)
-
-            if existing:
-                await self.logs_collection.update_one(
-                    filter_query,
-                    {"$set": update_fields}
-                )
-                logger.db_info("Log updated in MongoDB")
-                updated_log = await self.logs_collection.find_one(filter_query)
-                return LocalLogModel(**updated_log) if updated_log else None
-            else:
-                insert_data = {**filter_query, **update_fields}
-
-                # Optional fields default
-                optional_fields = [
-                    "firmware_size_kb",
-                    "bytes_written",
-                    "download_duration_sec",
-                    "download_speed_kbps",
-                    "upload_duration_app_sec",
-                    "upload_duration_esp_sec",
-                    "latency_sec",
-                    "firmware_version_new"
-                ]
-                for field in optional_fields:
-                    insert_data.setdefault(field, None)
-
-                # Set alias field if not already
-                insert_data.setdefault("firmware_version_origin", log_data.get("firmware_version_origin", None))
-
-                insert_data.setdefault("flash_status", LocalLogStatus.IN_PROGRESS)
-                insert_data.setdefault("created_at", get_current_datetime())
-
-                result = await self.logs_collection.insert_one(insert_data)
-                logger.db_info(f"Log inserted into MongoDB with ID: {result.inserted_id}")
-                insert_data["_id"] = result.inserted_id
-                return LocalLogModel(**insert_data)
+            log = await self.logs_collection.find_one_and_update(
+                {"session_id": filter_query["session_id"]},
+                self._build_upsert(filter_query, update_fields, log_data),
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            logger.db_info(f"Log upserted in MongoDB with ID: {log['_id']}")
+            local_log_facets.add(log)
+            return LocalLogModel(**log)
         except Exception as e:
             logger.db_error("MongoDB upsert failed", e)
             return None
 
+    async def bulk_upsert_logs(
+        self,
+        entries: List[Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]]
+    ) -> List[LocalLogModel]:
+        """
+        Upsert many log entries with a single bulk_write, then read them back in one query.
+        Each entry is a (filter_query, update_fields, log_data) tuple, at most one per session.
+        Returns the upserted logs, a log failing validation is skipped.
+        Raises if the write failed, so the caller can retry the batch.
+        """
+        if not entries:
+            return []
+
+        operations = [
+            UpdateOne(
+                {"session_id": filter_query["session_id"]},
+                self._build_upsert(filter_query, update_fields, log_data),
+                upsert=True
+            )
+            for filter_query, update_fields, log_data in entries
+        ]
+        session_ids = [filter_query["session_id"] for filter_query, _, _ in entries]
+
+        try:
+            result = await self.logs_collection.bulk_write(operations, ordered=False)
+            logger.db_info(f"Logs bulk upserted in MongoDB - Matched: {result.matched_count}, Upserted: {result.upserted_count}")
+
+            logs = await self.logs_collection.find({"session_id": {"$in": session_ids}}).to_list(length=len(session_ids))
+        except Exception as e:
+            logger.db_error("MongoDB bulk upsert failed", e)
+            raise
+
+        # One invalid document (e.g. a malformed node_mac) must not hide the rest of the batch
+        results: List[LocalLogModel] = []
+        for log in logs:
+            local_log_facets.add(log)
+            try:
+                results.append(LocalLogModel(**log))
+            except Exception as e:
+                logger.db_error(f"Repository: Skipping invalid log of session '{log.get('session_id')}'", e)
+        return results
+
+    async def mark_stats_recorded(self, session_ids: List[str], flag: str = "stats_recorded") -> List[str]:
+        """
+        Flag finished sessions as counted, one conditional update each.
+        Returns the sessions flagged by this call, so a session redelivered later
+        or finished on another replica is only counted once.
+        """
+        try:
+            results = await asyncio.gather(*(
+                self.logs_collection.find_one_and_update(
+                    {"session_id": session_id, flag: {"$ne": True}},
+                    {"$set": {flag: True}},
+                    projection={"_id": 1}
+                )
+                for session_id in session_ids
+            ))
+            return [session_id for session_id, result in zip(session_ids, results) if result is not None]
+        except Exception as e:
+            logger.db_error(f"Repository: Failed to flag {len(session_ids)} finished session(s) as '{flag}'", e)
+            raise
+
+    async def unmark_stats_recorded(self, session_ids: List[str], flag: str = "stats_recorded") -> None:
+        """
+        Remove the flag of sessions whose counting failed, so they're counted when retried.
+        """
+        try:
+            await self.logs_collection.update_many(
+                {"session_id": {"$in": session_ids}},
+                {"$unset": {flag: ""}}
+            )
+        except Exception as e:
+            logger.db_error(f"Repository: Failed to unflag {len(session_ids)} session(s) as '{flag}'", e)
+            raise
+
     async def get_all_logs(
         self,
         filters: Dict[str, Any],
         skip: int = 0,
         limit: int = 10,
+        after: Optional[Cursor] = None
     ) -> List[LocalLogModel]:
-        logger.db_info(f"Repository: Retrieving logs - Skip: {skip}, Limit: {limit}, Filters: {filters}")
+        """
+        Retrieve logs sorted by newest first.
+        If `after` is provided, keyset pagination is used and `skip` is ignored.
+        """
+        logger.db_info(f"Repository: Retrieving logs - Skip: {skip}, Limit: {limit}, Filters: {filters}, After: {after}")
 
         try:
             cursor = (
-                self.logs_collection
-                .find(filters or {})
-                .sort("created_at", DESCENDING)
-                .skip(skip)
+                self.logs_read_collection
+                .find(build_keyset_filter(filters, "created_at", after))
+                .sort([("created_at", DESCENDING), ("_id", DESCENDING)])
+                .skip(0 if after else skip)
                 .limit(limit)
             )
             logs = await cursor.to_list(length=limit)
             logger.db_info(f"Repository: Retrieved {len(logs)} logs from database")
-            return [LocalLogModel(**log) for log in logs]
+            return [LocalLogModel.from_db(log) for log in logs]
         except Exception as e:
             logger.db_error("Repository: Failed to retrieve logs", e)
             return []
     
+    async def get_logs_page(
+        self,
+        filters: Dict[str, Any],
+        skip: int = 0,
+        limit: int = 10,
+        after: Optional[Cursor] = None
+    ) -> Tuple[List[LocalLogModel], int, LocalLogFilterOptions]:
+        """
+        Retrieve a page of logs, the total count and the filter options in one go.
+        The three queries are independent, so they run concurrently on the connection pool.
+        """
+        logs, total, filter_options = await asyncio.gather(
+            self.get_all_logs(filters=filters, skip=skip, limit=limit, after=after),
+            self.count_logs(filters),
+            self.get_filter_options()
+        )
+        return logs, total, filter_options
+
     async def get_detail_log(self, session_id: str) -> Optional[LocalLogModel]:
         """
         Retrieve a detailed log entry by session id.
@@ -114,7 +225,7 @@ class LocalLogRepository:
             })
             if log:
                 logger.db_info(f"Repository: Log found for session id '{session_id}'")
-                return LocalLogModel(**log)
+                return LocalLogModel.from_db(log)
             else:
                 logger.db_info(f"Repository: No log found for session id '{session_id}'")
                 return None
@@ -125,7 +236,11 @@ class LocalLogRepository:
     async def get_node_by_codename(self, node_codename: str) -> bool:
         logger.db_info(f"Repository: Checking if log exists for node '{node_codename}'")
         try:
-            node_exists = await self.logs_collection.find_one({"node_codename": node_codename})
+            # Covered by the `node_codename` index, no document is fetched
+            node_exists = await self.logs_collection.find_one(
+                {"node_codename": node_codename},
+                {"_id": 0, "node_codename": 1}
+            )
             result = True if node_exists else False
             logger.db_info(f"Repository: Log exists for node '{node_codename}': {result}")
             return result
@@ -139,17 +254,36 @@ class LocalLogRepository:
         try:
             result = await self.logs_collection.delete_one({"session_id": session_id})
             logger.db_info(f"Repository: Deleted {result.deleted_count} log(s) for session id '{session_id}'")
+            if result.deleted_count:
+                local_log_facets.invalidate()
 
             return result.deleted_count
         except Exception as e:
             logger.db_error(f"Repository: Failed to delete logs for session id '{session_id}'", e)
             return 0
+
+    async def delete_logs(self, query: Dict[str, Any]) -> int:
+        """
+        Delete every log matching `query` in batches, returns the number of deleted logs.
+        """
+        logger.db_info(f"Repository: Bulk deleting logs - Query: {query}")
+
+        try:
+            deleted = await delete_in_batches(self.logs_collection, query)
+            logger.db_info(f"Repository: Bulk deleted {deleted} log(s)")
+            if deleted:
+                local_log_facets.invalidate()
+
+            return deleted
+        except Exception as e:
+            logger.db_error("Repository: Failed to bulk delete logs", e)
+            return 0
     
     async def count_logs(self, filters: Dict[str, Any]) -> int:
         logger.db_info(f"Repository: Counting logs with filters: {filters}")
         
         try:
-            count = await self.logs_collection.count_documents(filters)
+            count = await self.logs_read_collection.count_documents(filters)
             logger.db_info(f"Repository: Total logs count: {count}")
             return count
         except Exception as e:
@@ -160,36 +294,13 @@ class LocalLogRepository:
         logger.db_info("Repository: Getting log filter options")
         
         try:
-            pipeline = [
-                {"$group": {
-                    "_id": None,
-                    "node_codename": {"$addToSet": "$node_codename"},
-                    "flash_status": {"$addToSet": "$flash_status"}
-                }},
-                {"$project": {
-                    "_id": 0,
-                    "node_location": 1,
-                    "flash_status": 1
-                }}
-            ]
-
-            result = await self.logs_collection.aggregate(pipeline).to_list(length=1)
-
-            # Get all flash statuses from the LogStatus enum
-            all_flash_statuses = [status.value for status in LocalLogStatus]
-
-            if result:
-                filter_options = LocalLogFilterOptions(
-                    node_locations=result[0].get("node_codename", []),
-                    node_types=[],  # Empty, since model doesn't include node_type
-                    flash_statuses=all_flash_statuses
-                )
-            else:
-                filter_options = LocalLogFilterOptions(
-                    node_locations=[],
-                    node_types=[],
-                    flash_statuses=all_flash_statuses
-                )
+            facets = await local_log_facets.get(self.logs_read_collection)
+            filter_options = LocalLogFilterOptions(
+                node_locations=facets["node_codenames"],
+                node_types=[],  # Empty, since model doesn't include node_type
+                # Get all flash statuses from the LocalLogStatus enum
+                flash_statuses=[status.value for status in LocalLogStatus]
+            )
 
             logger.db_info("Repository: Log filter options retrieved successfully")
             return filter_options
@@ -199,4 +310,4 @@ class LocalLogRepository:
                 node_locations=[],
                 node_types=[],
                 flash_statuses=[status.value for status in LocalLogStatus]
-            )
\ No newline at end of file
+            )
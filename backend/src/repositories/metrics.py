@@ -0,0 +1,121 @@
+from fastapi import Depends
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from models.log import LogModel
+from models.locallog import LocalLogModel
+from cores.config import env
+from cores.database import ANALYTICS_READ_PREFERENCE
+from cores.dependencies import get_ota_metrics_collection
+from utils.datetime import get_current_datetime
+from utils.logger import logger
+
+"""NOTE:
+QoS metrics of completed OTA sessions, mirrored from the log documents into
+the `ota_metrics` time-series collection (see migration 0004).
+One measurement per session, with the node identity as metaField, so windowed
+trend queries scan compressed buckets instead of whole log documents.
+"""
+MetricSource = Literal["cloud", "local"]
+MetricBucket = Literal["hour", "day", "week", "month"]
+
+# Numeric fields copied from the log documents
+METRIC_FIELDS = [
+    "firmware_size_kb",
+    "bytes_written",
+    "download_duration_sec",
+    "download_speed_kbps",
+    "upload_duration_app_sec",
+    "upload_duration_esp_sec",
+    "latency_sec",
+]
+
+
+class MetricsRepository:
+    def __init__(
+        self,
+        metrics_collection: AsyncIOMotorCollection = Depends(get_ota_metrics_collection)
+    ):
+        self.metrics_collection = metrics_collection
+        # QoS queries are analytics, they may be served by secondaries
+        self.metrics_read_collection = metrics_collection.with_options(read_preference=ANALYTICS_READ_PREFERENCE)
+
+    @staticmethod
+    def _build_measurement(log: LogModel | LocalLogModel, source: MetricSource) -> Dict[str, Any]:
+        measurement: Dict[str, Any] = {
+            "timestamp": getattr(log, "flash_completed_at", None) or get_current_datetime(),
+            "meta": {
+                "source": source,
+                "node_codename": log.node_codename,
+                "node_location": getattr(log, "node_location", None),
+                "node_type": getattr(log, "node_type", None),
+            },
+            "session_id": log.session_id,
+        }
+        for field in METRIC_FIELDS:
+            value = getattr(log, field, None)
+            if value is not None:
+                measurement[field] = value
+        return measurement
+
+    async def record_completed_logs(self, logs: List[LogModel | LocalLogModel], source: MetricSource) -> int:
+        """
+        Insert one measurement per completed OTA session.
+        Returns the number of inserted measurements, raises if the insert failed.
+        """
+        if not logs:
+            return 0
+
+        measurements = [self._build_measurement(log, source) for log in logs]
+        try:
+            result = await self.metrics_collection.insert_many(measurements, ordered=False)
+            logger.db_info(f"Repository: Recorded {len(result.inserted_ids)} '{source}' OTA metric(s)")
+            return len(result.inserted_ids)
+        except Exception as e:
+            logger.db_error(f"Repository: Failed to record '{source}' OTA metrics", e)
+            raise
+
+    async def get_qos_metrics(
+        self,
+        start: datetime,
+        end: datetime,
+        bucket: MetricBucket = "day",
+        meta_filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Aggregate the QoS metrics per time bucket (in the app timezone) between `start` and `end`.
+        `meta_filters` are matched against the metaField (source, node_codename, node_location, node_type).
+        """
+        logger.db_info(f"Repository: Getting QoS metrics - Range: {start} - {end}, Bucket: {bucket}, Filters: {meta_filters}")
+
+        match: Dict[str, Any] = {"timestamp": {"$gte": start, "$lte": end}}
+        for field, value in (meta_filters or {}).items():
+            match[f"meta.{field}"] = value
+
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {"$dateTrunc": {"date": "$timestamp", "unit": bucket, "timezone": env.TIMEZONE}},
+                "sessions": {"$sum": 1},
+                "avg_download_speed_kbps": {"$avg": "$download_speed_kbps"},
+                "min_download_speed_kbps": {"$min": "$download_speed_kbps"},
+                "max_download_speed_kbps": {"$max": "$download_speed_kbps"},
+                "avg_download_duration_sec": {"$avg": "$download_duration_sec"},
+                "avg_latency_sec": {"$avg": "$latency_sec"},
+                "avg_upload_duration_app_sec": {"$avg": "$upload_duration_app_sec"},
+                "avg_upload_duration_esp_sec": {"$avg": "$upload_duration_esp_sec"},
+                "total_bytes_written": {"$sum": "$bytes_written"},
+            }},
+            {"$sort": {"_id": 1}},
+            {"$set": {"bucket_start": "$_id"}},
+            {"$unset": "_id"}
+        ]
+
+        try:
+            result = await self.metrics_read_collection.aggregate(pipeline).to_list(length=None)
+            logger.db_info(f"Repository: Retrieved {len(result)} QoS metric bucket(s)")
+            return result
+        except Exception as e:
+            logger.db_error("Repository: Failed to get QoS metrics", e)
+            return []
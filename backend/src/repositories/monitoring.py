@@ -2,6 +2,7 @@ from fastapi import Depends
 from typing import Dict, List
 from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorCollection
 
+from cores.facets import node_facets
 from cores.dependencies import (
     get_db_connection,
     get_nodes_collection
@@ -25,9 +26,10 @@ class MonitoringRepository:
         logger.db_info("Repository: Getting list of distinct node values")
         
         try:
-            node_locations = sorted(await self.nodes_collection.distinct("node_location"))
-            node_types = sorted(await self.nodes_collection.distinct("node_type"))
-            node_ids = sorted(await self.nodes_collection.distinct("node_id"))
+            facets = await node_facets.get(self.nodes_collection)
+            node_locations = facets["node_locations"]
+            node_types = facets["node_types"]
+            node_ids = facets["node_ids"]
 
             if not node_locations and not node_types and not node_ids:
                 logger.db_info("Repository: No nodes found in collection")
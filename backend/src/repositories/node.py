@@ -1,6 +1,8 @@
+import asyncio
 from fastapi import Depends, UploadFile
 from pymongo import DESCENDING
-from typing import Dict, Any, List, Optional
+from pymongo.errors import DuplicateKeyError
+from typing import Dict, Any, List, Optional, Tuple
 from motor.motor_asyncio import (
     AsyncIOMotorDatabase,
     AsyncIOMotorCollection
@@ -11,23 +13,48 @@ from schemas.node import NodeCreateSchema
 from schemas.common import BaseFilterOptions
 from cores.dependencies import (
     get_db_connection,
-    get_nodes_collection
+    get_identity_map,
+    get_nodes_collection,
+    get_firmware_versions_collection
 )
+from cores.identity import IdentityMap
+from cores.database import ANALYTICS_READ_PREFERENCE
+from cores.facets import node_facets
 from utils.datetime import get_current_datetime
+from utils.cursor import Cursor, build_keyset_filter
+from utils.bulk import delete_in_batches
 from utils.validator import set_codename
+from utils.version import get_version_key
 from utils.logger import logger
 from externals.gdrive.upload import upload_firmware_to_gdrive
 from externals.gdrive.delete import delete_firmware_from_gdrive
 
 
+"""NOTE:
+Nodes are stored in two collections:
+- `nodes`: the registry, one document per node_codename. It carries a
+  denormalized pointer to the latest firmware (firmware_version,
+  firmware_version_key, firmware_url), so it has the same shape as NodeModel.
+- `firmware_versions`: one document per node_codename + firmware_version.
+
+The node list is a plain page over the registry, while version-specific
+reads combine the registry document with one firmware version document.
+"""
 class NodeRepository:
     def __init__(
         self,
         db: AsyncIOMotorDatabase = Depends(get_db_connection),
-        nodes_collection: AsyncIOMotorCollection = Depends(get_nodes_collection)
+        nodes_collection: AsyncIOMotorCollection = Depends(get_nodes_collection),
+        firmware_collection: AsyncIOMotorCollection = Depends(get_firmware_versions_collection),
+        identity_map: IdentityMap = Depends(get_identity_map)
     ):
         self.db = db
         self.nodes_collection = nodes_collection
+        self.firmware_collection = firmware_collection
+        # Registry documents already read during this request
+        self.identity_map = identity_map
+        # List and count queries may be served by secondaries
+        self.nodes_read_collection = nodes_collection.with_options(read_preference=ANALYTICS_READ_PREFERENCE)
 
     def _extract_file_id_from_gdrive_url(self, url: str) -> Optional[str]:
         """
@@ -47,12 +74,56 @@ class NodeRepository:
                 return url.split('/d/')[1].split('/')[0]
         return None
 
+    async def _get_node(self, node_codename: str) -> Optional[Dict[str, Any]]:
+        """
+        Helper method to get a registry document, read at most once per request.
+        """
+        if not self.identity_map.contains("nodes", node_codename):
+            node = await self.nodes_collection.find_one({"node_codename": node_codename})
+            self.identity_map.set("nodes", node_codename, node)
+        return self.identity_map.get("nodes", node_codename)
+
+    def _compose_node(self, node: Dict[str, Any], firmware: Dict[str, Any]) -> NodeModel:
+        """
+        Helper method to build a NodeModel for a specific firmware version.
+        Identity fields (and `_id`) come from the registry, version fields from the firmware document.
+        """
+        return NodeModel.from_db({
+            **node,
+            "firmware_id": firmware["_id"],
+            "created_at": firmware["created_at"],
+            "latest_updated": firmware["latest_updated"],
+            "description": firmware.get("description"),
+            "firmware_url": firmware.get("firmware_url"),
+            "firmware_version": firmware.get("firmware_version"),
+        })
+
+    async def _refresh_latest_pointer(self, node_codename: str) -> None:
+        """
+        Helper method to point the registry to the highest remaining firmware version.
+        """
+        latest = await self.firmware_collection.find_one(
+            {"node_codename": node_codename},
+            {"_id": 0, "firmware_version": 1, "firmware_version_key": 1, "firmware_url": 1},
+            sort=[("firmware_version_key", DESCENDING)]
+        )
+        await self.nodes_collection.update_one(
+            {"node_codename": node_codename},
+            {"$set": {
+                "firmware_version": latest.get("firmware_version") if latest else None,
+                "firmware_version_key": latest.get("firmware_version_key") if latest else None,
+                "firmware_url": latest.get("firmware_url") if latest else None,
+                "latest_updated": get_current_datetime()
+            }}
+        )
+        self.identity_map.forget("nodes", node_codename)
+
     async def add_new_node(self, node_data: NodeCreateSchema) -> Optional[NodeModel]:
         node_codename = set_codename(node_data.node_location, node_data.node_type, node_data.node_id, node_data.is_group)
         
         logger.db_info(f"Repository: Adding new node with codename '{node_codename}'")
         
-        node_exist = await self.nodes_collection.find_one({"node_codename": node_codename})
+        node_exist = await self._get_node(node_codename)
 
         if node_exist:
             logger.db_warning(f"Repository: Node '{node_codename}' already exists")
@@ -68,10 +139,20 @@ class NodeRepository:
             "latest_updated": now,
             "firmware_url": None,
             "firmware_version": None,
+            "firmware_version_key": None,
         })
 
-        result = await self.nodes_collection.insert_one(doc)
+        try:
+            result = await self.nodes_collection.insert_one(doc)
+        except DuplicateKeyError:
+            # Another request registered the same codename in the meantime
+            self.identity_map.forget("nodes", node_codename)
+            logger.db_warning(f"Repository: Node '{node_codename}' already exists")
+            return None
         doc["_id"] = result.inserted_id
+        # Replaces the "not found" remembered by the existence check above
+        self.identity_map.set("nodes", node_codename, doc)
+        node_facets.add(doc)
 
         logger.db_info(f"Repository: Node '{node_codename}' added with ID: {result.inserted_id}")
         return NodeModel(**doc)
@@ -89,12 +170,14 @@ class NodeRepository:
         """
         logger.db_info(f"Repository: Upserting firmware '{firmware_version}' for node '{node_codename}'")
         
-        # Get existing node
-        node = await self.nodes_collection.find_one({"node_codename": node_codename})
-        now = get_current_datetime()
+        # Get existing node, usually already read by the service check
+        node = await self._get_node(node_codename)
+        if not node:
+            logger.db_warning(f"Repository: Node '{node_codename}' not found")
+            return None
 
         # Check if this firmware version already exists for the specific node
-        version_exist = await self.nodes_collection.find_one({
+        version_exist = await self.firmware_collection.find_one({
             "node_codename": node_codename,
             "firmware_version": firmware_version
         })
@@ -105,6 +188,7 @@ class NodeRepository:
 
         # Determine final firmware URL
         final_firmware_url = firmware_url
+        uploaded_file_id = None
         
         # If file is provided, upload to Google Drive and get URL
         if firmware_file:
@@ -119,66 +203,86 @@ class NodeRepository:
                 return None
             
             final_firmware_url = upload_result['download_url']
+            uploaded_file_id = upload_result['file_id']
             logger.db_info(f"Repository: Firmware uploaded to Google Drive: {upload_result['filename']}")
 
-        # If node exists and has no firmware version, update with the first firmware version
-        if node and (not node.get("firmware_url") and not node.get("firmware_version")):
-            # Update existing node with first firmware
-            result = await self.nodes_collection.find_one_and_update(
-                {"node_codename": node_codename},
-                {"$set": {
-                    "firmware_url": final_firmware_url,
-                    "firmware_version": firmware_version,
-                    "latest_updated": now
-                }},
-                return_document=True
-            )
+        now = get_current_datetime()
+        version_key = get_version_key(firmware_version)
+        firmware_doc = {
+            "node_codename": node_codename,
+            "firmware_version": firmware_version,
+            "firmware_version_key": version_key,
+            "firmware_url": final_firmware_url,
+            "description": node.get("description"),
+            "created_at": now,
+            "latest_updated": now,
+        }
 
-            logger.db_info(f"Repository: Updated existing node '{node_codename}' with first firmware version '{firmware_version}'")
-            return NodeModel(**result) if result else None
-        # If node exists and has firmware version, create a new firmware version
-        else:
-            # Create new node document with same codename but new firmware
-            new_doc = node.copy() if node else {}
-            new_doc.update({
+        try:
+            result = await self.firmware_collection.insert_one(firmware_doc)
+        except DuplicateKeyError:
+            logger.db_warning(f"Repository: Firmware version '{firmware_version}' already exists for node '{node_codename}'")
+            # Another request saved the same version in the meantime, the file uploaded above is not referenced
+            if uploaded_file_id and not await asyncio.to_thread(delete_firmware_from_gdrive, uploaded_file_id):
+                logger.db_warning(f"Repository: Failed to delete Google Drive file with ID: {uploaded_file_id}")
+            return None
+        firmware_doc["_id"] = result.inserted_id
+
+        # Move the registry pointer only if the new version is newer than the current latest
+        updated_node = await self.nodes_collection.find_one_and_update(
+            {
+                "node_codename": node_codename,
+                "$or": [
+                    {"firmware_version_key": None},
+                    {"firmware_version_key": {"$lt": version_key}}
+                ]
+            },
+            {"$set": {
                 "firmware_url": final_firmware_url,
                 "firmware_version": firmware_version,
-                "latest_updated": now,
-                "created_at": now,
-            })
-
-            new_doc.pop("_id", None)
-            result = await self.nodes_collection.insert_one(new_doc)
-            new_doc["_id"] = result.inserted_id
+                "firmware_version_key": version_key,
+                "latest_updated": now
+            }},
+            return_document=True
+        )
+        if updated_node:
+            node = updated_node
+            self.identity_map.set("nodes", node_codename, updated_node)
+            logger.db_info(f"Repository: Node '{node_codename}' now points to latest firmware version '{firmware_version}'")
 
-            logger.db_info(f"Repository: Created new firmware version '{firmware_version}' for node '{node_codename}' with ID: {result.inserted_id}")
-            return NodeModel(**new_doc) if new_doc else None
+        logger.db_info(f"Repository: Created new firmware version '{firmware_version}' for node '{node_codename}' with ID: {result.inserted_id}")
+        return self._compose_node(node, firmware_doc)
     
     async def get_firmware_download_info(self, node_codename: str, firmware_version: str = None) -> Optional[dict]:
         """
         Get firmware download information for a specific node and version.
-        This method looks correct - it handles both specific version and latest version scenarios.
+        The latest version is read from the registry pointer, a specific one from firmware_versions.
         """
         logger.db_info(f"Repository: Getting firmware download info for node '{node_codename}' version '{firmware_version}'")
         
-        query = {"node_codename": node_codename}
-        if firmware_version:
-            query["firmware_version"] = firmware_version
-        
+        # Only the fields returned below are fetched
+        projection = {
+            "_id": 0,
+            "node_codename": 1,
+            "firmware_version": 1,
+            "firmware_url": 1,
+            "description": 1,
+            "created_at": 1,
+            "latest_updated": 1
+        }
         if firmware_version:
-            doc = await self.nodes_collection.find_one(query)
+            doc = await self.firmware_collection.find_one({
+                "node_codename": node_codename,
+                "firmware_version": firmware_version
+            }, projection)
+        elif self.identity_map.contains("nodes", node_codename):
+            # Latest version, the registry document was already read by this request
+            doc = self.identity_map.get("nodes", node_codename)
         else:
-            # Get latest version
-            doc = await (
-                self.nodes_collection
-                .find(query)
-                .sort("firmware_version", DESCENDING)
-                .limit(1)
-                .to_list(length=1)
-            )
-            doc = doc[0] if doc else None
+            # Latest version, read from the registry pointer
+            doc = await self.nodes_collection.find_one({"node_codename": node_codename}, projection)
         
-        if not doc:
+        if not doc or not doc.get('firmware_version'):
             logger.db_warning(f"Repository: No firmware found for node '{node_codename}' version '{firmware_version}'")
             return None
         
@@ -205,11 +309,9 @@ class NodeRepository:
         logger.db_info(f"Repository: Updating description for node '{node_codename}' - Version: '{firmware_version}'")
 
         now = get_current_datetime()
-        filter_query = {"node_codename": node_codename}
         if firmware_version:
-            filter_query["firmware_version"] = firmware_version
-            result = await self.nodes_collection.find_one_and_update(
-                filter_query,
+            result = await self.firmware_collection.find_one_and_update(
+                {"node_codename": node_codename, "firmware_version": firmware_version},
                 {"$set": {"description": description, "latest_updated": now}},
                 return_document=True
             )
@@ -217,25 +319,47 @@ class NodeRepository:
                 logger.db_warning(f"Repository: No node found for update - Codename: '{node_codename}', Version: '{firmware_version}'")
                 return None
 
+            # Keep the registry in sync when the latest version is the one being edited
+            node = await self.nodes_collection.find_one_and_update(
+                {"node_codename": node_codename, "firmware_version": firmware_version},
+                {"$set": {"description": description, "latest_updated": now}},
+                return_document=True
+            )
+            if not node:
+                node = await self._get_node(node_codename)
+            if not node:
+                logger.db_warning(f"Repository: No node found for update - Codename: '{node_codename}'")
+                return None
+
             logger.db_info(f"Repository: Description updated for node '{node_codename}' version '{firmware_version}'")
-            return NodeModel(**result)
+            self.identity_map.set("nodes", node_codename, node)
+            return self._compose_node(node, result)
         else:
-            update_result = await self.nodes_collection.update_many(
-                filter_query,
-                {"$set": {"description": description, "latest_updated": now}}
+            node = await self.nodes_collection.find_one_and_update(
+                {"node_codename": node_codename},
+                {"$set": {"description": description, "latest_updated": now}},
+                return_document=True
             )
-            if update_result.modified_count == 0:
+            if not node:
                 logger.db_warning(f"Repository: No nodes updated for codename '{node_codename}'")
+                self.identity_map.set("nodes", node_codename, None)
                 return None
+            self.identity_map.set("nodes", node_codename, node)
 
-            # Optionally, return the first updated node
-            doc = await self.nodes_collection.find_one(filter_query)
-            logger.db_info(f"Repository: Description updated for {update_result.modified_count} node(s) with codename '{node_codename}'")
-            return NodeModel(**doc) if doc else None
+            update_result = await self.firmware_collection.update_many(
+                {"node_codename": node_codename},
+                {"$set": {"description": description, "latest_updated": now}}
+            )
+            logger.db_info(f"Repository: Description updated for node '{node_codename}' and {update_result.modified_count} firmware version(s)")
+            return NodeModel.from_db(node)
 
     async def delete_node(self, node_codename: str, firmware_version: Optional[str]) -> int:
         """
         Delete node(s) and associated Google Drive files.
+
+            - If firmware_version is provided, only that version is deleted and the
+              registry pointer moves to the highest remaining version.
+            - Otherwise the node is removed from the registry with all its versions.
         """
         logger.db_info(f"Repository: Deleting node '{node_codename}' - Version: '{firmware_version}'")
 
@@ -244,22 +368,25 @@ class NodeRepository:
         if firmware_version:
             query["firmware_version"] = firmware_version
 
-        docs_to_delete = await self.nodes_collection.find(query).to_list(length=None)
-        
-        if not docs_to_delete:
-            logger.db_warning(f"Repository: No documents found to delete for '{node_codename}' version '{firmware_version}'")
-            return 0
+        docs_to_delete = await self.firmware_collection.find(query, {"firmware_url": 1}).to_list(length=None)
 
         # First, delete from MongoDB to ensure data consistency
         if firmware_version:
-            result = await self.nodes_collection.delete_one({
-                "node_codename": node_codename,
-                "firmware_version": firmware_version
-            })
-            logger.db_info(f"Repository: Deleted {result.deleted_count} node(s) for '{node_codename}' version '{firmware_version}'")
+            if not docs_to_delete:
+                logger.db_warning(f"Repository: No documents found to delete for '{node_codename}' version '{firmware_version}'")
+                return 0
+
+            result = await self.firmware_collection.delete_one(query)
+            deleted_count = result.deleted_count
+            await self._refresh_latest_pointer(node_codename)
+            logger.db_info(f"Repository: Deleted {deleted_count} firmware version(s) for '{node_codename}' version '{firmware_version}'")
         else:
-            result = await self.nodes_collection.delete_many({"node_codename": node_codename})
-            logger.db_info(f"Repository: Deleted {result.deleted_count} node(s) for '{node_codename}' (all versions)")
+            node_result = await self.nodes_collection.delete_one({"node_codename": node_codename})
+            self.identity_map.set("nodes", node_codename, None)
+            versions_result = await self.firmware_collection.delete_many({"node_codename": node_codename})
+            deleted_count = node_result.deleted_count + versions_result.deleted_count
+            node_facets.invalidate()
+            logger.db_info(f"Repository: Deleted node '{node_codename}' and {versions_result.deleted_count} firmware version(s)")
 
         # Then delete Google Drive files (even if some fail, we've already removed the DB records)
         gdrive_deletion_success = True
@@ -268,7 +395,7 @@ class NodeRepository:
             if firmware_url:
                 file_id = self._extract_file_id_from_gdrive_url(firmware_url)
                 if file_id:
-                    deletion_success = delete_firmware_from_gdrive(file_id)
+                    deletion_success = await asyncio.to_thread(delete_firmware_from_gdrive, file_id)
                     if not deletion_success:
                         logger.db_warning(f"Repository: Failed to delete Google Drive file with ID: {file_id}")
                         gdrive_deletion_success = False
@@ -281,44 +408,99 @@ class NodeRepository:
         else:
             logger.db_info(f"Repository: Successfully deleted both MongoDB records and Google Drive files")
 
-        return result.deleted_count
+        return deleted_count
+
+    async def delete_firmware_versions(
+        self,
+        node_filters: Dict[str, Any],
+        firmware_versions: Optional[List[str]] = None
+    ) -> Tuple[int, List[str]]:
+        """
+        Delete in batches the firmware versions of the nodes matching `node_filters`
+        (only `firmware_versions` if provided). The Google Drive files are not deleted here.
+
+        Returns:
+            The number of deleted versions and the Google Drive file IDs of their firmware
+        """
+        logger.db_info(f"Repository: Bulk deleting firmware versions - Node filters: {node_filters}, Versions: {firmware_versions}")
+
+        query: Dict[str, Any] = {}
+        if node_filters:
+            node_codenames = await self.nodes_collection.distinct("node_codename", node_filters)
+            query["node_codename"] = {"$in": node_codenames}
+        if firmware_versions:
+            query["firmware_version"] = {"$in": firmware_versions}
+
+        affected_codenames: set = set()
+        file_ids: List[str] = []
+
+        def _collect(documents: List[Dict[str, Any]]) -> None:
+            for doc in documents:
+                affected_codenames.add(doc["node_codename"])
+                file_id = self._extract_file_id_from_gdrive_url(doc.get("firmware_url") or "")
+                if file_id:
+                    file_ids.append(file_id)
+
+        deleted = await delete_in_batches(
+            self.firmware_collection,
+            query,
+            projection={"node_codename": 1, "firmware_url": 1},
+            on_batch=_collect
+        )
+
+        # Registry entries point to their highest remaining version
+        await asyncio.gather(*(self._refresh_latest_pointer(codename) for codename in affected_codenames))
+
+        logger.db_info(f"Repository: Bulk deleted {deleted} firmware version(s) of {len(affected_codenames)} node(s)")
+        return deleted, file_ids
 
     async def get_all_nodes(
         self,
         filters: Dict[str, Any],
         skip: int = 0,
-        limit: int = 10
+        limit: int = 10,
+        after: Optional[Cursor] = None
     ) -> List[NodeModel]:
-        logger.db_info(f"Repository: Retrieving nodes - Skip: {skip}, Limit: {limit}, Filters: {filters}")
+        """
+        Retrieve nodes sorted by the most recently updated first.
+        If `after` is provided, keyset pagination is used and `skip` is ignored.
+        """
+        logger.db_info(f"Repository: Retrieving nodes - Skip: {skip}, Limit: {limit}, Filters: {filters}, After: {after}")
 
         try:
-            # Use aggregation pipeline to get the latest version of each node
-            pipeline = [
-                # Match documents based on filters
-                {"$match": filters or {}},
-                # Sort by firmware_version in descending order within each node_codename group
-                {"$sort": {"node_codename": 1, "firmware_version": DESCENDING}},
-                # Group by node_codename and keep the first document (latest version)
-                {"$group": {
-                    "_id": "$node_codename",
-                    "doc": {"$first": "$$ROOT"}
-                }},
-                # Replace the root with the document from the group stage
-                {"$replaceRoot": {"newRoot": "$doc"}},
-                # Sort by latest_updated to show recently modified nodes first
-                {"$sort": {"latest_updated": DESCENDING}},
-                # Apply pagination
-                {"$skip": skip},
-                {"$limit": limit}
-            ]
-            
-            nodes = await self.nodes_collection.aggregate(pipeline).to_list(length=limit)
+            # The registry already holds the latest version of each node
+            cursor = (
+                self.nodes_read_collection
+                .find(build_keyset_filter(filters, "latest_updated", after))
+                .sort([("latest_updated", DESCENDING), ("_id", DESCENDING)])
+                .skip(0 if after else skip)
+                .limit(limit)
+            )
+            nodes = await cursor.to_list(length=limit)
             logger.db_info(f"Repository: Retrieved {len(nodes)} unique nodes (latest versions) from database")
-            return [NodeModel(**node) for node in nodes]
+            return [NodeModel.from_db(node) for node in nodes]
         except Exception as e:
             logger.db_error("Repository: Failed to retrieve nodes", e)
             return []
 
+    async def get_nodes_page(
+        self,
+        filters: Dict[str, Any],
+        skip: int = 0,
+        limit: int = 10,
+        after: Optional[Cursor] = None
+    ) -> Tuple[List[NodeModel], int, BaseFilterOptions]:
+        """
+        Retrieve a page of nodes, the total count and the filter options in one go.
+        The three queries are independent, so they run concurrently on the connection pool.
+        """
+        nodes, total, filter_options = await asyncio.gather(
+            self.get_all_nodes(filters, skip, limit, after=after),
+            self.count_nodes(filters),
+            self.get_filter_options()
+        )
+        return nodes, total, filter_options
+
     async def get_detail_node(
         self,
         node_codename: str,
@@ -333,32 +515,37 @@ class NodeRepository:
         """
         logger.db_info(f"Repository: Getting node details - Codename: '{node_codename}', Version: '{firmware_version}'")
 
-        query = {"node_codename": node_codename}
-        if firmware_version:
-            # If firmware_version is provided, filter by it
-            query["firmware_version"] = firmware_version
-            doc = await self.nodes_collection.find_one(query)
-        else:
-            # Get the latest firmware_version for this node_codename
-            doc = await (
-                self.nodes_collection
-                .find(query)
-                .sort("firmware_version", DESCENDING)
-                .limit(1)
-                .to_list(length=1)
-            )
-            doc = doc[0] if doc else None
+        node = await self._get_node(node_codename)
+        result = None
+        if node and firmware_version:
+            # If firmware_version is provided, combine the registry with that version
+            firmware = await self.firmware_collection.find_one({
+                "node_codename": node_codename,
+                "firmware_version": firmware_version
+            })
+            result = self._compose_node(node, firmware) if firmware else None
+        elif node:
+            # The registry points to the latest firmware_version for this node_codename
+            result = NodeModel.from_db(node)
 
-        if doc:
+        if result:
             logger.db_info(f"Repository: Node details found for '{node_codename}'")
         else:
             logger.db_warning(f"Repository: No node details found for '{node_codename}' with version '{firmware_version}'")
             
-        return NodeModel(**doc) if doc else None
+        return result
 
     async def get_node_by_codename(self, node_codename: str) -> bool:
         logger.db_info(f"Repository: Checking if node '{node_codename}' exists")
-        doc = await self.nodes_collection.find_one({"node_codename": node_codename})
+        if self.identity_map.contains("nodes", node_codename):
+            # Shares the registry document with the other lookups of the request
+            doc = self.identity_map.get("nodes", node_codename)
+        else:
+            # Covered by the `node_codename_unique` index, no document is fetched
+            doc = await self.nodes_collection.find_one(
+                {"node_codename": node_codename},
+                {"_id": 0, "node_codename": 1}
+            )
         exists = True if doc else False
         logger.db_info(f"Repository: Node '{node_codename}' exists: {exists}")
         return exists
@@ -366,10 +553,11 @@ class NodeRepository:
     async def get_firmware_versions(self, node_codename: str) -> Optional[List[str]]:
         logger.db_info(f"Repository: Getting firmware versions for node '{node_codename}'")
         
+        # Covered by the `node_codename_firmware_version_key_desc` index
         docs = await (
-            self.nodes_collection
-            .find({"node_codename": node_codename})
-            .sort("firmware_version", DESCENDING)
+            self.firmware_collection
+            .find({"node_codename": node_codename}, {"_id": 0, "firmware_version": 1})
+            .sort("firmware_version_key", DESCENDING)
             .to_list(length=100)
         )
 
@@ -380,18 +568,7 @@ class NodeRepository:
     async def count_nodes(self, filters: Dict[str, Any]) -> int:
         logger.db_info(f"Repository: Counting unique nodes with filters: {filters}")
         try:
-            # Use aggregation to count unique node_codenames that match the filters
-            pipeline = [
-                {"$match": filters or {}},
-                {"$group": {
-                    "_id": "$node_codename"
-                }},
-                {"$count": "total"}
-            ]
-            
-            result = await self.nodes_collection.aggregate(pipeline).to_list(length=1)
-            count = result[0]["total"] if result else 0
-            
+            count = await self.nodes_read_collection.count_documents(filters or {})
             logger.db_info(f"Repository: Total unique nodes count: {count}")
             return count
         except Exception as e:
@@ -401,32 +578,11 @@ class NodeRepository:
     async def get_filter_options(self) -> BaseFilterOptions:
         logger.db_info("Repository: Getting filter options")
         try:
-            pipeline = [
-                {"$group": {
-                    "_id": None,
-                    "node_location": {"$addToSet": "$node_location"},
-                    "node_type": {"$addToSet": "$node_type"}
-                }},
-                {"$project": {
-                    "_id": 0,
-                    "node_location": 1,
-                    "node_type": 1
-                }}
-            ]
-
-            result = await self.nodes_collection.aggregate(pipeline).to_list(length=1)
-
-            if result:
-                filter_options = BaseFilterOptions(
-                    node_locations=result[0].get("node_location", []),
-                    node_types=result[0].get("node_type", [])
-                )
-            else:
-                filter_options = BaseFilterOptions(
-                    node_locations=[],
-                    node_types=[]
-                )
-            
+            facets = await node_facets.get(self.nodes_collection)
+            filter_options = BaseFilterOptions(
+                node_locations=facets["node_locations"],
+                node_types=facets["node_types"]
+            )
             logger.db_info("Repository: Filter options retrieved successfully")
             return filter_options
         except Exception as e:
@@ -434,4 +590,4 @@ class NodeRepository:
             return BaseFilterOptions(
                 node_locations=[],
                 node_types=[]
-            )
\ No newline at end of file
+            )
@@ -0,0 +1,106 @@
+from fastapi import Depends
+from typing import Any, Dict, List, Literal, Optional
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from enums.log import LogStatus
+from models.log import LogModel
+from models.locallog import LocalLogModel
+from cores.database import ANALYTICS_READ_PREFERENCE
+from cores.dependencies import get_ota_daily_stats_collection
+from repositories.metrics import MetricSource
+from utils.stats import STATS_METRIC_FIELDS, build_stats_update
+from utils.logger import logger
+
+StatsGroupBy = Literal["day", "node_codename", "node_location", "node_type"]
+
+
+class StatsRepository:
+    def __init__(
+        self,
+        stats_collection: AsyncIOMotorCollection = Depends(get_ota_daily_stats_collection)
+    ):
+        self.stats_collection = stats_collection
+        # Reports are analytics, they may be served by secondaries
+        self.stats_read_collection = stats_collection.with_options(read_preference=ANALYTICS_READ_PREFERENCE)
+
+    async def record_completed_logs(self, logs: List[LogModel | LocalLogModel], source: MetricSource) -> int:
+        """
+        Add finished OTA sessions to their daily rollups with one bulk write.
+        Returns the number of updated rollups, raises if the write failed.
+        """
+        if not logs:
+            return 0
+
+        operations = [
+            UpdateOne(*build_stats_update(log.model_dump(), source), upsert=True)
+            for log in logs
+        ]
+        try:
+            result = await self.stats_collection.bulk_write(operations, ordered=False)
+            logger.db_info(f"Repository: Updated {result.modified_count + result.upserted_count} '{source}' daily OTA stat(s)")
+            return result.modified_count + result.upserted_count
+        except Exception as e:
+            logger.db_error(f"Repository: Failed to update '{source}' daily OTA stats", e)
+            raise
+
+    async def get_stats(
+        self,
+        start_day: str,
+        end_day: str,
+        group_by: StatsGroupBy = "day",
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Sum the daily rollups between `start_day` and `end_day` (YYYY-MM-DD, inclusive) per `group_by`.
+        """
+        logger.db_info(f"Repository: Getting OTA stats - Range: {start_day} - {end_day}, Group by: {group_by}, Filters: {filters}")
+
+        group: Dict[str, Any] = {
+            "_id": f"${group_by}",
+            "sessions": {"$sum": "$sessions"},
+        }
+        for status in LogStatus:
+            # Status values may contain spaces, they're fine as field names but not as group keys
+            group[f"count_{status.name.lower()}"] = {"$sum": f"$counts.{status.value}"}
+        for field in STATS_METRIC_FIELDS:
+            group[f"{field}_sum"] = {"$sum": f"$metrics.{field}.sum"}
+            group[f"{field}_count"] = {"$sum": f"$metrics.{field}.count"}
+            group[f"{field}_min"] = {"$min": f"$metrics.{field}.min"}
+            group[f"{field}_max"] = {"$max": f"$metrics.{field}.max"}
+
+        pipeline = [
+            {"$match": {"day": {"$gte": start_day, "$lte": end_day}, **(filters or {})}},
+            {"$group": group},
+            {"$sort": {"_id": 1}},
+        ]
+
+        try:
+            groups = await self.stats_read_collection.aggregate(pipeline).to_list(length=None)
+        except Exception as e:
+            logger.db_error("Repository: Failed to get OTA stats", e)
+            return []
+
+        result = []
+        for row in groups:
+            stats: Dict[str, Any] = {
+                "key": row["_id"],
+                "sessions": row["sessions"],
+                "counts": {status.value: row[f"count_{status.name.lower()}"] for status in LogStatus},
+                "metrics": {},
+            }
+            success = stats["counts"][LogStatus.SUCCESS.value]
+            stats["success_rate"] = round(success / row["sessions"], 4) if row["sessions"] else None
+            for field in STATS_METRIC_FIELDS:
+                count = row[f"{field}_count"]
+                stats["metrics"][field] = {
+                    "avg": row[f"{field}_sum"] / count if count else None,
+                    "min": row[f"{field}_min"],
+                    "max": row[f"{field}_max"],
+                    "total": row[f"{field}_sum"],
+                    "count": count,
+                }
+            result.append(stats)
+
+        logger.db_info(f"Repository: Retrieved {len(result)} OTA stat group(s)")
+        return result
@@ -5,17 +5,22 @@ from fastapi import (
     Depends,
     Query,
     Path,
+    Body,
 )
+from datetime import datetime
 from typing import Optional, Dict, Any
 
 from fastapi.responses import StreamingResponse
 
 from enums.locallog import LocalLogStatus
-from schemas.locallog import LocalLogDataResponse, SingleLocalLogResponse
+from schemas.locallog import LocalLogDataResponse, SingleLocalLogResponse, LocalLogBulkDeleteSchema
+from schemas.common import BulkDeleteResponse, BulkDeleteResult
 from services.locallog import LocalLogService
 from cores.dependencies import get_current_user
-from utils.datetime import get_current_datetime
+from cores.responses import ModelResponse
+from utils.datetime import get_current_datetime, localize_datetime
 from utils.logger import logger
+from utils.cursor import get_next_cursor
 
 router_locallog = APIRouter()
 
@@ -24,9 +29,12 @@ async def get_all_logs(
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=10, ge=1, le=100),
     flash_status: Optional[LocalLogStatus] = Query(default=None, min_length=3, max_length=255),
+    after: Optional[str] = Query(default=None, description="Cursor from `next_cursor`, replaces `page` when set"),
+    start_date: Optional[datetime] = Query(default=None, description="Oldest `created_at`, archived logs are included when it is past the retention window"),
+    end_date: Optional[datetime] = Query(default=None, description="Newest `created_at`"),
     service: LocalLogService = Depends(),
     current_user: dict = Depends(get_current_user)
-) -> LocalLogDataResponse:
+) -> ModelResponse:
     filters: Dict[str, Any] = {}
 
     if flash_status:
@@ -35,23 +43,29 @@ async def get_all_logs(
     logger.api_info(f"Retrieving logs - Page: {page}, Size: {page_size}, Filters: {filters}")
 
     skip = (page - 1) * page_size
-    total_data = await service.count_logs(filters)
+    logs, total_data, filter_options = await service.get_logs_page(
+        filters=filters,
+        skip=skip,
+        limit=page_size,
+        after=after,
+        start_date=localize_datetime(start_date),
+        end_date=localize_datetime(end_date)
+    )
     total_page = (total_data + page_size - 1) // page_size
-    logs = await service.get_all_logs(filters=filters, skip=skip, limit=page_size)
-    filter_options = await service.get_filter_options()
     
     logger.api_info(f"Successfully retrieved {len(logs)} logs out of {total_data} total - Page {page}/{total_page}")
     
-    return LocalLogDataResponse(
+    return ModelResponse(LocalLogDataResponse(
         message="List of logs retrieved successfully",
         status_code=status.HTTP_200_OK,
         page=page,
         page_size=page_size,
         total_data=total_data,
         total_page=total_page,
+        next_cursor=get_next_cursor(logs, "created_at", page_size),
         filter_options=filter_options,
         data=logs
-    )
+    ))
 
 @router_locallog.get(
     path="/detail/{session_id}",
@@ -61,7 +75,7 @@ async def get_detail_log(
     session_id: str = Path(..., max_length=15),
     service: LocalLogService = Depends(),
     current_user: dict = Depends(get_current_user)
-) -> SingleLocalLogResponse:
+) -> ModelResponse:
     logger.api_info(f"Retrieving log details for session id '{session_id}'")
 
     log = await service.get_detail_log(session_id=session_id)
@@ -71,11 +85,11 @@ async def get_detail_log(
     else:
         logger.api_error(f"No log found for session id '{session_id}'")
 
-    return SingleLocalLogResponse(
+    return ModelResponse(SingleLocalLogResponse(
         message="Log details retrieved successfully",
         status_code=status.HTTP_200_OK,
         data=log
-    )
+    ))
 
 @router_locallog.delete(
     path="/delete/{session_id}",
@@ -94,6 +108,23 @@ async def delete_log(
     logger.api_info(f"Successfully deleted logs for session id '{session_id}'")
     return Response(status_code=status.HTTP_204_NO_CONTENT, content=None)
 
+@router_locallog.post(path="/delete-bulk", response_model=BulkDeleteResponse)
+async def bulk_delete_logs(
+    data: LocalLogBulkDeleteSchema = Body(...),
+    service: LocalLogService = Depends(),
+    current_user: dict = Depends(get_current_user)
+) -> BulkDeleteResponse:
+    logger.api_info("Bulk deleting logs", data.model_dump(mode="json", exclude_none=True))
+
+    deleted_count = await service.bulk_delete_logs(data)
+
+    logger.api_info(f"Successfully bulk deleted {deleted_count} log(s)")
+    return BulkDeleteResponse(
+        message="Logs deleted successfully",
+        status_code=status.HTTP_200_OK,
+        data=BulkDeleteResult(deleted_count=deleted_count)
+    )
+
 @router_locallog.get(
     path="/export",
     response_class=StreamingResponse
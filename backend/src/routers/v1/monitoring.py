@@ -1,12 +1,18 @@
 from fastapi import (
     APIRouter,
     status,
-    Depends
+    Depends,
+    Query
 )
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
 
-from schemas.monitoring import ListNodeResponse
+from repositories.metrics import MetricBucket, MetricSource
+from repositories.stats import StatsGroupBy
+from schemas.monitoring import ListNodeResponse, QoSMetricsResponse, OTAStatsResponse, IngestionMetricsResponse
 from services.monitoring import MonitoringService
 from cores.dependencies import get_current_user
+from utils.datetime import get_current_datetime, localize_datetime
 from utils.logger import logger
 
 router_monitoring = APIRouter()
@@ -27,4 +33,95 @@ async def get_list_nodes(
         message="List of nodes retrieved successfully",
         status_code=status.HTTP_200_OK,
         data=nodes
-    )
\ No newline at end of file
+    )
+
+@router_monitoring.get(path="/qos", response_model=QoSMetricsResponse)
+async def get_qos_metrics(
+    start_date: Optional[datetime] = Query(default=None, description="Defaults to 7 days before `end_date`"),
+    end_date: Optional[datetime] = Query(default=None, description="Defaults to now"),
+    bucket: MetricBucket = Query(default="day"),
+    source: Optional[MetricSource] = Query(default=None, description="cloud (OTA logs) or local (local OTA logs)"),
+    node_codename: Optional[str] = Query(default=None, min_length=3, max_length=255),
+    node_location: Optional[str] = Query(default=None, min_length=3, max_length=255),
+    node_type: Optional[str] = Query(default=None, min_length=3, max_length=255),
+    service: MonitoringService = Depends(),
+    current_user: dict = Depends(get_current_user)
+) -> QoSMetricsResponse:
+    end_date = localize_datetime(end_date) or get_current_datetime()
+    start_date = localize_datetime(start_date) or end_date - timedelta(days=7)
+
+    meta_filters: Dict[str, Any] = {}
+    if source:
+        meta_filters["source"] = source
+    if node_codename:
+        meta_filters["node_codename"] = node_codename
+    if node_location:
+        meta_filters["node_location"] = node_location
+    if node_type:
+        meta_filters["node_type"] = node_type
+
+    logger.api_info(f"Getting QoS metrics - Range: {start_date} - {end_date}, Bucket: {bucket}, Filters: {meta_filters}")
+
+    metrics = await service.get_qos_metrics(start_date, end_date, bucket, meta_filters)
+
+    logger.api_info(f"Successfully retrieved {len(metrics)} QoS metric bucket(s)")
+
+    return QoSMetricsResponse(
+        message="QoS metrics retrieved successfully",
+        status_code=status.HTTP_200_OK,
+        data=metrics
+    )
+
+@router_monitoring.get(path="/stats", response_model=OTAStatsResponse)
+async def get_ota_stats(
+    start_date: Optional[date] = Query(default=None, description="Defaults to 30 days before `end_date`"),
+    end_date: Optional[date] = Query(default=None, description="Defaults to today"),
+    group_by: StatsGroupBy = Query(default="day"),
+    source: Optional[MetricSource] = Query(default=None, description="cloud (OTA logs) or local (local OTA logs)"),
+    node_codename: Optional[str] = Query(default=None, min_length=3, max_length=255),
+    node_location: Optional[str] = Query(default=None, min_length=3, max_length=255),
+    node_type: Optional[str] = Query(default=None, min_length=3, max_length=255),
+    service: MonitoringService = Depends(),
+    current_user: dict = Depends(get_current_user)
+) -> OTAStatsResponse:
+    end_date = end_date or get_current_datetime().date()
+    start_date = start_date or end_date - timedelta(days=30)
+
+    filters: Dict[str, Any] = {}
+    if source:
+        filters["source"] = source
+    if node_codename:
+        filters["node_codename"] = node_codename
+    if node_location:
+        filters["node_location"] = node_location
+    if node_type:
+        filters["node_type"] = node_type
+
+    logger.api_info(f"Getting OTA stats - Range: {start_date} - {end_date}, Group by: {group_by}, Filters: {filters}")
+
+    stats = await service.get_ota_stats(start_date, end_date, group_by, filters)
+
+    logger.api_info(f"Successfully retrieved {len(stats)} OTA stat group(s)")
+
+    return OTAStatsResponse(
+        message="OTA stats retrieved successfully",
+        status_code=status.HTTP_200_OK,
+        data=stats
+    )
+
+@router_monitoring.get(path="/ingestion", response_model=IngestionMetricsResponse)
+async def get_ingestion_metrics(
+    service: MonitoringService = Depends(),
+    current_user: dict = Depends(get_current_user)
+) -> IngestionMetricsResponse:
+    logger.api_info("Getting MQTT ingestion queue metrics")
+
+    metrics = service.get_ingestion_metrics()
+
+    logger.api_info(f"Successfully retrieved MQTT ingestion metrics - Depth: {metrics['depth']}, Dropped: {metrics['dropped']}")
+
+    return IngestionMetricsResponse(
+        message="Ingestion metrics retrieved successfully",
+        status_code=status.HTTP_200_OK,
+        data=metrics
+    )
@@ -8,7 +8,8 @@ from fastapi import (
     Depends,
     Query,
     Path,
-    Body
+    Body,
+    BackgroundTasks
 )
 from typing import Optional, Dict, Any
 
@@ -20,10 +21,19 @@ from schemas.node import (
     NodeModifyVersionSchema,
     NodeResponse,
     SingleNodeResponse,
-    FirmwareVersionListResponse
+    FirmwareVersionListResponse,
+    FirmwareBulkDeleteSchema
+)
+from schemas.common import (
+    BulkDeleteResponse,
+    BulkDeleteResult,
+    JobProgress,
+    JobProgressResponse
 )
 from cores.dependencies import get_current_user
+from cores.responses import ModelResponse
 from utils.logger import logger
+from utils.cursor import get_next_cursor
 
 router_node = APIRouter()
 
@@ -117,9 +127,10 @@ async def get_all_nodes(
     page_size: int = Query(default=10, ge=1, le=100),
     node_location: Optional[str] = Query(default=None, min_length=3, max_length=255),
     node_type: Optional[str] = Query(default=None, min_length=3, max_length=255),
+    after: Optional[str] = Query(default=None, description="Cursor from `next_cursor`, replaces `page` when set"),
     service: NodeService = Depends(),
     current_user: dict = Depends(get_current_user)
-) -> NodeResponse:
+) -> ModelResponse:
     filters: Dict[str, Any] = {}
 
     if node_location:
@@ -129,21 +140,20 @@ async def get_all_nodes(
 
     logger.api_info(f"Retrieving nodes - Page: {page}, Filters: {filters}")
     skip = (page - 1) * page_size
-    nodes = await service.get_all_nodes(filters, skip, page_size)
-    total = await service.count_nodes(filters)
-    filter_options = await service.get_filter_options()
+    nodes, total, filter_options = await service.get_nodes_page(filters, skip, page_size, after=after)
 
     logger.api_info(f"Retrieved {len(nodes)} nodes out of {total} total")
-    return NodeResponse(
+    return ModelResponse(NodeResponse(
         message="List of nodes retrieved successfully",
         status_code=status.HTTP_200_OK,
         page=page,
         page_size=page_size,
         total_data=total,
         total_page=(total + page_size - 1) // page_size,
+        next_cursor=get_next_cursor(nodes, "latest_updated", page_size),
         filter_options=filter_options,
         data=nodes
-    )
+    ))
 
 @router_node.get(path="/detail/{node_codename}", response_model=SingleNodeResponse)
 async def get_detail_node(
@@ -151,15 +161,15 @@ async def get_detail_node(
     firmware_version: Optional[str] = Query(default=None, min_length=3, max_length=10),
     service: NodeService = Depends(),
     current_user: dict = Depends(get_current_user)
-) -> SingleNodeResponse:
+) -> ModelResponse:
     logger.api_info(f"Retrieving node details - Codename: '{node_codename}', Version: '{firmware_version}'")
     node = await service.get_detail_node(node_codename, firmware_version)
     logger.api_info(f"Node details retrieved - Codename: '{node_codename}'")
-    return SingleNodeResponse(
+    return ModelResponse(SingleNodeResponse(
         message="Detail node retrieved successfully",
         status_code=status.HTTP_200_OK,
         data=node
-    )
+    ))
 
 @router_node.get(path="/version/{node_codename}", response_model=FirmwareVersionListResponse)
 async def get_firmware_versions(
@@ -190,4 +200,41 @@ async def delete_node(
     logger.api_info(f"Deleting node '{node_codename}' - Version: '{firmware_version}'")
     await service.delete_node(node_codename, firmware_version)
     logger.api_info(f"Node '{node_codename}' deleted successfully")
-    return Response(status_code=status.HTTP_204_NO_CONTENT, content=None)
\ No newline at end of file
+    return Response(status_code=status.HTTP_204_NO_CONTENT, content=None)
+
+@router_node.post(path="/delete-bulk", response_model=BulkDeleteResponse)
+async def bulk_delete_firmware_versions(
+    background_tasks: BackgroundTasks,
+    data: FirmwareBulkDeleteSchema = Body(...),
+    service: NodeService = Depends(),
+    current_user: dict = Depends(get_current_user)
+) -> BulkDeleteResponse:
+    """
+    Delete firmware versions in bulk.
+    Their Google Drive files are deleted in the background, track them with `/delete-bulk/{job_id}`.
+    """
+    logger.api_info("Bulk deleting firmware versions", data.model_dump(exclude_none=True))
+    deleted_count, job = await service.bulk_delete_firmware_versions(data, background_tasks)
+    logger.api_info(f"Successfully bulk deleted {deleted_count} firmware version(s)")
+    return BulkDeleteResponse(
+        message="Firmware versions deleted successfully",
+        status_code=status.HTTP_200_OK,
+        data=BulkDeleteResult(
+            deleted_count=deleted_count,
+            job=JobProgress(**job.to_dict()) if job else None
+        )
+    )
+
+@router_node.get(path="/delete-bulk/{job_id}", response_model=JobProgressResponse)
+async def get_bulk_delete_progress(
+    job_id: str = Path(..., min_length=32, max_length=32),
+    service: NodeService = Depends(),
+    current_user: dict = Depends(get_current_user)
+) -> JobProgressResponse:
+    logger.api_info(f"Retrieving progress of delete job '{job_id}'")
+    job = service.get_delete_job(job_id)
+    return JobProgressResponse(
+        message="Job progress retrieved successfully",
+        status_code=status.HTTP_200_OK,
+        data=JobProgress(**job.to_dict())
+    )
\ No newline at end of file
@@ -1,5 +1,8 @@
+from datetime import datetime
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
+
+from enums.job import JobStatus
 
 
 class BaseAPIResponse(BaseModel):
@@ -22,6 +25,8 @@ class BasePagination(BaseModel):
     page_size: int = 10
     total_data: int = 0
     total_page: int = 1
+    # Opaque token for the next page (`?after=`), None on the last page
+    next_cursor: Optional[str] = None
 
     class Config:
         json_schema_extra = {
@@ -29,7 +34,8 @@ class BasePagination(BaseModel):
                 "page": 1,
                 "page_size": 10,
                 "total_data": 0,
-                "total_page": 1
+                "total_page": 1,
+                "next_cursor": None
             }
         }
 
@@ -45,4 +51,60 @@ class BaseFilterOptions(BaseModel):
                 "node_locations": ["Kebun Cibubur", "Kebun Bogor"],
                 "node_types": ["Sayuran Pagi", "Buah Malam"],
             }
-        }
\ No newline at end of file
+        }
+
+
+class JobProgress(BaseModel):
+    """ Progress of a background job started by a request. """
+    job_id: str
+    kind: str
+    status: JobStatus
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    failed_items: List[str] = []
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "job_id": "3f9c2a7be0d34c5f9f6a1b2c3d4e5f60",
+                "kind": "gdrive_delete",
+                "status": str(JobStatus.RUNNING),
+                "total": 120,
+                "succeeded": 64,
+                "failed": 1,
+                "failed_items": ["1AbCdEfGhIjKlMnOpQrStUvWxYz"],
+                "created_at": "2025-06-08T19:04:31.679626+07:00",
+                "finished_at": None
+            }
+        }
+
+
+class JobProgressResponse(BaseAPIResponse):
+    """ Response schema for the progress of a background job. """
+    data: JobProgress
+
+
+class BulkDeleteResult(BaseModel):
+    """ Result of a bulk delete, `job` tracks the deletions left running in the background. """
+    deleted_count: int = 0
+    job: Optional[JobProgress] = None
+
+
+class BulkDeleteResponse(BaseAPIResponse):
+    """ Response schema for the bulk delete endpoints. """
+    data: BulkDeleteResult
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "message": "Logs deleted successfully",
+                "status_code": 200,
+                "data": {
+                    "deleted_count": 1250,
+                    "job": None
+                }
+            }
+        }
@@ -1,3 +1,5 @@
+from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional
 
 from schemas.common import (
@@ -57,6 +59,7 @@ class LocalLogDataResponse(BaseAPIResponse, BasePagination):
                 "page_size": 10,
                 "total_data": 0,
                 "total_page": 1,
+                "next_cursor": "eyJ2IjogeyIkZGF0ZSI6IC4uLn0sICJpZCI6IC4uLn0",
                 "filter_options": {
                     "node_locations": [
                         "Cibubur-SayuranPagi",
@@ -92,4 +95,40 @@ class LocalLogDataResponse(BaseAPIResponse, BasePagination):
                     }
                 ]
             }
-        }
\ No newline at end of file
+        }
+
+
+class LocalLogBulkDeleteSchema(BaseModel):
+    """ Local logs removed by a bulk delete, matching every given criterion (at least one is required). """
+    session_ids: Optional[List[str]] = Field(
+        default=None,
+        max_length=10000,
+        description="Delete only these sessions"
+    )
+    node_codename: Optional[str] = Field(default=None, min_length=3, max_length=255)
+    flash_status: Optional[LocalLogStatus] = Field(default=None)
+    start_date: Optional[datetime] = Field(default=None, description="Oldest `created_at`")
+    end_date: Optional[datetime] = Field(default=None, description="Newest `created_at`")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "session_ids": ["session-123456789", "session-987654321"],
+                "node_codename": None,
+                "flash_status": None,
+                "start_date": None,
+                "end_date": None
+            }
+        }
+
+
+class LocalLogMQTTPayload(BaseModel):
+    """ Fields identifying the log of a local OTA log update received over MQTT, see externals/mqtts/registry.py. """
+    session_id: str = Field(..., min_length=1, max_length=255)
+    node_mac: str = Field(..., min_length=12)
+    node_codename: str = Field(..., min_length=3, max_length=255)
+    firmware_version_origin: str = Field(..., min_length=3, max_length=50)
+
+    @field_validator("node_codename", "firmware_version_origin")
+    def validate_string_fields(cls, v):
+        return v.strip()
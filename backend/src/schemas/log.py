@@ -1,3 +1,5 @@
+from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional
 
 from schemas.common import (
@@ -7,6 +9,7 @@ from schemas.common import (
 )
 from models.log import LogModel
 from enums.log import LogStatus
+from utils.validator import validate_input
 
 
 class LogFilterOptions(BaseFilterOptions):
@@ -59,6 +62,7 @@ class LogDataResponse(BaseAPIResponse, BasePagination):
                 "page_size": 10,
                 "total_data": 0,
                 "total_page": 1,
+                "next_cursor": "eyJ2IjogeyIkZGF0ZSI6IC4uLn0sICJpZCI6IC4uLn0",
                 "filter_options": {
                     "node_locations": [
                         "Cibubur-SayuranPagi",
@@ -96,4 +100,50 @@ class LogDataResponse(BaseAPIResponse, BasePagination):
                     }
                 ]
             }
-        }
\ No newline at end of file
+        }
+
+
+class LogBulkDeleteSchema(BaseModel):
+    """ Logs removed by a bulk delete, matching every given criterion (at least one is required). """
+    session_ids: Optional[List[str]] = Field(
+        default=None,
+        max_length=10000,
+        description="Delete only these sessions"
+    )
+    node_location: Optional[str] = Field(default=None, min_length=3, max_length=255)
+    node_type: Optional[str] = Field(default=None, min_length=3, max_length=255)
+    flash_status: Optional[LogStatus] = Field(default=None)
+    start_date: Optional[datetime] = Field(default=None, description="Oldest `created_at`")
+    end_date: Optional[datetime] = Field(default=None, description="Newest `created_at`")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "session_ids": None,
+                "node_location": "Cibubur-SayuranPagi",
+                "node_type": "Pembibitan",
+                "flash_status": str(LogStatus.FAILED),
+                "start_date": "2025-06-01T00:00:00+07:00",
+                "end_date": "2025-06-08T23:59:59+07:00"
+            }
+        }
+
+
+class LogMQTTPayload(BaseModel):
+    """ Fields identifying the log of an OTA log update received over MQTT, see externals/mqtts/registry.py. """
+    session_id: str = Field(..., min_length=1, max_length=255)
+    node_mac: str = Field(..., min_length=12)
+    node_location: str = Field(..., min_length=3, max_length=255)
+    node_type: str = Field(..., min_length=3, max_length=255)
+    node_id: str = Field(..., min_length=1, max_length=255)
+    node_codename: str = Field(..., min_length=3, max_length=255)
+    firmware_version: str = Field(
+        ...,
+        pattern=r'^\d+\.\d+\.\d+$',
+        min_length=5,
+        max_length=20
+    )
+
+    @field_validator("node_location", "node_type", "node_id")
+    def validate_node_input(cls, v):
+        return validate_input(v)
@@ -1,4 +1,6 @@
-from typing import List, Dict
+from datetime import datetime
+from pydantic import BaseModel
+from typing import List, Dict, Optional
 
 from schemas.common import BaseAPIResponse
 
@@ -21,4 +23,178 @@ class ListNodeResponse(BaseAPIResponse):
                     "node_ids": ["1a", "1b"]
                 }
             }
-        }
\ No newline at end of file
+        }
+
+
+class QoSMetricsBucket(BaseModel):
+    """
+    Aggregated QoS metrics of the OTA sessions completed in a time bucket.
+    """
+    bucket_start: datetime
+    sessions: int = 0
+    avg_download_speed_kbps: Optional[float] = None
+    min_download_speed_kbps: Optional[float] = None
+    max_download_speed_kbps: Optional[float] = None
+    avg_download_duration_sec: Optional[float] = None
+    avg_latency_sec: Optional[float] = None
+    avg_upload_duration_app_sec: Optional[float] = None
+    avg_upload_duration_esp_sec: Optional[float] = None
+    total_bytes_written: int = 0
+
+
+class QoSMetricsResponse(BaseAPIResponse):
+    """
+    QoS metrics schema for get OTA trends.
+    """
+    data: List[QoSMetricsBucket] = []
+
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "message": "QoS metrics retrieved successfully",
+                "status_code": 200,
+                "data": [
+                    {
+                        "bucket_start": "2025-06-08T00:00:00+07:00",
+                        "sessions": 12,
+                        "avg_download_speed_kbps": 48.2,
+                        "min_download_speed_kbps": 21.5,
+                        "max_download_speed_kbps": 64.0,
+                        "avg_download_duration_sec": 19.7,
+                        "avg_latency_sec": None,
+                        "avg_upload_duration_app_sec": None,
+                        "avg_upload_duration_esp_sec": None,
+                        "total_bytes_written": 11796480
+                    }
+                ]
+            }
+        }
+
+
+class OTAStatsMetric(BaseModel):
+    """
+    Summary of a numeric log field over the finished OTA sessions of a group.
+    """
+    avg: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    total: float = 0
+    count: int = 0
+
+
+class OTAStatsGroup(BaseModel):
+    """
+    OTA statistics of a group (day, node codename, location or type), summed from the daily rollups.
+    """
+    key: Optional[str] = None
+    sessions: int = 0
+    success_rate: Optional[float] = None
+    counts: Dict[str, int] = {}
+    metrics: Dict[str, OTAStatsMetric] = {}
+
+
+class OTAStatsResponse(BaseAPIResponse):
+    """
+    OTA statistics schema for get the per-node daily rollups.
+    """
+    data: List[OTAStatsGroup] = []
+
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "message": "OTA stats retrieved successfully",
+                "status_code": 200,
+                "data": [
+                    {
+                        "key": "cibubur-sayuranpagi_penyemaian_1a",
+                        "sessions": 10,
+                        "success_rate": 0.9,
+                        "counts": {
+                            "success": 9,
+                            "failed": 1,
+                            "in progress": 0
+                        },
+                        "metrics": {
+                            "download_speed_kbps": {
+                                "avg": 48.2,
+                                "min": 21.5,
+                                "max": 64.0,
+                                "total": 482.0,
+                                "count": 10
+                            }
+                        }
+                    }
+                ]
+            }
+        }
+
+
+class IngestionShardMetrics(BaseModel):
+    """
+    Depth and counters of a shard of the MQTT ingestion queue.
+    """
+    shard: int
+    depth: int = 0
+    spilled_depth: int = 0
+    enqueued: int = 0
+    processed: int = 0
+    dropped: int = 0
+    spilled: int = 0
+
+
+class IngestionMetrics(BaseModel):
+    """
+    Depth and counters of the MQTT ingestion queue, summed over its shards, and the duplicate messages dropped.
+    """
+    name: str
+    overflow_policy: str
+    capacity: int
+    paused: bool = False
+    depth: int = 0
+    enqueued: int = 0
+    processed: int = 0
+    dropped: int = 0
+    spilled: int = 0
+    duplicates: int = 0
+    shards: List[IngestionShardMetrics] = []
+
+
+class IngestionMetricsResponse(BaseAPIResponse):
+    """
+    MQTT ingestion queue metrics schema.
+    """
+    data: IngestionMetrics
+
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "message": "Ingestion metrics retrieved successfully",
+                "status_code": 200,
+                "data": {
+                    "name": "mqtt_logs",
+                    "overflow_policy": "block",
+                    "capacity": 1000,
+                    "paused": False,
+                    "depth": 3,
+                    "enqueued": 1520,
+                    "processed": 1517,
+                    "dropped": 0,
+                    "spilled": 0,
+                    "duplicates": 4,
+                    "shards": [
+                        {
+                            "shard": 0,
+                            "depth": 3,
+                            "spilled_depth": 0,
+                            "enqueued": 1520,
+                            "processed": 1517,
+                            "dropped": 0,
+                            "spilled": 0
+                        }
+                    ]
+                }
+            }
+        }
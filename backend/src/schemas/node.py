@@ -166,6 +166,7 @@ class NodeResponse(BaseAPIResponse, BasePagination):
                 "page_size": 10,
                 "total_data": 0,
                 "total_page": 1,
+                "next_cursor": "eyJ2IjogeyIkZGF0ZSI6IC4uLn0sICJpZCI6IC4uLn0",
                 "filter_options": {
                     "node_locations": [
                         "Kebun Cibubur",
@@ -232,4 +233,39 @@ class FirmwareVersionListResponse(BaseAPIResponse):
                     "2.0.0"
                 ]
             }
-        }
\ No newline at end of file
+        }
+
+
+class FirmwareBulkDeleteSchema(BaseModel):
+    """
+    Firmware versions removed by a bulk delete, matching every given criterion (at least one is required).
+    The nodes stay in the registry, pointing to their highest remaining version.
+    """
+    node_codenames: Optional[List[str]] = Field(
+        default=None,
+        max_length=1000,
+        description="Delete only the versions of these nodes"
+    )
+    node_location: Optional[str] = Field(default=None, min_length=3, max_length=255)
+    node_type: Optional[str] = Field(default=None, min_length=3, max_length=255)
+    firmware_versions: Optional[List[str]] = Field(
+        default=None,
+        max_length=1000,
+        description="Delete only these versions (x.y.z)"
+    )
+
+    @field_validator("firmware_versions")
+    def validate_firmware_versions(cls, v):
+        if v is not None:
+            return [validate_version(version) for version in v]
+        return v
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "node_codenames": ["cibubur-sayuranpagi_pembibitan_1a"],
+                "node_location": None,
+                "node_type": None,
+                "firmware_versions": ["0.0.1", "0.0.2"]
+            }
+        }
@@ -0,0 +1,83 @@
+"""
+MongoDB maintenance commands.
+
+Run from the `src` folder:
+    python -m scripts.database diff            # show missing/changed/unmanaged indexes
+    python -m scripts.database apply           # create missing and rebuild changed indexes
+    python -m scripts.database apply --prune   # also drop indexes that are not declared
+    python -m scripts.database migrate         # apply pending data migrations
+    python -m scripts.database archive         # move logs older than LOG_RETENTION_DAYS to the archive
+"""
+import argparse
+import asyncio
+import json
+
+from cores.database import _db, client
+from cores.indexes import diff_indexes, ensure_indexes
+from cores.migrations import get_pending_migrations, run_migrations
+from cores.retention import archive_expired_logs, is_retention_enabled
+
+
+async def _diff() -> int:
+    diff = await diff_indexes(_db)
+    pending = await get_pending_migrations(_db)
+    print(json.dumps({"indexes": diff, "pending_migrations": pending}, indent=2))
+
+    # Non-zero exit code when the database is out of date, handy for CI/deploy checks
+    out_of_date = pending or any(
+        collection_diff["missing"] or collection_diff["changed"]
+        for collection_diff in diff.values()
+    )
+    return 1 if out_of_date else 0
+
+
+async def _apply(prune: bool) -> int:
+    diff = await ensure_indexes(_db, prune=prune)
+    print(json.dumps({"applied": diff}, indent=2))
+    return 0
+
+
+async def _migrate() -> int:
+    applied = await run_migrations(_db)
+    pending = await get_pending_migrations(_db)
+    print(json.dumps({"applied": applied, "pending": pending}, indent=2))
+    return 1 if pending else 0
+
+
+async def _archive() -> int:
+    if not is_retention_enabled():
+        print("Log retention is disabled, set LOG_RETENTION_DAYS to enable it")
+        return 1
+    archived = await archive_expired_logs(_db)
+    print(json.dumps({"archived": archived}, indent=2))
+    return 0
+
+
+async def _main(args: argparse.Namespace) -> int:
+    try:
+        if args.command == "diff":
+            return await _diff()
+        if args.command == "apply":
+            return await _apply(args.prune)
+        if args.command == "archive":
+            return await _archive()
+        return await _migrate()
+    finally:
+        client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="LokaSync MongoDB maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("diff", help="Compare declared indexes and migrations with the database")
+    apply_parser = subparsers.add_parser("apply", help="Create missing and rebuild changed indexes")
+    apply_parser.add_argument("--prune", action="store_true", help="Drop indexes that are not declared")
+    subparsers.add_parser("migrate", help="Apply pending data migrations")
+    subparsers.add_parser("archive", help="Move logs older than LOG_RETENTION_DAYS to the archive")
+
+    raise SystemExit(asyncio.run(_main(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 from fastapi import Depends, HTTPException
-from typing import BinaryIO, Dict, Any, Literal, Optional, List
+from datetime import datetime
+from typing import BinaryIO, Dict, Any, Literal, Optional, List, Tuple
 
 from models.locallog import LocalLogModel
-from schemas.locallog import LocalLogFilterOptions
+from schemas.locallog import LocalLogFilterOptions, LocalLogBulkDeleteSchema
 from repositories.locallog import LocalLogRepository
+from repositories.archive import LogArchiveRepository
+from utils.datetime import localize_datetime
 from utils.logger import logger
+from utils.cursor import decode_cursor
 from utils.export_locallog import create_csv_from_local_logs, create_pdf_from_local_logs
 
 
@@ -14,6 +18,7 @@ class LocalLogService:
         logs_repository: LocalLogRepository = Depends(),
     ):
         self.logs_repository = logs_repository
+        self.archive_repository = LogArchiveRepository("local_logs", LocalLogModel)
 
     async def upsert_log_from_mqtt(
         self,
@@ -50,6 +55,35 @@ class LocalLogService:
             
         return result
 
+    async def bulk_upsert_logs_from_mqtt(
+        self,
+        entries: List[Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]]
+    ) -> List[LocalLogModel]:
+        """
+        Upsert a batch of buffered MQTT log updates in one write.
+        Each entry is a (filter_query, update_fields, log_data) tuple, see `upsert_log_from_mqtt`
+        for the filter query fields.
+        """
+        logger.api_info(f"Service: Bulk upserting {len(entries)} log(s) from MQTT")
+
+        results = await self.logs_repository.bulk_upsert_logs(entries)
+
+        if results:
+            logger.api_info(f"Service: Successfully upserted {len(results)} log(s)")
+        else:
+            logger.api_error(f"Service: Failed to bulk upsert {len(entries)} log(s)")
+
+        return results
+
+    async def mark_stats_recorded(self, session_ids: List[str], flag: str = "stats_recorded") -> List[str]:
+        """
+        Returns the finished sessions not counted yet, flagged as counted.
+        """
+        return await self.logs_repository.mark_stats_recorded(session_ids, flag)
+
+    async def unmark_stats_recorded(self, session_ids: List[str], flag: str = "stats_recorded") -> None:
+        await self.logs_repository.unmark_stats_recorded(session_ids, flag)
+
     async def get_all_logs(
         self,
         filters: dict = None,
@@ -62,6 +96,36 @@ class LocalLogService:
         
         logger.api_info(f"Service: Retrieved {len(logs)} logs")
         return logs
+
+    async def get_logs_page(
+        self,
+        filters: Dict[str, Any],
+        skip: int = 0,
+        limit: int = 10,
+        after: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Tuple[List[LocalLogModel], int, LocalLogFilterOptions]:
+        """
+        Retrieve a page of logs with the total count and the filter options.
+        When `start_date` reaches past the retention hot window, archived logs
+        are appended after the live ones (they are always older).
+        """
+        logger.api_info(f"Service: Retrieving logs page - Skip: {skip}, Limit: {limit}, Filters: {filters}, After: {after}, Range: {start_date} - {end_date}")
+
+        cursor = None
+        if after:
+            cursor = decode_cursor(after)
+            if cursor is None:
+                raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+        logs, total, filter_options = await self.archive_repository.get_merged_page(
+            self.logs_repository.get_logs_page, filters, skip, limit,
+            after=cursor, start=start_date, end=end_date
+        )
+
+        logger.api_info(f"Service: Retrieved {len(logs)} logs out of {total} total")
+        return logs, total, filter_options
     
     async def get_detail_log(
         self,
@@ -82,18 +146,44 @@ class LocalLogService:
     async def delete_log(self, session_id: str) -> None:
         logger.api_info(f"Service: Deleting log for session id '{session_id}'")
 
-        log_exist = await self.logs_repository.get_detail_log(session_id=session_id)
-        if not log_exist:
-            logger.api_error(f"Service: No logs found for session id '{session_id}'")
-            raise HTTPException(status_code=404, detail="Log not found.")
-
+        # No existence probe, a missing log simply deletes nothing
         deleted = await self.logs_repository.delete_log(session_id)
         if not deleted:
-            logger.api_error(f"Service: No logs deleted for session id '{session_id}'")
+            logger.api_error(f"Service: No logs found for session id '{session_id}'")
             raise HTTPException(status_code=404, detail="Log not found.")
 
         logger.api_info(f"Service: Successfully deleted {deleted} log(s) for session id '{session_id}'")
 
+    async def bulk_delete_logs(self, criteria: LocalLogBulkDeleteSchema) -> int:
+        """
+        Delete the live logs matching every criterion, archived logs are kept.
+        """
+        logger.api_info(f"Service: Bulk deleting logs - Criteria: {criteria.model_dump(exclude_none=True)}")
+
+        query: Dict[str, Any] = {}
+        if criteria.session_ids is not None:
+            query["session_id"] = {"$in": criteria.session_ids}
+        if criteria.node_codename:
+            query["node_codename"] = criteria.node_codename
+        if criteria.flash_status:
+            query["flash_status"] = criteria.flash_status
+        if criteria.start_date or criteria.end_date:
+            query["created_at"] = {}
+            if criteria.start_date:
+                query["created_at"]["$gte"] = localize_datetime(criteria.start_date)
+            if criteria.end_date:
+                query["created_at"]["$lte"] = localize_datetime(criteria.end_date)
+
+        # Business Logic: Never wipe the whole collection by accident
+        if not query:
+            logger.api_error("Service: Bulk delete without any criterion")
+            raise HTTPException(status_code=400, detail="At least one delete criterion is required.")
+
+        deleted = await self.logs_repository.delete_logs(query)
+
+        logger.api_info(f"Service: Successfully bulk deleted {deleted} log(s)")
+        return deleted
+
     async def count_logs(self, filters: Dict[str, Any]) -> int:
         logger.api_info(f"Service: Counting logs with filters: {filters}")
         
@@ -1,12 +1,24 @@
-from fastapi import Depends
+from fastapi import Depends, HTTPException
+from datetime import date, datetime
+from typing import Any, Dict, List
 
 from repositories.monitoring import MonitoringRepository
+from repositories.metrics import MetricBucket, MetricsRepository
+from repositories.stats import StatsGroupBy, StatsRepository
+from externals.mqtts.subscribe import duplicate_filter, ingest_queue
 from utils.logger import logger
 
 
 class MonitoringService:
-    def __init__(self, monitoring_repository: MonitoringRepository = Depends()):
+    def __init__(
+        self,
+        monitoring_repository: MonitoringRepository = Depends(),
+        metrics_repository: MetricsRepository = Depends(),
+        stats_repository: StatsRepository = Depends()
+    ):
         self.monitoring_repository = monitoring_repository
+        self.metrics_repository = metrics_repository
+        self.stats_repository = stats_repository
 
     async def get_list_nodes(self) -> dict:
         logger.api_info("Service: Getting list of available nodes")
@@ -27,4 +39,46 @@ class MonitoringService:
                 "node_locations": [],
                 "node_types": [],
                 "node_ids": []
-            }
\ No newline at end of file
+            }
+
+    async def get_qos_metrics(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        bucket: MetricBucket,
+        meta_filters: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        logger.api_info(f"Service: Getting QoS metrics - Range: {start_date} - {end_date}, Bucket: {bucket}, Filters: {meta_filters}")
+
+        if start_date > end_date:
+            logger.api_error("Service: QoS metrics start date is after the end date")
+            raise HTTPException(400, "Start date must be before end date.")
+
+        metrics = await self.metrics_repository.get_qos_metrics(start_date, end_date, bucket, meta_filters)
+
+        logger.api_info(f"Service: Retrieved {len(metrics)} QoS metric bucket(s)")
+        return metrics
+
+    async def get_ota_stats(
+        self,
+        start_date: date,
+        end_date: date,
+        group_by: StatsGroupBy,
+        filters: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        logger.api_info(f"Service: Getting OTA stats - Range: {start_date} - {end_date}, Group by: {group_by}, Filters: {filters}")
+
+        if start_date > end_date:
+            logger.api_error("Service: OTA stats start date is after the end date")
+            raise HTTPException(400, "Start date must be before end date.")
+
+        stats = await self.stats_repository.get_stats(start_date.isoformat(), end_date.isoformat(), group_by, filters)
+
+        logger.api_info(f"Service: Retrieved {len(stats)} OTA stat group(s)")
+        return stats
+
+    def get_ingestion_metrics(self) -> Dict[str, Any]:
+        logger.api_info("Service: Getting MQTT ingestion queue metrics")
+        metrics = ingest_queue.metrics()
+        metrics["duplicates"] = duplicate_filter.duplicates
+        return metrics
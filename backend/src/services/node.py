@@ -1,14 +1,17 @@
 from io import BytesIO
-from fastapi import Depends, HTTPException, UploadFile, requests
+from fastapi import BackgroundTasks, Depends, HTTPException, UploadFile, requests
 from typing import Dict, Any, List, Optional, Tuple
 
 from repositories.node import NodeRepository
 from models.node import NodeModel
-from schemas.node import NodeCreateSchema, NodeModifyVersionSchema
+from schemas.node import NodeCreateSchema, NodeModifyVersionSchema, FirmwareBulkDeleteSchema
 from schemas.common import BaseFilterOptions
 from utils.logger import logger
+from utils.cursor import decode_cursor
 from cores.config import env
+from cores.jobs import BackgroundJob, create_job, get_job
 from externals.gdrive.download import download_firmware_from_gdrive
+from externals.gdrive.delete import delete_firmware_from_gdrive_concurrently
 
 
 class NodeService:
@@ -176,6 +179,51 @@ class NodeService:
         
         logger.api_info(f"Service: Node '{node_codename}' deleted successfully - {deleted_count} record(s) removed")
 
+    async def bulk_delete_firmware_versions(
+        self,
+        criteria: FirmwareBulkDeleteSchema,
+        background_tasks: BackgroundTasks
+    ) -> Tuple[int, Optional[BackgroundJob]]:
+        """
+        Delete the firmware versions matching every criterion, their Google Drive
+        files are deleted by a background job once the response is sent.
+        """
+        logger.api_info(f"Service: Bulk deleting firmware versions - Criteria: {criteria.model_dump(exclude_none=True)}")
+
+        node_filters: Dict[str, Any] = {}
+        if criteria.node_codenames is not None:
+            node_filters["node_codename"] = {"$in": criteria.node_codenames}
+        if criteria.node_location:
+            node_filters["node_location"] = criteria.node_location
+        if criteria.node_type:
+            node_filters["node_type"] = criteria.node_type
+
+        # Business Logic: Never wipe every firmware by accident
+        if not node_filters and not criteria.firmware_versions:
+            logger.api_error("Service: Bulk delete without any criterion")
+            raise HTTPException(400, "At least one delete criterion is required.")
+
+        deleted_count, file_ids = await self.nodes_repository.delete_firmware_versions(
+            node_filters,
+            criteria.firmware_versions
+        )
+
+        job = None
+        if file_ids:
+            job = create_job("gdrive_delete", len(file_ids))
+            background_tasks.add_task(delete_firmware_from_gdrive_concurrently, file_ids, job)
+            logger.api_info(f"Service: Scheduled deletion of {len(file_ids)} Google Drive file(s) - Job: {job.job_id}")
+
+        logger.api_info(f"Service: Successfully bulk deleted {deleted_count} firmware version(s)")
+        return deleted_count, job
+
+    def get_delete_job(self, job_id: str) -> BackgroundJob:
+        job = get_job(job_id)
+        if not job:
+            logger.api_error(f"Service: Delete job '{job_id}' not found")
+            raise HTTPException(404, "Job not found.")
+        return job
+
     async def get_all_nodes(
         self,
         filters: Dict[str, Any],
@@ -187,6 +235,24 @@ class NodeService:
         logger.api_info(f"Service: Retrieved {len(nodes)} nodes")
         return nodes
 
+    async def get_nodes_page(
+        self,
+        filters: Dict[str, Any],
+        skip: int,
+        limit: int,
+        after: Optional[str] = None
+    ) -> Tuple[List[NodeModel], int, BaseFilterOptions]:
+        logger.api_info(f"Service: Retrieving nodes page with filters: {filters}, After: {after}")
+        cursor = None
+        if after:
+            cursor = decode_cursor(after)
+            if cursor is None:
+                raise HTTPException(400, "Invalid cursor.")
+
+        nodes, total, filter_options = await self.nodes_repository.get_nodes_page(filters, skip, limit, after=cursor)
+        logger.api_info(f"Service: Retrieved {len(nodes)} nodes out of {total} total")
+        return nodes, total, filter_options
+
     async def get_detail_node(
         self,
         node_codename: str,
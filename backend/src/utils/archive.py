@@ -0,0 +1,157 @@
+import gzip
+import json
+import uuid
+from collections import Counter
+from datetime import date, datetime, time, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from bson import json_util
+
+from cores.config import env
+
+"""NOTE:
+On-disk archive of expired OTA logs.
+Documents are stored as gzip-compressed NDJSON (MongoDB extended JSON),
+one file per collection and UTC day of `created_at`:
+
+    <LOG_ARCHIVE_DIR>/<collection>/<YYYY-MM-DD>.ndjson.gz
+
+New batches are appended as extra gzip members, which gzip readers
+handle transparently.
+
+Each day file has a small count file next to it, `<YYYY-MM-DD>.counts.json`,
+holding the number of documents per combination of the `COUNTED_FIELDS`, so
+archived logs can be counted and skipped without decompressing whole days.
+It records the size of the day file it was built from, and is rebuilt when
+the day file changed.
+"""
+ARCHIVE_SUFFIX = ".ndjson.gz"
+COUNTS_SUFFIX = ".counts.json"
+
+# Fields the archived logs can be filtered on
+COUNTED_FIELDS = ("node_location", "node_type", "flash_status")
+
+# (values of COUNTED_FIELDS, number of documents)
+CountGroup = Tuple[List[Any], int]
+
+
+def get_archive_dir(collection_name: str) -> Path:
+    archive_dir = Path(env.LOG_ARCHIVE_DIR)
+    if not archive_dir.is_absolute():
+        # Relative to the backend folder, next to the `logs` folder
+        archive_dir = Path(__file__).resolve().parent.parent.parent / archive_dir
+    return archive_dir / collection_name
+
+
+def to_utc_naive(value: datetime) -> datetime:
+    """
+    MongoDB returns naive UTC datetimes, convert aware ones so both can be compared.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def append_documents(collection_name: str, day: date, documents: List[Dict[str, Any]]) -> Path:
+    """
+    Append documents to the archive file of a day, flushed to disk before returning.
+    """
+    archive_dir = get_archive_dir(collection_name)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    path = archive_dir / f"{day.isoformat()}{ARCHIVE_SUFFIX}"
+
+    lines = "".join(
+        json_util.dumps(document, json_options=json_util.RELAXED_JSON_OPTIONS) + "\n"
+        for document in documents
+    )
+    with open(path, "ab") as file:
+        file.write(gzip.compress(lines.encode("utf-8")))
+        file.flush()
+    return path
+
+
+def list_archive_days(
+    collection_name: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> List[date]:
+    """
+    Return the archived days overlapping [start, end], newest first.
+    """
+    archive_dir = get_archive_dir(collection_name)
+    if not archive_dir.is_dir():
+        return []
+
+    days = []
+    for path in archive_dir.glob(f"*{ARCHIVE_SUFFIX}"):
+        try:
+            day = date.fromisoformat(path.name[:-len(ARCHIVE_SUFFIX)])
+        except ValueError:
+            continue
+        if start and day < to_utc_naive(start).date():
+            continue
+        if end and day > to_utc_naive(end).date():
+            continue
+        days.append(day)
+
+    return sorted(days, reverse=True)
+
+
+def get_day_bounds(day: date) -> Tuple[datetime, datetime]:
+    """
+    First and last instant of a UTC day, as naive UTC datetimes.
+    """
+    return datetime.combine(day, time.min), datetime.combine(day, time.max)
+
+
+def write_day_counts(collection_name: str, day: date) -> List[CountGroup]:
+    """
+    Count the documents archived for a day per combination of `COUNTED_FIELDS`, and store the counts.
+    """
+    archive_dir = get_archive_dir(collection_name)
+    size = (archive_dir / f"{day.isoformat()}{ARCHIVE_SUFFIX}").stat().st_size
+
+    counter = Counter(
+        tuple(document.get(field) for field in COUNTED_FIELDS)
+        for document in read_documents(collection_name, day)
+    )
+    groups: List[CountGroup] = [(list(values), count) for values, count in counter.items()]
+
+    counts_path = archive_dir / f"{day.isoformat()}{COUNTS_SUFFIX}"
+    # Unique temporary file, several workers may rebuild the counts at once
+    temp_path = counts_path.with_name(f"{counts_path.name}.{uuid.uuid4().hex}.tmp")
+    temp_path.write_text(json.dumps({"size": size, "groups": groups}), encoding="utf-8")
+    temp_path.replace(counts_path)
+    return groups
+
+
+def read_day_counts(collection_name: str, day: date) -> List[CountGroup]:
+    """
+    Return the document counts of an archived day, rebuilt if missing or out of date.
+    """
+    archive_dir = get_archive_dir(collection_name)
+    size = (archive_dir / f"{day.isoformat()}{ARCHIVE_SUFFIX}").stat().st_size
+    try:
+        counts = json.loads((archive_dir / f"{day.isoformat()}{COUNTS_SUFFIX}").read_text(encoding="utf-8"))
+        if counts["size"] == size:
+            return [(values, count) for values, count in counts["groups"]]
+    except (OSError, ValueError, KeyError):
+        pass
+    return write_day_counts(collection_name, day)
+
+
+def read_documents(collection_name: str, day: date) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the documents archived for a day, a document archived twice is only yielded once.
+    """
+    path = get_archive_dir(collection_name) / f"{day.isoformat()}{ARCHIVE_SUFFIX}"
+    seen_ids = set()
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            document = json_util.loads(line)
+            if document["_id"] in seen_ids:
+                continue
+            seen_ids.add(document["_id"])
+            yield document
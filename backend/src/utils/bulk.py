@@ -0,0 +1,32 @@
+from typing import Any, Callable, Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+# Documents removed per delete_many, keeps each delete short and its `$in` list bounded
+BULK_DELETE_BATCH_SIZE = 1000
+
+
+async def delete_in_batches(
+    collection: AsyncIOMotorCollection,
+    query: Dict[str, Any],
+    projection: Optional[Dict[str, Any]] = None,
+    on_batch: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    batch_size: int = BULK_DELETE_BATCH_SIZE
+) -> int:
+    """
+    Delete every document matching `query`, `batch_size` documents per `delete_many`.
+    `on_batch` receives the documents of each batch (with `projection`) before they are deleted.
+
+    Returns:
+        The number of deleted documents
+    """
+    deleted = 0
+    while True:
+        documents = await collection.find(query, projection or {"_id": 1}).limit(batch_size).to_list(length=batch_size)
+        if not documents:
+            return deleted
+
+        if on_batch:
+            on_batch(documents)
+
+        result = await collection.delete_many({"_id": {"$in": [document["_id"] for document in documents]}})
+        deleted += result.deleted_count
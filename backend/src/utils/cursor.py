@@ -0,0 +1,60 @@
+import base64
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId, json_util
+from pydantic import BaseModel
+
+"""NOTE:
+Keyset (cursor) pagination helpers.
+A cursor is an opaque url-safe token holding the sort value and the `_id`
+of the last item of a page. The next page is fetched with a range query on
+(sort_field, _id), so deep pages cost the same as the first one.
+"""
+Cursor = Tuple[Any, ObjectId]
+
+
+def encode_cursor(sort_value: Any, doc_id: Any) -> str:
+    """
+    Encode the sort value and `_id` of the last item of a page.
+    """
+    raw = json_util.dumps({"v": sort_value, "id": ObjectId(str(doc_id))})
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Optional[Cursor]:
+    """
+    Decode a cursor token, returns None if it is malformed.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        if not isinstance(data.get("id"), ObjectId):
+            return None
+        return data["v"], data["id"]
+    except Exception:
+        return None
+
+
+def build_keyset_filter(filters: Dict[str, Any], sort_field: str, cursor: Optional[Cursor]) -> Dict[str, Any]:
+    """
+    Combine the query filters with the range condition for a descending (sort_field, _id) page.
+    """
+    if cursor is None:
+        return filters or {}
+
+    sort_value, doc_id = cursor
+    keyset = {"$or": [
+        {sort_field: {"$lt": sort_value}},
+        {sort_field: sort_value, "_id": {"$lt": doc_id}}
+    ]}
+    return {"$and": [filters, keyset]} if filters else keyset
+
+
+def get_next_cursor(items: List[BaseModel], sort_field: str, limit: int) -> Optional[str]:
+    """
+    Build the cursor of the next page, None when the current page is the last one.
+    """
+    if not items or len(items) < limit:
+        return None
+
+    last_item = items[-1]
+    return encode_cursor(getattr(last_item, sort_field), last_item.id)
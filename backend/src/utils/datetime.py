@@ -7,6 +7,12 @@ from cores.config import env
 def get_current_datetime() -> datetime:
     return datetime.now(timezone(env.TIMEZONE))
 
+def localize_datetime(dt: datetime | None) -> datetime | None:
+    """ Attach the app timezone to naive datetimes (e.g. from query params). """
+    if dt is None or dt.tzinfo is not None:
+        return dt
+    return timezone(env.TIMEZONE).localize(dt)
+
 def convert_datetime_to_str(dt: datetime, tz: str = env.TIMEZONE) -> str:
     return dt.astimezone(timezone(tz)).strftime("%Y-%m-%d %H:%M:%S")
 
@@ -0,0 +1,65 @@
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from pytz import timezone, utc
+
+from cores.config import env
+from utils.datetime import get_current_datetime
+
+"""NOTE:
+Daily OTA statistics rollups, one `ota_daily_stats` document per
+(node_codename, source, day), updated with $inc/$min/$max when a session ends.
+"""
+# Numeric log fields summarized in the rollups
+STATS_METRIC_FIELDS = [
+    "download_speed_kbps",
+    "download_duration_sec",
+    "bytes_written",
+    "latency_sec",
+    "upload_duration_app_sec",
+    "upload_duration_esp_sec",
+]
+
+
+def get_stats_day(dt: Optional[datetime]) -> str:
+    """
+    Day (YYYY-MM-DD) of a datetime in the app timezone, MongoDB naive datetimes are UTC.
+    """
+    if dt is None:
+        dt = get_current_datetime()
+    elif dt.tzinfo is None:
+        dt = utc.localize(dt)
+    return dt.astimezone(timezone(env.TIMEZONE)).strftime("%Y-%m-%d")
+
+
+def build_stats_update(log: Dict[str, Any], source: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Build the (filter, update) pair adding a finished OTA session to its daily rollup.
+    """
+    day = get_stats_day(log.get("flash_completed_at") or log.get("created_at"))
+    status = str(log.get("flash_status"))
+
+    increments: Dict[str, Any] = {"sessions": 1, f"counts.{status}": 1}
+    minimums: Dict[str, Any] = {}
+    maximums: Dict[str, Any] = {}
+    for field in STATS_METRIC_FIELDS:
+        value = log.get(field)
+        if value is None:
+            continue
+        increments[f"metrics.{field}.sum"] = value
+        increments[f"metrics.{field}.count"] = 1
+        minimums[f"metrics.{field}.min"] = value
+        maximums[f"metrics.{field}.max"] = value
+
+    update: Dict[str, Any] = {
+        "$inc": increments,
+        "$set": {"latest_updated": get_current_datetime()},
+        "$setOnInsert": {
+            "node_location": log.get("node_location"),
+            "node_type": log.get("node_type"),
+        }
+    }
+    if minimums:
+        update["$min"] = minimums
+        update["$max"] = maximums
+
+    return {"node_codename": log.get("node_codename"), "source": source, "day": day}, update
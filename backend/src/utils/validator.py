@@ -2,6 +2,13 @@ import re
 from html import escape
 from urllib.parse import urlparse
 
+# Compiled once, the validators run on every inbound API and MQTT payload
+ALLOWED_CHARS_REGEX = re.compile(r"^[\w\s.,:;!?()\-_/']*$")
+CONTROL_CHARS_REGEX = re.compile(r"[\x00-\x1f\x7f]")
+INPUT_REGEX = re.compile(r"^[a-zA-Z0-9_-]+$")
+VERSION_REGEX = re.compile(r'^\d+\.\d+\.\d+$')
+DOMAIN_REGEX = re.compile(r'^[a-zA-Z0-9.-]+$')
+
 def sanitize_input(value: str) -> str:
     """
     Sanitize the input string to prevent XSS attacks and ensure safe HTML rendering.
@@ -9,9 +16,8 @@ def sanitize_input(value: str) -> str:
     
     Target input is only for `description`, which is flexible but needs to be safe for HTML rendering.
     """
-    ALLOWED_CHARS_REGEX = re.compile(r"^[\w\s.,:;!?()\-_/']*$")
     value = escape(value)
-    value = re.sub(r"[\x00-\x1f\x7f]", "", value)
+    value = CONTROL_CHARS_REGEX.sub("", value)
     if not ALLOWED_CHARS_REGEX.fullmatch(value):
         raise ValueError("Description contains invalid characters.")
     return value
@@ -31,7 +37,7 @@ def validate_input(value: str) -> str:
         raise ValueError("Input cannot contain spaces.")
 
     # Check for invalid characters
-    if not re.match(r"^[a-zA-Z0-9_-]+$", value):
+    if not INPUT_REGEX.match(value):
         raise ValueError("Input can only contain letters, numbers, underscores, and hyphens.")
 
     # Check for consecutive hyphens
@@ -86,8 +92,7 @@ def validate_url(value: str) -> str:
         raise ValueError("Invalid domain format.")
     
     # Basic domain name validation
-    domain_regex = re.compile(r'^[a-zA-Z0-9.-]+$')
-    if not domain_regex.match(domain):
+    if not DOMAIN_REGEX.match(domain):
         raise ValueError("Domain contains invalid characters.")
     
     # Return the validated URL as string
@@ -99,7 +104,7 @@ def validate_version(value: str) -> str:
     The version should be in the format x.y.z where x, y, and z are integers.
     """
     # Check if the value is match the version format and has a minimum length
-    if not re.match(r'^\d+\.\d+\.\d+$', value) and len(value.strip()) < 5:
+    if not VERSION_REGEX.match(value) and len(value.strip()) < 5:
         raise ValueError("Version must be in semantic versioning format: x.y.z")
     
     return value.strip()
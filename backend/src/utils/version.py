@@ -0,0 +1,30 @@
+import re
+from typing import Optional
+
+VERSION_REGEX = re.compile(r"^(\d+)\.(\d+)\.(\d+)$")
+
+# Each version part is packed into 20 bits, so the key fits in a BSON int64
+VERSION_PART_BITS = 20
+VERSION_PART_MAX = (1 << VERSION_PART_BITS) - 1
+
+
+def get_version_key(version: Optional[str]) -> Optional[int]:
+    """
+    Pack a semantic version "x.y.z" into a single sortable integer.
+
+    Sorting on this key orders versions numerically ("1.10.0" > "1.9.0"),
+    which a plain string sort on `firmware_version` does not.
+    Returns None if the version is missing or not in x.y.z format.
+    """
+    if not version:
+        return None
+
+    match = VERSION_REGEX.match(version.strip())
+    if not match:
+        return None
+
+    major, minor, patch = (int(part) for part in match.groups())
+    if max(major, minor, patch) > VERSION_PART_MAX:
+        return None
+
+    return (major << (VERSION_PART_BITS * 2)) | (minor << VERSION_PART_BITS) | patch
@@ -10,6 +10,7 @@ export interface Node {
   firmware_url: string;
   firmware_version: string;
   is_group: boolean;
+  firmware_id?: string | null; // Firmware version document, when a specific version was requested
 }
 
 export interface AddNodeRequest {
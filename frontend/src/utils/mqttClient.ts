@@ -4,16 +4,24 @@ import type { MQTTPublishPayload } from "@/types";
 // Define the MQTT client type locally to avoid import issues
 type MQTTClient = ReturnType<typeof mqtt.connect>;
 
+// The first message of a session holds every field, the next ones only hold the
+// fields that changed along with node_codename, flash_status and session_id.
+// Every message holds the source of the log, cloud and local logs share the topic
 export interface LogMQTTMessage {
+  source?: "cloud" | "local";
   node_codename: string;
-  node_mac: string;
-  firmware_version: string;
-  firmware_size_kb: number;
-  download_started_at: string;
-  bytes_written: number;
-  download_duration_sec: number;
-  download_speed_kbps: number;
-  download_completed_at: string;
+  node_mac?: string;
+  node_location?: string;
+  node_type?: string;
+  node_id?: string;
+  firmware_version?: string;
+  firmware_size_kb?: number;
+  download_started_at?: string;
+  bytes_written?: number;
+  download_duration_sec?: number;
+  download_speed_kbps?: number;
+  download_completed_at?: string;
+  flash_completed_at?: string;
   flash_status: "in progress" | "success" | "failed";
   session_id: string;
 }
@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback } from "react";
+import { useState, useEffect, useCallback, useRef } from "react";
 import { Button } from "@/components/ui/button";
 import { RefreshCw } from "lucide-react";
 import Header from "@/components/layout/Header";
@@ -15,6 +15,35 @@ import Squares from "@/components/background/Squares";
 import type { FirmwareLog, LogsListParams, LogFilterOptions } from "@/types";
 import { toast } from "@/utils/notifications";
 
+// Check if a log row belongs to the session of a message (by session_id or node_codename + firmware_version + timestamp)
+const isSameLog = (log: FirmwareLog, message: LogMQTTMessage) =>
+  log.session_id === message.session_id ||
+  (log.node_codename === message.node_codename &&
+    log.firmware_version === message.firmware_version &&
+    new Date(log.download_started_at).getTime() ===
+      new Date(message.download_started_at ?? "").getTime());
+
+// Convert a MQTT message holding every field to FirmwareLog format
+const toFirmwareLog = (message: Required<LogMQTTMessage>): FirmwareLog => ({
+  _id: `temp_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`, // Temporary ID until refresh
+  created_at: new Date().toISOString(),
+  session_id: message.session_id,
+  node_mac: message.node_mac,
+  node_location: message.node_location ?? "", // Otherwise filled on next refresh
+  node_type: message.node_type ?? "", // Otherwise filled on next refresh
+  node_id: message.node_id ?? "", // Otherwise filled on next refresh
+  node_codename: message.node_codename,
+  firmware_version: message.firmware_version,
+  download_started_at: message.download_started_at,
+  firmware_size_kb: message.firmware_size_kb,
+  bytes_written: message.bytes_written,
+  download_duration_sec: message.download_duration_sec,
+  download_speed_kbps: message.download_speed_kbps,
+  download_completed_at: message.download_completed_at,
+  flash_completed_at: message.flash_completed_at ?? "", // Otherwise updated later
+  flash_status: message.flash_status,
+});
+
 export default function Log() {
   const [logs, setLogs] = useState<FirmwareLog[]>([]);
   const [loading, setLoading] = useState(true);
@@ -40,82 +69,100 @@ export default function Log() {
 
   usePageTitle("Log Updates");
 
-  // Handle real-time log messages from MQTT
-  const handleLogMessage = useCallback(
-    (message: LogMQTTMessage) => {
-      console.log("Received real-time log message:", message);
+  // Sessions whose whole log is being fetched, their next deltas don't fetch it again
+  const pendingDetailSessions = useRef(new Set<string>());
 
-      // Convert MQTT message to FirmwareLog format
-      const newLog: FirmwareLog = {
-        _id: `temp_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`, // Temporary ID until refresh
-        created_at: new Date().toISOString(),
-        session_id: message.session_id,
-        node_mac: message.node_mac,
-        node_location: "", // Will be filled on next refresh
-        node_type: "", // Will be filled on next refresh
-        node_id: "", // Will be filled on next refresh
-        node_codename: message.node_codename,
-        firmware_version: message.firmware_version,
-        download_started_at: message.download_started_at,
-        firmware_size_kb: message.firmware_size_kb,
-        bytes_written: message.bytes_written,
-        download_duration_sec: message.download_duration_sec,
-        download_speed_kbps: message.download_speed_kbps,
-        download_completed_at: message.download_completed_at,
-        flash_completed_at: "", // Will be updated later
-        flash_status: message.flash_status,
-      };
-
-      // Check if this log already exists (by session_id or node_codename + firmware_version + timestamp)
+  // Merge a message into the row of its session, or add newLog at the beginning
+  const upsertLog = useCallback(
+    (message: LogMQTTMessage, newLog: FirmwareLog | null) => {
       setLogs((prevLogs) => {
-        const existingLogIndex = prevLogs.findIndex(
-          (log) =>
-            log.session_id === message.session_id ||
-            (log.node_codename === message.node_codename &&
-              log.firmware_version === message.firmware_version &&
-              new Date(log.download_started_at).getTime() ===
-                new Date(message.download_started_at).getTime()),
+        const existingLogIndex = prevLogs.findIndex((log) =>
+          isSameLog(log, message),
         );
 
         if (existingLogIndex >= 0) {
-          // Update existing log
+          // Update existing log, the backend only sends the fields that changed
+          const changedFields = Object.fromEntries(
+            Object.entries(message).filter(
+              ([key, value]) => key !== "source" && value !== undefined,
+            ),
+          ) as Partial<FirmwareLog>;
           const updatedLogs = [...prevLogs];
           updatedLogs[existingLogIndex] = {
             ...updatedLogs[existingLogIndex],
-            ...newLog,
+            ...changedFields,
             _id: updatedLogs[existingLogIndex]._id, // Keep original ID
           };
           return updatedLogs;
-        } else {
-          // Add new log at the beginning
-          return [newLog, ...prevLogs];
         }
-      });
+        if (!newLog) {
+          return prevLogs;
+        }
 
-      // Update pagination total count
-      setPagination((prev) => ({
-        ...prev,
-        total_data:
-          prev.total_data +
-          ((prevLogs) => {
-            const exists = prevLogs.some(
-              (log) =>
-                log.session_id === message.session_id ||
-                (log.node_codename === message.node_codename &&
-                  log.firmware_version === message.firmware_version &&
-                  new Date(log.download_started_at).getTime() ===
-                    new Date(message.download_started_at).getTime()),
-            );
-            return exists ? 0 : 1;
-          })(logs),
-      }));
+        // Add new log at the beginning and update pagination total count
+        setPagination((prev) => ({ ...prev, total_data: prev.total_data + 1 }));
+        return [newLog, ...prevLogs];
+      });
 
       // Show toast notification
       toast.success("New Log Update", {
         description: `${message.node_codename}: ${message.flash_status}`,
       });
     },
-    [logs],
+    [],
+  );
+
+  // Add the whole log of a session, fetched once however many deltas arrive meanwhile
+  const fetchLogDetail = useCallback(
+    (sessionId: string) => {
+      const pending = pendingDetailSessions.current;
+      if (pending.has(sessionId)) {
+        return;
+      }
+      pending.add(sessionId);
+
+      logController
+        .getLogDetail(sessionId)
+        .then((response) => {
+          if (response.data) {
+            upsertLog(response.data, response.data);
+          }
+        })
+        .catch((error) => {
+          console.error("Failed to fetch log detail:", error);
+        })
+        .finally(() => {
+          pending.delete(sessionId);
+        });
+    },
+    [upsertLog],
+  );
+
+  // Handle real-time log messages from MQTT
+  const handleLogMessage = useCallback(
+    (message: LogMQTTMessage) => {
+      console.log("Received real-time log message:", message);
+
+      // Local OTA logs are published on the same topic, they're shown by the local log view
+      if (message.source === "local") {
+        return;
+      }
+
+      // Only the first message of a session holds node_mac, a delta of a session
+      // that is not in view can't make a row, fetch the whole log instead
+      const isDelta = message.node_mac === undefined;
+      if (isDelta && !logs.some((log) => isSameLog(log, message))) {
+        fetchLogDetail(message.session_id);
+        return;
+      }
+
+      // Full message, or a delta merged into the row in view
+      upsertLog(
+        message,
+        isDelta ? null : toFirmwareLog(message as Required<LogMQTTMessage>),
+      );
+    },
+    [logs, upsertLog, fetchLogDetail],
   );
 
   // Subscribe to MQTT log messages